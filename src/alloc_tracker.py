@@ -0,0 +1,284 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # スクリプト実行ではウィンドウを開かない
+
+import argparse
+import ast
+import sys
+import tracemalloc
+from collections import Counter
+import pygame
+
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+THIS_FILE = os.path.abspath(__file__)
+SETTLE_FRAMES = 3  # 状態が変わってからこのフレーム数までは定常状態とみなさない（レベル生成などがあるため）
+
+# ヘルパークラス: ソースの行番号から関数名を引く
+class FunctionIndex:
+    """
+    ファイルを ast で解析し、行番号を含む最も内側の関数名（クラス名.関数名）を返す
+    tracemalloc のトレースバックには行番号しかないので、呼び出し元の関数名に変換するために使う
+    """
+    def __init__(self):
+        self._spans = {}  # filename -> [(start, end, qualname), ...]
+
+    def lookup(self, filename, lineno):
+        spans = self._spans.get(filename)
+        if spans is None:
+            spans = self._spans[filename] = self._parse(filename)
+        best = None
+        for start, end, qualname in spans:
+            if start <= lineno <= end and (best is None or start >= best[0]):
+                best = (start, end, qualname)
+        name = best[2] if best else "<module>"
+        return f"{os.path.basename(filename)}:{name}"
+
+    def _parse(self, filename):
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read())
+        except (OSError, SyntaxError):
+            return []
+        spans = []
+
+        def visit(node, prefix):
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    qualname = prefix + child.name
+                    if not isinstance(child, ast.ClassDef):
+                        spans.append((child.lineno, child.end_lineno, qualname))
+                    visit(child, qualname + ".")
+                else:
+                    visit(child, prefix)
+        visit(tree, "")
+        return spans
+
+def is_game_file(filename):
+    return filename.startswith(SOURCE_DIR) and filename != THIS_FILE
+
+class AllocationTracker:
+    """
+    フレームごとのアロケーションを呼び出し元の関数ごとに集計する
+    - pygame.Surface と SysFont の生成回数（一時的なものも含めて正確に数える。フレームごと）
+    - フレーム中のピークメモリ（一時的な確保も含む）と、フレーム後に増えたブロック数（フレームごと）
+    - tracemalloc のスナップショット差分で、残ったメモリを呼び出し元ごとに集計（計測区間ごと。
+      スナップショットの比較は重いので毎フレームは行わない）
+    depth: tracemalloc が記録するスタックの深さ
+    """
+    def __init__(self, depth=16):
+        self.depth = depth
+        self.index = FunctionIndex()
+        self.surfaces = Counter()
+        self.fonts = Counter()
+        self.frames = []  # フレームごとのレポート
+        self._window_snapshot = None
+        self._start_memory = 0
+        self._start_blocks = 0
+        self._original_surface = None
+        self._original_sysfont = None
+
+    def call_site(self, frame):
+        # ゲームのソース内で最も内側の呼び出し元
+        while frame is not None:
+            if is_game_file(frame.f_code.co_filename):
+                return self.index.lookup(frame.f_code.co_filename, frame.f_lineno)
+            frame = frame.f_back
+        return "<other>"
+
+    def start(self):
+        tracker = self
+        self._original_surface = pygame.Surface
+        self._original_sysfont = pygame.font.SysFont
+
+        # pygame.Surface をサブクラスに差し替えて生成回数を数える
+        class CountingSurface(self._original_surface):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                tracker.surfaces[tracker.call_site(sys._getframe(1))] += 1
+
+        original_sysfont = self._original_sysfont
+
+        def counting_sysfont(*args, **kwargs):
+            tracker.fonts[tracker.call_site(sys._getframe(1))] += 1
+            return original_sysfont(*args, **kwargs)
+
+        pygame.Surface = CountingSurface
+        pygame.font.SysFont = counting_sysfont
+        tracemalloc.start(self.depth)
+
+    def stop(self):
+        tracemalloc.stop()
+        pygame.Surface = self._original_surface
+        pygame.font.SysFont = self._original_sysfont
+        self._window_snapshot = None
+
+    def begin_frame(self):
+        self.surfaces.clear()
+        self.fonts.clear()
+        tracemalloc.reset_peak()
+        self._start_memory = tracemalloc.get_traced_memory()[0]
+        self._start_blocks = sys.getallocatedblocks()
+
+    def end_frame(self):
+        """
+        フレームのレポートを記録して返す
+        objects: Surface/SysFont の生成数 + フレーム後に増えたメモリブロック数
+        peak_bytes: フレーム開始時からのピークメモリの増加量（一時的な確保を含む）
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        new_blocks = max(0, sys.getallocatedblocks() - self._start_blocks)
+        report = {
+            "frame": len(self.frames),
+            "surfaces": dict(self.surfaces),
+            "fonts": dict(self.fonts),
+            "new_blocks": new_blocks,
+            "objects": sum(self.surfaces.values()) + sum(self.fonts.values()) + new_blocks,
+            "peak_bytes": max(0, peak - self._start_memory),
+            "net_bytes": current - self._start_memory,
+        }
+        self.frames.append(report)
+        return report
+
+    def begin_window(self):
+        self._window_snapshot = tracemalloc.take_snapshot()
+
+    def end_window(self):
+        """
+        begin_window() からの間に残ったメモリを呼び出し元ごとに集計して (バイト数, ブロック数) の辞書で返す
+        """
+        retained = Counter()
+        blocks = Counter()
+        for stat in tracemalloc.take_snapshot().compare_to(self._window_snapshot, "traceback"):
+            if stat.count_diff == 0 and stat.size_diff == 0:
+                continue
+            site = self.traceback_site(stat.traceback)
+            if site is not None:
+                retained[site] += stat.size_diff
+                blocks[site] += stat.count_diff
+        self._window_snapshot = None
+        return {site: (retained[site], blocks[site]) for site in retained}
+
+    def traceback_site(self, traceback):
+        # トレースバックの中でゲームのソース内の最も内側のフレーム（トラッカー自身の確保は除く）
+        for frame in reversed(traceback):
+            if frame.filename == THIS_FILE:
+                return None
+            if is_game_file(frame.filename):
+                return self.index.lookup(frame.filename, frame.lineno)
+        return None
+
+def summarize(reports, retained=None, top=10):
+    # フレームごとの平均と最大、呼び出し元ごとの1フレームあたりの平均を表示する
+    if not reports:
+        print("No frames measured")
+        return
+    count = len(reports)
+    objects = [report["objects"] for report in reports]
+    peaks = [report["peak_bytes"] for report in reports]
+    print(f"Frames: {count}")
+    print(f"Objects per frame: mean {sum(objects) / count:.1f}, max {max(objects)}")
+    print(f"Peak bytes per frame: mean {sum(peaks) / count:,.0f}, max {max(peaks):,}")
+    for key, label in (("surfaces", "Surfaces created"), ("fonts", "SysFont calls")):
+        totals = Counter()
+        for report in reports:
+            totals.update(report[key])
+        if totals:
+            print(f"\n{label} per frame by call site:")
+            for site, total in totals.most_common(top):
+                print(f"  {total / count:10.2f}  {site}")
+    if retained:
+        print("\nRetained memory over the measured frames by call site (bytes, blocks):")
+        for site, (size, blocks) in sorted(retained.items(), key=lambda item: -abs(item[1][0]))[:top]:
+            print(f"  {size:+12,} {blocks:+8,}  {site}")
+
+def run_script(tracker, cycles=3, warmup_cycles=1, max_shot_frames=600):
+    """
+    決まった操作（難易度選択、照準、ドラッグ、発射、飛行、次の弾待ち）をヘッドレスで再生し、
+    ウォームアップ後のフレームのレポートと、その間に残ったメモリの呼び出し元ごとの集計を返す
+    """
+    import slingshot_game as game
+    game.VERBOSE = False
+    game.init_display()
+    session = game.Game()
+    measured = []
+    retained = {}
+    last_state = [None, 0]  # 直前の状態、その状態が続いているフレーム数
+
+    def frame(mouse_pos, events=()):
+        state = session.game_state
+        tracker.begin_frame()
+        for event in events:
+            session.handle_event(event)
+        session.update(mouse_pos)
+        game.draw_game(game.screen, session)
+        report = tracker.end_frame()
+
+        if session.game_state == state == last_state[0]:
+            last_state[1] += 1
+        else:
+            last_state[:] = [session.game_state, 0]
+        report["state"] = session.game_state
+        report["steady"] = last_state[1] >= SETTLE_FRAMES
+        if cycle >= warmup_cycles:
+            measured.append(report)
+
+    for cycle in range(warmup_cycles + cycles):
+        if cycle == warmup_cycles:
+            tracker.begin_window()
+        session.current_difficulty = game.DIFFICULTY_NORMAL
+        session.game_state = game.DIFFICULTY_SELECT
+        for _ in range(30):
+            frame((0, 0))
+        frame((0, 0), [pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, mod=0, unicode="\r")])
+
+        anchor = (session.projectile.x, session.projectile.y)
+        for _ in range(30):
+            frame(anchor)
+        frame(anchor, [pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=anchor, button=1)])
+        for step in range(60):
+            aim = (anchor[0] - 100 * step / 59, anchor[1] + 60 * step / 59)
+            frame(aim)
+        frame(aim, [pygame.event.Event(pygame.MOUSEBUTTONUP, pos=aim, button=1)])
+
+        flight = 0
+        while session.game_state == game.PROJECTILE_IN_MOTION and flight < max_shot_frames:
+            frame((0, 0))
+            flight += 1
+        for _ in range(60):
+            frame((0, 0))
+    if cycles > 0:
+        retained = tracker.end_window()
+    session.assets.shutdown()
+    return measured, retained
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-frame allocation report and allocation budget test")
+    parser.add_argument("--cycles", type=int, default=1, help="scripted shot cycles to measure")
+    parser.add_argument("--warmup-cycles", type=int, default=1, help="cycles run before measuring (fills caches)")
+    parser.add_argument("--max-objects", type=int, default=None,
+                        help="budget: fail if a steady-state frame allocates more objects than this")
+    parser.add_argument("--max-bytes", type=int, default=None,
+                        help="budget: fail if a steady-state frame's peak allocation exceeds this many bytes")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    tracker = AllocationTracker()
+    tracker.start()
+    try:
+        reports, retained = run_script(tracker, args.cycles, args.warmup_cycles)
+    finally:
+        tracker.stop()
+    summarize(reports, retained, args.top)
+
+    steady = [report for report in reports if report["steady"]]
+    over_budget = [report for report in steady
+                   if (args.max_objects is not None and report["objects"] > args.max_objects) or
+                      (args.max_bytes is not None and report["peak_bytes"] > args.max_bytes)]
+    if args.max_objects is not None or args.max_bytes is not None:
+        print(f"\nBudget: {args.max_objects} objects, {args.max_bytes} bytes per frame")
+        for report in over_budget[:5]:
+            print(f"  frame {report['frame']} (state {report['state']}): {report['objects']} objects, {report['peak_bytes']:,} bytes, "
+                  f"surfaces {report['surfaces']}")
+        print(f"{len(over_budget)} of {len(steady)} steady-state frames over budget" if over_budget
+              else f"All {len(steady)} steady-state frames within budget")
+    pygame.quit()
+    sys.exit(1 if over_budget else 0)
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import pygame
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tga")
+SOUND_EXTENSIONS = (".wav", ".ogg", ".mp3")
+FAILURE_RETRY_INTERVAL = 2.0  # 読み込みに失敗したアセットを再試行するまでの秒数
+
+# ヘルパークラス: 画像・サウンドのバックグラウンド読み込みとキャッシュ
+class AssetManager:
+    """
+    アセットをバックグラウンドスレッドで読み込み、メモリ上限付きのLRUキャッシュで保持する
+    画像は読み込み時にディスプレイのピクセル形式へ変換する (convert / convert_alpha)
+    同じアセットへの重複したリクエストは1回の読み込みにまとめる
+    base_dir: アセットのルートディレクトリ (名前はここからの相対パス)
+    memory_budget: キャッシュに保持する最大バイト数
+    workers: 読み込みスレッドの数
+    """
+    def __init__(self, base_dir, memory_budget=64 * 1024 * 1024, workers=2):
+        self.base_dir = base_dir
+        self.memory_budget = memory_budget
+        self.memory_used = 0
+        self._cache = OrderedDict()  # name -> (asset, size)
+        self._pending = {}  # name -> Future
+        self._failed = {}  # name -> (例外, 失敗した時刻)（毎フレーム再試行しないように記録）
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-loader")
+
+    def request(self, name):
+        """
+        アセットの読み込みを要求し、読み込み結果の Future を返す
+        既にキャッシュ済み・読み込み中なら新しく読み込まない
+        """
+        with self._lock:
+            if name in self._cache:
+                self._cache.move_to_end(name)
+                future = Future()
+                future.set_result(self._cache[name][0])
+                return future
+            if name in self._pending:
+                return self._pending[name]
+            if name in self._failed:
+                # 失敗はしばらくだけ覚えておく（ファイルが後から置かれたり直されたりしたら読み込めるように）
+                if not self._retry_due(name):
+                    future = Future()
+                    future.set_exception(self._failed[name][0])
+                    return future
+                del self._failed[name]
+            future = self._executor.submit(self._load, name)
+            self._pending[name] = future
+            return future
+
+    def prefetch(self, names):
+        # レベル開始前にまとめて読み込みを開始する
+        for name in names:
+            self.request(name)
+
+    def get(self, name, wait=False):
+        """
+        読み込み済みのアセットを返す
+        wait: Trueなら読み込みが終わるまで待つ。Falseでまだ読み込み中ならNoneを返す
+        """
+        future = self.request(name)
+        if not wait and not future.done():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            return None
+
+    def is_ready(self, names):
+        # 指定したアセットが全て読み込み済み（または読み込み失敗）かどうか
+        # 失敗から FAILURE_RETRY_INTERVAL が過ぎたものは再読み込み待ちなので含めない
+        with self._lock:
+            return all(name in self._cache or (name in self._failed and not self._retry_due(name))
+                       for name in names)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _retry_due(self, name):
+        # 失敗したアセットを読み直す時刻になったか（ロックを取った状態で呼ぶ）
+        return time.monotonic() - self._failed[name][1] >= FAILURE_RETRY_INTERVAL
+
+    def _load(self, name):
+        path = os.path.join(self.base_dir, name)
+        try:
+            extension = os.path.splitext(name)[1].lower()
+            if extension in IMAGE_EXTENSIONS:
+                asset = pygame.image.load(path)
+                # ディスプレイのピクセル形式に変換しておくとblitが速くなる
+                if pygame.display.get_surface() is not None:
+                    if asset.get_flags() & pygame.SRCALPHA:
+                        asset = asset.convert_alpha()
+                    else:
+                        asset = asset.convert()
+                size = asset.get_pitch() * asset.get_height()
+            elif extension in SOUND_EXTENSIONS:
+                if pygame.mixer.get_init() is None:
+                    raise RuntimeError("mixer is not initialized")
+                asset = pygame.mixer.Sound(path)
+                frequency, sample_format, channels = pygame.mixer.get_init()
+                size = int(asset.get_length() * frequency) * channels * abs(sample_format) // 8
+            else:
+                raise ValueError(f"unsupported asset type: {name}")
+        except Exception as e:
+            print(f"Asset load failed: {name} ({e})")  # デバッグ用
+            with self._lock:
+                self._pending.pop(name, None)
+                self._failed[name] = (e, time.monotonic())
+            raise
+
+        self._store(name, asset, size)
+        return asset
+
+    def _store(self, name, asset, size):
+        with self._lock:
+            self._pending.pop(name, None)
+            self._cache[name] = (asset, size)
+            self.memory_used += size
+            # メモリ上限を超えたら最も長く使われていないアセットから破棄する
+            while self.memory_used > self.memory_budget and len(self._cache) > 1:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self.memory_used -= evicted_size
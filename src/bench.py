@@ -0,0 +1,296 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # ベンチマークではウィンドウを開かない
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import pygame
+import slingshot_game as game
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.10  # 基準より10%以上遅くなったら回帰とみなす
+MIN_SAMPLE_TIME = 0.02  # 1サンプルの最低計測時間（秒）
+FLIGHT_FRAMES = 60  # Projectile.update の計測で1発あたり進めるフレーム数
+MAX_SHOT_FRAMES = 1800
+
+# t分布の両側95%点（自由度 -> 値）。30を超えたら正規分布で近似する
+T_95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26, 10: 2.23,
+        12: 2.18, 15: 2.13, 20: 2.09, 25: 2.06, 30: 2.04}
+
+def t_value(degrees_of_freedom):
+    for df in sorted(T_95):
+        if degrees_of_freedom <= df:
+            return T_95[df]
+    return 1.96
+
+# 各ベンチマークは run(n) で約 n ステップ分を計測し、(経過ns, 実際のステップ数) を返す
+# 準備（オブジェクトの生成など）はタイマーの外で行う
+
+def launched_projectile(angle=-0.8, power=20):
+    slingshot = game.Slingshot(100, game.HEIGHT - 100)
+    projectile = game.Projectile(slingshot.x, slingshot.y - slingshot.height//2)
+    game.launch_projectile(projectile, angle, power)
+    return projectile
+
+def bench_projectile_update(n):
+    game.apply_difficulty_physics(game.DIFFICULTY_NORMAL)
+    projectiles = [launched_projectile(-0.4 - 0.1 * (i % 8), 12 + i % 18) for i in range(n // FLIGHT_FRAMES + 1)]
+    start = time.perf_counter_ns()
+    for projectile in projectiles:
+        for _ in range(FLIGHT_FRAMES):
+            projectile.update()
+    return time.perf_counter_ns() - start, len(projectiles) * FLIGHT_FRAMES
+
+def sample_points(rect, margin, count):
+    # 矩形の周り（当たる位置と当たらない位置の両方）に散らばった点
+    rng = random.Random(0)
+    x, y, width, height = rect
+    return [(rng.uniform(x - margin, x + width + margin), rng.uniform(y - margin, y + height + margin))
+            for _ in range(count)]
+
+def bench_obstacle_check_collision(n):
+    game.apply_difficulty_physics(game.DIFFICULTY_NORMAL)
+    obstacle = game.Level(3).obstacles[0]
+    points = sample_points((obstacle.x, obstacle.y, obstacle.width, obstacle.height), 60, 1024)
+    projectile = launched_projectile()
+    start = time.perf_counter_ns()
+    for i in range(n):
+        projectile.x, projectile.y = points[i & 1023]
+        obstacle.check_collision(projectile)
+    return time.perf_counter_ns() - start, n
+
+def bench_target_check_collision(n):
+    # 飛行中のほとんどのフレームと同じく、当たらない位置での判定を計測する
+    target = game.Level(1).targets[0]
+    points = [(x, y) for x, y in sample_points((target.x, target.y, target.width, target.height), 120, 4096)
+              if not (target.x - 20 < x < target.x + target.width + 20 and
+                      target.y - 20 < y < target.y + target.height + 20)][:1024]
+    projectile = launched_projectile()
+    start = time.perf_counter_ns()
+    for i in range(n):
+        projectile.x, projectile.y = points[i % len(points)]
+        target.check_collision(projectile)
+    return time.perf_counter_ns() - start, n
+
+def bench_target_update_particles(n):
+    # ヒット直後の標的（パーティクル20個）を、パーティクルが消えるまで進める
+    frames = 40
+    targets = [game.Target(500, 400) for _ in range(n // frames + 1)]
+    for target in targets:
+        target.hit = True
+        target.generate_hit_particles()
+    start = time.perf_counter_ns()
+    for target in targets:
+        for _ in range(frames):
+            target.update()
+    return time.perf_counter_ns() - start, len(targets) * frames
+
+def bench_level_is_complete(n):
+    # 最後の標的以外はヒット済み（全ての標的を調べる最悪ケース）
+    level = game.Level(3)
+    for target in level.targets[:-1]:
+        target.hit = True
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        level.is_complete()
+    return time.perf_counter_ns() - start, n
+
+def bench_force_field_sample(n):
+    # 力場のあるレベルで、レベル全体に散らばった点の力を1点ずつ補間する
+    field = game.Level(5).field
+    points = sample_points((0, 0, field.width, field.height), 0, 1024)
+    start = time.perf_counter_ns()
+    for i in range(n):
+        field.sample(*points[i & 1023])
+    return time.perf_counter_ns() - start, n
+
+def bench_force_field_particles(n):
+    # ヒット直後のパーティクル20個をまとめて力場で流す（1ステップ = パーティクル1個）
+    field = game.Level(5).field
+    batches = [game.Target(500, 300) for _ in range(n // 20 + 1)]
+    for target in batches:
+        target.generate_hit_particles()
+    start = time.perf_counter_ns()
+    for target in batches:
+        field.push_particles(target.particles)
+    return time.perf_counter_ns() - start, len(batches) * 20
+
+def make_input_latency_bench(late_latch):
+    def bench_input_latency(n):
+        # 照準のドラッグ中、画面に出る照準位置を決めたマウスの読み取りから flip() が終わるまでの時間（1ステップ = 1フレーム）
+        # late_latch=False はフレームの最初（update の前）に読んだ位置で描く従来の方法
+        screen = game.init_display()
+        session = game.Game()
+        session.apply_difficulty_settings()
+        anchor = session.camera.to_screen(session.projectile.x, session.projectile.y)
+        session.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=anchor, button=1))
+        frame = 0
+        sampled_at = 0
+
+        def sample_mouse():
+            # マウスがスリングショットの後ろで円を描くように動く
+            nonlocal sampled_at
+            sampled_at = time.perf_counter_ns()
+            return (anchor[0] - 80 + 40 * math.cos(frame * 0.1), anchor[1] + 40 + 40 * math.sin(frame * 0.1))
+
+        latency = 0
+        for frame in range(n):
+            session.update(sample_mouse())
+            game.draw_game(screen, session, sample_mouse if late_latch else None)
+            pygame.display.flip()
+            latency += time.perf_counter_ns() - sampled_at
+        session.assets.shutdown()
+        return latency, n
+    return bench_input_latency
+
+def make_shot_bench(level_number, difficulty):
+    def bench_shot(n):
+        # 決まった順のショットを n ステップに達するまで最後までシミュレーションし、物理ステップ数で割る
+        # レベルの生成はタイマーの外で行い、ショットごとの飛行だけを計測する
+        game.apply_difficulty_physics(difficulty)
+        rng = random.Random(level_number * 10 + difficulty)
+        elapsed = 0
+        steps = 0
+        while steps < n:
+            angle, power = rng.uniform(-1.2, -0.2), rng.uniform(10, 30)
+            level = game.Level(level_number, difficulty)
+            projectile = launched_projectile(angle, power)
+            frames = 0
+            start = time.perf_counter_ns()
+            while frames < MAX_SHOT_FRAMES:
+                game.step_shot(level, projectile)
+                frames += 1
+                if game.projectile_out_of_play(projectile, level.width) or level.is_complete():
+                    break
+            elapsed += time.perf_counter_ns() - start
+            steps += frames
+        return elapsed, steps
+    return bench_shot
+
+BENCHMARKS = {
+    "projectile_update": bench_projectile_update,
+    "obstacle_check_collision": bench_obstacle_check_collision,
+    "target_check_collision": bench_target_check_collision,
+    "target_update_particles": bench_target_update_particles,
+    "level_is_complete": bench_level_is_complete,
+    "force_field_sample": bench_force_field_sample,
+    "force_field_particles": bench_force_field_particles,
+    "input_to_present_early_sample": make_input_latency_bench(late_latch=False),
+    "input_to_present_late_latch": make_input_latency_bench(late_latch=True),
+}
+for _level_number in game.level_numbers():
+    for _difficulty in (game.DIFFICULTY_EASY, game.DIFFICULTY_NORMAL, game.DIFFICULTY_HARD):
+        BENCHMARKS[f"shot_level{_level_number}_d{_difficulty}"] = make_shot_bench(_level_number, _difficulty)
+
+def calibrate(run):
+    # 1サンプルが MIN_SAMPLE_TIME 以上かかるステップ数を探す
+    n = 64
+    while True:
+        elapsed, _ = run(n)
+        if elapsed >= MIN_SAMPLE_TIME * 1e9 or n >= 1 << 24:
+            return n
+        n *= 2
+
+def measure(run, samples=15, warmup=3):
+    """
+    ベンチマークを計測して ns/step の平均と95%信頼区間の半幅を返す
+    run: run(n) -> (経過ns, ステップ数)
+    samples: 計測するサンプル数
+    warmup: 捨てるサンプル数
+    """
+    random.seed(0)
+    n = calibrate(run)
+    for _ in range(warmup):
+        run(n)
+    per_step = []
+    for _ in range(samples):
+        elapsed, steps = run(n)
+        per_step.append(elapsed / steps)
+    mean = statistics.fmean(per_step)
+    ci95 = t_value(samples - 1) * statistics.stdev(per_step) / math.sqrt(samples) if samples > 1 else 0.0
+    return {
+        "ns_per_step": mean,
+        "ci95_ns": ci95,
+        "steps_per_sec": 1e9 / mean,
+        "samples": samples,
+        "steps_per_sample": n,
+    }
+
+def run_benchmarks(names, samples, warmup):
+    game.VERBOSE = False
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name], samples, warmup)
+        result = results[name]
+        print(f"{name:28s} {result['ns_per_step']:12,.0f} ns/step  ±{result['ci95_ns']:8,.0f}  "
+              f"{result['steps_per_sec']:14,.0f} steps/sec")
+    game.apply_difficulty_physics(game.DIFFICULTY_NORMAL)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(report, baseline, threshold):
+    """
+    基準と比較して回帰したベンチマーク名のリストを返す
+    信頼区間の分だけ余裕を持たせ、ノイズで回帰と判定しないようにする
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:28s} (no baseline)")
+            continue
+        change = result["ns_per_step"] / base["ns_per_step"] - 1
+        regressed = result["ns_per_step"] - result["ci95_ns"] > base["ns_per_step"] * (1 + threshold)
+        if regressed:
+            regressions.append(name)
+        print(f"{name:28s} {change:+7.1%}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def load_report(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_report(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless physics micro-benchmarks")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--samples", type=int, default=15)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as a regression (0.10 = 10%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="save the results as the new baseline")
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    report = run_benchmarks(names, args.samples, args.warmup)
+    if args.output:
+        save_report(args.output, report)
+
+    if args.update_baseline:
+        save_report(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}):")
+        regressions = compare(report, load_report(args.baseline), args.threshold)
+        pygame.quit()
+        sys.exit(1 if regressions else 0)
+    pygame.quit()
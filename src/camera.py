@@ -0,0 +1,40 @@
+# ヘルパークラス: 横スクロールのカメラ
+class Camera:
+    """
+    ワールド座標とスクリーン座標を変換する横スクロールのカメラ
+    x はビューの左端のワールド座標で、follow() で追いかける対象に向かってなめらかに動く
+    view_width: 画面の幅
+    margin: カリングで画面外とみなすまでの余白（ピクセル）
+    """
+    def __init__(self, view_width, margin=100):
+        self.view_width = view_width
+        self.margin = margin
+        self.x = 0.0
+        self.moving = False  # 目標の位置に向かって動いている途中か
+
+    @property
+    def offset(self):
+        # 描画で使う整数のオフセット（小数のままだと静止物がちらつく）
+        return int(round(self.x))
+
+    def follow(self, target_x, world_width, dt=1 / 60, smoothing=0.15):
+        """
+        対象が画面の左から40%の位置に来るように動かす（ワールドの端より外は映さない）
+        dt: 前回の follow() からの経過時間（秒）。フレームレートが変わっても同じ速さで動く
+        smoothing: 60fps の1フレームで残りの距離を縮める割合
+        """
+        desired = min(max(0.0, target_x - self.view_width * 0.4), max(0.0, world_width - self.view_width))
+        self.x += (desired - self.x) * (1 - (1 - smoothing) ** (min(dt, 0.25) * 60))
+        if abs(desired - self.x) < 0.5:
+            self.x = desired
+        self.moving = self.x != desired
+
+    def to_screen(self, x, y):
+        return x - self.offset, y
+
+    def to_world(self, x, y):
+        return x + self.offset, y
+
+    def visible(self, x, width=0):
+        # ワールド座標の範囲 [x, x + width] がビュー（と余白）に入っているか
+        return x + width >= self.x - self.margin and x <= self.x + self.view_width + self.margin
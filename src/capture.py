@@ -0,0 +1,248 @@
+import argparse
+import ctypes
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import pygame
+
+try:
+    from PIL import Image  # GIF の書き出しにだけ使う（なければ PNG 連番のみ）
+except ImportError:
+    Image = None
+
+FORMATS = ("png", "gif")
+MAX_DECIMATION = 8  # エンコーダーが追いつかないときに間引く最大間隔
+RECOVERY_FRAMES = 120  # この数だけ続けて余裕があれば間引きを1段階戻す
+WORKER_POLL_INTERVAL = 0.5  # 空きスロットを待つ間、この間隔でワーカーの生存を確認する（秒）
+MAX_SHOT_FRAMES = 600  # リプレイで1発を打ち切るフレーム数（障害物の上で止まらない弾があるため）
+
+def encode_worker(tasks, done, buffers, surface_format, directory, image_format):
+    # 共有バッファのフレームを画像ファイルに書き出す（ワーカープロセス）
+    size, bitsize, masks = surface_format
+    surface = pygame.Surface(size, 0, bitsize, masks)
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        slot, sequence = task
+        pixels = memoryview(surface.get_buffer())
+        pixels.cast("B")[:] = memoryview(buffers[slot]).cast("B")
+        pixels.release()
+        # ローカルのサーフェスにコピーしたらすぐにスロットを返す（エンコード中もゲームが使える）
+        done.put(slot)
+
+        path = os.path.join(directory, f"frame_{sequence:06d}.{image_format}")
+        if image_format == "png":
+            pygame.image.save(surface, path)
+        else:
+            # GIF はフレームごとの減色（重い処理）をワーカーで並列に済ませておく
+            image = Image.frombytes("RGB", size, pygame.image.tobytes(surface, "RGB"))
+            image.quantize(colors=256).save(path)
+
+# ヘルパークラス: ゲームループを止めないフレームキャプチャ
+class FrameCapture:
+    """
+    画面のピクセルを事前確保した共有バッファにコピーし、ワーカープロセスで PNG 連番や GIF に書き出す
+    空きバッファがなければフレームを捨て、捨てるたびに間引き間隔を広げる（ゲームループは待たせない）
+    surface: キャプチャするサーフェス（サイズとピクセル形式をここから決める）
+    directory: 出力先ディレクトリ
+    image_format: "png" または "gif" (GIF は Pillow が必要)
+    slots: 共有バッファの数
+    workers: エンコードするワーカープロセスの数
+    every: 何フレームごとにキャプチャするか
+    drop: False ならフレームを捨てずにバッファが空くまで待つ（ヘッドレスでの書き出し用）
+    """
+    def __init__(self, surface, directory, image_format="png", slots=8, workers=2, every=1, drop=True):
+        if image_format not in FORMATS:
+            raise ValueError(f"unknown capture format: {image_format}")
+        if image_format == "gif" and Image is None:
+            raise RuntimeError("GIF capture needs Pillow (pip install pillow); use png instead")
+        self.directory = directory
+        self.image_format = image_format
+        self.size = surface.get_size()
+        self.frame_bytes = surface.get_pitch() * surface.get_height()
+        self.base_every = every
+        self.every = every
+        self.drop = drop
+
+        self.frame = 0  # capture() が呼ばれた回数
+        self.sequence = 0  # 書き出したフレームの通し番号
+        self.index = []  # (sequence, frame, timestamp)
+        self.dropped = 0
+        self.healthy_frames = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Linux では fork を使う（spawn だとゲームのメインモジュールを読み込み直してしまう）
+        # macOS では SDL/Cocoa の初期化後の fork は安全でないので spawn にする
+        context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+        self.buffers = [context.RawArray(ctypes.c_ubyte, self.frame_bytes) for _ in range(slots)]
+        self.free = list(range(slots))
+        self.tasks = context.Queue()
+        self.done = context.Queue()
+        surface_format = (self.size, surface.get_bitsize(), surface.get_masks())
+        self.workers = [
+            context.Process(target=encode_worker,
+                            args=(self.tasks, self.done, self.buffers, surface_format, directory, image_format),
+                            daemon=True)
+            for _ in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def reclaim(self, block=False):
+        # エンコーダーが読み終えたスロットを空きに戻す
+        # block: 1つ空くまで待つ（待っている間にワーカーが落ちたら固まらずに例外にする）
+        try:
+            while block:
+                try:
+                    self.free.append(self.done.get(timeout=WORKER_POLL_INTERVAL))
+                    break
+                except queue.Empty:
+                    self.check_workers()
+            while True:
+                self.free.append(self.done.get_nowait())
+        except queue.Empty:
+            pass
+
+    def check_workers(self):
+        dead = [worker for worker in self.workers if not worker.is_alive()]
+        if dead:
+            raise RuntimeError(f"capture encoder worker exited unexpectedly (exit code {dead[0].exitcode})")
+
+    def capture(self, surface, timestamp=None):
+        """
+        surface の現在のピクセルをキャプチャする。キャプチャしたら True を返す
+        timestamp: フレームの時刻（秒）。省略すると現在時刻（GIF の表示時間に使う）
+        """
+        frame = self.frame
+        self.frame += 1
+        if frame % self.every:
+            return False
+        self.reclaim(block=not self.drop and not self.free)
+        if not self.free:
+            # エンコーダーが追いついていない: このフレームは捨てて、以降は間引く
+            self.dropped += 1
+            self.every = min(self.every * 2, MAX_DECIMATION)
+            self.healthy_frames = 0
+            return False
+        if self.every > self.base_every and len(self.free) > len(self.buffers) // 2:
+            self.healthy_frames += 1
+            if self.healthy_frames >= RECOVERY_FRAMES:
+                self.every = max(self.base_every, self.every // 2)
+                self.healthy_frames = 0
+
+        slot = self.free.pop()
+        memoryview(self.buffers[slot]).cast("B")[:] = surface.get_buffer()
+        self.tasks.put((slot, self.sequence))
+        self.index.append((self.sequence, frame, time.perf_counter() if timestamp is None else timestamp))
+        self.sequence += 1
+        return True
+
+    def close(self):
+        """
+        残りのフレームを書き出してワーカーを終了し、インデックス（と GIF）を書き出す
+        """
+        for _ in self.workers:
+            self.tasks.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.reclaim()
+
+        with open(os.path.join(self.directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": self.image_format,
+                "size": self.size,
+                "frames": [{"file": f"frame_{sequence:06d}.{self.image_format}", "frame": frame, "time": timestamp}
+                           for sequence, frame, timestamp in self.index],
+                "dropped": self.dropped,
+            }, f, indent=1)
+        if self.image_format == "gif" and self.index:
+            self.write_gif(os.path.join(self.directory, "clip.gif"))
+        print(f"Captured {self.sequence} frames to {self.directory} ({self.dropped} dropped)")
+
+    def write_gif(self, path):
+        # 減色済みのフレームをつなげてアニメーション GIF にする（表示時間はタイムスタンプから）
+        frames = [Image.open(os.path.join(self.directory, f"frame_{sequence:06d}.gif"))
+                  for sequence, _, _ in self.index]
+        times = [timestamp for _, _, timestamp in self.index]
+        durations = [max(20, round((end - start) * 1000)) for start, end in zip(times, times[1:])]
+        durations.append(durations[-1] if durations else 100)
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=durations, loop=0)
+        for frame in frames:
+            frame.close()
+
+def parse_shot(text):
+    angle, power = text.split(":")
+    return float(angle), float(power)
+
+def render_replay(directory, level_number, difficulty, shots, image_format="png", workers=2, every=1):
+    """
+    決まったショット列をヘッドレスで再生してキャプチャする
+    ディスプレイの更新も待ち時間もないので実時間より速く書き出せる（フレームは捨てない）
+    shots: [(角度, パワー), ...]
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import slingshot_game as game
+    game.VERBOSE = False
+    game.init_display()
+
+    session = game.Game()
+    session.current_difficulty = difficulty
+    session.apply_difficulty_settings()
+    if level_number != 1:
+        session.current_level = game.Level(level_number, difficulty)
+        session.projectile_count = session.current_level.projectile_count
+
+    capture = FrameCapture(game.screen, directory, image_format, workers=workers, every=every, drop=False)
+    start = time.perf_counter()
+    frame = 0
+
+    def render():
+        nonlocal frame
+        game.draw_game(game.screen, session)
+        capture.capture(game.screen, timestamp=frame / 60)
+        frame += 1
+
+    try:
+        for angle, power in shots:
+            if session.game_state != game.AIMING:
+                break
+            render()
+            session.launch(angle, power)
+            shot_frames = 0
+            while session.game_state == game.PROJECTILE_IN_MOTION and shot_frames < MAX_SHOT_FRAMES:
+                session.update((0, 0))
+                render()
+                shot_frames += 1
+            # 次の弾までの待ち時間も1秒分のフレームとして書き出す（実時間では待たない）
+            for _ in range(60):
+                render()
+            # スペースキーと同じく、止まらない弾も打ち切って次の弾へ
+            if session.game_state in (game.WAITING_FOR_NEXT_SHOT, game.PROJECTILE_IN_MOTION) \
+                    and session.projectile_count > 0:
+                session.set_next_projectile()
+        for _ in range(60):
+            session.update((0, 0))
+            render()
+    finally:
+        capture.close()
+        session.assets.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {frame} frames ({frame / 60:.1f}s of gameplay) in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a replay of fixed shots to a PNG sequence or GIF")
+    parser.add_argument("output", help="output directory")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--difficulty", type=int, choices=[0, 1, 2], default=1)
+    parser.add_argument("--shots", type=parse_shot, nargs="+", default=[(-0.7, 22.0), (-0.5, 26.0), (-0.9, 20.0)],
+                        help="shots as angle:power (radians, 0-30)")
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--every", type=int, default=1, help="capture every Nth frame")
+    args = parser.parse_args()
+    render_replay(args.output, args.level, args.difficulty, args.shots, args.format, args.workers, args.every)
+    pygame.quit()
@@ -0,0 +1,38 @@
+import os
+
+# ヘルパークラス: ファイルの変更監視（ポーリング）
+class FileWatcher:
+    """
+    ディレクトリ内のファイルの更新時刻を定期的に調べ、変更・追加されたファイルを返す
+    外部ライブラリを使わずに os.stat だけで監視する
+    directory: 監視するディレクトリ
+    extension: 監視するファイルの拡張子
+    """
+    def __init__(self, directory, extension=".json"):
+        self.directory = directory
+        self.extension = extension
+        self.mtimes = self.scan()
+
+    def scan(self):
+        mtimes = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return mtimes
+        for name in names:
+            if name.endswith(self.extension):
+                path = os.path.join(self.directory, name)
+                try:
+                    mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
+        return mtimes
+
+    def poll(self):
+        """
+        前回の poll() 以降に変更・追加されたファイルのパスを返す
+        """
+        mtimes = self.scan()
+        changed = [path for path, mtime in mtimes.items() if self.mtimes.get(path) != mtime]
+        self.mtimes = mtimes
+        return sorted(changed)
@@ -0,0 +1,154 @@
+import json
+import math
+from array import array
+
+try:
+    import numpy as np  # まとめてサンプリングするときだけ使う（なければ1点ずつ計算する）
+except ImportError:
+    np = None
+
+FIELD_CELL = 20  # グリッドの間隔（ピクセル）
+FIELD_TYPES = ("wind", "fan", "well")
+
+def source_force(source, x, y):
+    """
+    1つの力の発生源が (x, y) に与える加速度 (ピクセル/フレーム^2) を返す
+    source: 発生源の辞書（座標はワールド座標）
+      wind: x, y, width, height の矩形の中で一定の力 "force": [fx, fy]
+      fan:  (x, y) から "angle" 度の向きに、"range" までで弱まる力 "strength"（"spread" 度の扇形の中だけ）
+      well: (x, y) に引き寄せる力 "strength"（負なら押し返す）。"radius" より外は距離の2乗で弱まる
+    """
+    kind = source["type"]
+    if kind == "wind":
+        if source["x"] <= x <= source["x"] + source["width"] and source["y"] <= y <= source["y"] + source["height"]:
+            force_x, force_y = source["force"]
+            return force_x, force_y
+        return 0.0, 0.0
+
+    dx = x - source["x"]
+    dy = y - source["y"]
+    distance = math.sqrt(dx*dx + dy*dy)
+    if kind == "fan":
+        if distance >= source["range"] or distance == 0:
+            return 0.0, 0.0
+        angle = math.radians(source["angle"])
+        dir_x, dir_y = math.cos(angle), math.sin(angle)
+        if (dx*dir_x + dy*dir_y) / distance < math.cos(math.radians(source.get("spread", 25))):
+            return 0.0, 0.0
+        strength = source["strength"] * (1 - distance / source["range"])
+        return dir_x * strength, dir_y * strength
+    if kind == "well":
+        if distance == 0:
+            return 0.0, 0.0
+        radius = source["radius"]
+        # 中心付近で発散しないように、半径の内側では距離に比例させる
+        strength = source["strength"] * (distance / radius if distance < radius else (radius / distance) ** 2)
+        return -dx / distance * strength, -dy / distance * strength
+    raise ValueError(f"unknown force field type: {kind}")
+
+# ヘルパークラス: 事前計算した力のグリッド
+class ForceField:
+    """
+    レベルの全ての力の発生源を、読み込み時に一度だけベクトルのグリッドに焼き込む
+    飛行中は発生源の数に関係なく、グリッドの双線形補間だけで力を求める
+    sources: 発生源の辞書のリスト（source_force を参照）
+    width, height: グリッドで覆う範囲（ワールド座標）。範囲外は端の値を使う
+    cell: グリッドの間隔
+    """
+    def __init__(self, sources, width, height, cell=FIELD_CELL):
+        self.sources = sources
+        self.width = width
+        self.height = height
+        self.cell = cell
+        self.columns = int(math.ceil(width / cell)) + 1
+        self.rows = int(math.ceil(height / cell)) + 1
+
+        self.force_x = array("d")
+        self.force_y = array("d")
+        for row in range(self.rows):
+            y = row * cell
+            for column in range(self.columns):
+                x = column * cell
+                total_x = total_y = 0.0
+                for source in sources:
+                    force_x, force_y = source_force(source, x, y)
+                    total_x += force_x
+                    total_y += force_y
+                self.force_x.append(total_x)
+                self.force_y.append(total_y)
+        if np is not None:
+            # グリッドのメモリを共有する2次元配列（コピーしない）
+            self._grid_x = np.frombuffer(self.force_x, dtype=np.float64).reshape(self.rows, self.columns)
+            self._grid_y = np.frombuffer(self.force_y, dtype=np.float64).reshape(self.rows, self.columns)
+
+    def sample(self, x, y):
+        # (x, y) の力を周りの4つの格子点から双線形補間する
+        grid_x = min(max(x / self.cell, 0.0), self.columns - 1.000001)
+        grid_y = min(max(y / self.cell, 0.0), self.rows - 1.000001)
+        column = int(grid_x)
+        row = int(grid_y)
+        tx = grid_x - column
+        ty = grid_y - row
+        i = row * self.columns + column
+        j = i + self.columns
+        force_x, force_y = self.force_x, self.force_y
+        top_x = force_x[i] + (force_x[i + 1] - force_x[i]) * tx
+        bottom_x = force_x[j] + (force_x[j + 1] - force_x[j]) * tx
+        top_y = force_y[i] + (force_y[i + 1] - force_y[i]) * tx
+        bottom_y = force_y[j] + (force_y[j + 1] - force_y[j]) * tx
+        return top_x + (bottom_x - top_x) * ty, top_y + (bottom_y - top_y) * ty
+
+    def sample_many(self, xs, ys):
+        """
+        複数の点の力をまとめてサンプリングして (fxのリスト, fyのリスト) を返す
+        numpy があれば1回の配列演算で補間する
+        """
+        if np is None:
+            forces = [self.sample(x, y) for x, y in zip(xs, ys)]
+            return [force[0] for force in forces], [force[1] for force in forces]
+        grid_x = np.clip(np.asarray(xs, dtype=np.float64) / self.cell, 0.0, self.columns - 1.000001)
+        grid_y = np.clip(np.asarray(ys, dtype=np.float64) / self.cell, 0.0, self.rows - 1.000001)
+        column = grid_x.astype(np.intp)
+        row = grid_y.astype(np.intp)
+        tx = grid_x - column
+        ty = grid_y - row
+        result = []
+        for grid in (self._grid_x, self._grid_y):
+            top = grid[row, column] + (grid[row, column + 1] - grid[row, column]) * tx
+            bottom = grid[row + 1, column] + (grid[row + 1, column + 1] - grid[row + 1, column]) * tx
+            result.append((top + (bottom - top) * ty).tolist())
+        return result[0], result[1]
+
+    def push_particles(self, particles, scale=1.0):
+        """
+        パーティクル（'x', 'y', 'vx', 'vy' を持つ辞書）の速度に力を加える
+        scale: 力の倍率（軽いパーティクルほど流されやすくする）
+        """
+        if not particles:
+            return
+        forces_x, forces_y = self.sample_many([particle['x'] for particle in particles],
+                                              [particle['y'] for particle in particles])
+        for particle, force_x, force_y in zip(particles, forces_x, forces_y):
+            particle['vx'] += force_x * scale
+            particle['vy'] += force_y * scale
+
+# 焼き込んだグリッドのキャッシュ（同じレベルを何度も作るツールで焼き直さないため）
+_baked_fields = {}
+
+def bake_field(sources, width, height, cell=FIELD_CELL):
+    """
+    発生源のリストから ForceField を作る（同じ内容なら作成済みのものを返す）
+    発生源がなければ None を返す
+    """
+    if not sources:
+        return None
+    for source in sources:
+        if source.get("type") not in FIELD_TYPES:
+            raise ValueError(f"unknown force field type: {source.get('type')}")
+    key = (json.dumps(sources, sort_keys=True), width, height, cell)
+    field = _baked_fields.get(key)
+    if field is None:
+        if len(_baked_fields) >= 16:
+            _baked_fields.clear()  # レベル編集で何度も焼き直したときに増え続けないように
+        field = _baked_fields[key] = ForceField(sources, width, height, cell)
+    return field
@@ -0,0 +1,375 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # サーバーではウィンドウを開かない
+
+import argparse
+import asyncio
+import multiprocessing
+import random
+import time
+from collections import deque
+import slingshot_game as game
+
+TICK_RATE = 60
+TICK_BUDGET = 16  # 1ティックで1セッションが進められる最大物理ステップ数
+MAX_PENDING_SHOTS = 4  # セッションごとの未処理ショット数の上限（超えたら拒否）
+MAX_SHOT_FRAMES = 1800  # 止まらない弾を打ち切るフレーム数
+LATENCY_SAMPLES = 10000
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class ShotSession:
+    """
+    1つの対戦（レベルと弾）をヘッドレスでシミュレーションするセッション
+    提出されたショット（角度、パワー、申告したヒット数）を順番に再現して検証する
+    """
+    def __init__(self, session_id, level_number, difficulty):
+        self.session_id = session_id
+        self.difficulty = difficulty
+        self.physics = game.physics_params(difficulty)  # グローバルの物理パラメータは書き換えない
+        self.level = game.Level(level_number, difficulty)
+        self.slingshot = game.Slingshot(100, game.HEIGHT - 100)
+        self.shots_left = self.level.projectile_count
+        self.pending = deque()
+        self.projectile = None
+        self.current_shot = None
+        self.frames = 0
+        self.hits = 0
+
+    def submit(self, shot_id, angle, power, claimed_hits):
+        # バックプレッシャー: 未処理のショットが多すぎる場合は受け付けない
+        if len(self.pending) >= MAX_PENDING_SHOTS:
+            return False
+        self.pending.append((shot_id, angle, power, claimed_hits))
+        return True
+
+    @property
+    def busy(self):
+        return self.projectile is not None or bool(self.pending)
+
+    def tick(self, budget):
+        """
+        最大 budget ステップだけシミュレーションを進め、完了したショットの結果を返す
+        """
+        results = []
+        steps = 0
+        while steps < budget:
+            if self.projectile is None:
+                if not self.pending:
+                    break
+                self.start_next_shot(results)
+                continue
+
+            game.step_shot(self.level, self.projectile, physics=self.physics)
+            self.frames += 1
+            steps += 1
+            if game.projectile_out_of_play(self.projectile, self.level.width) or self.frames >= MAX_SHOT_FRAMES:
+                results.append(self.finish_shot())
+        return results, steps
+
+    def start_next_shot(self, results):
+        shot_id, angle, power, claimed_hits = self.pending.popleft()
+        if self.shots_left <= 0 or self.level.is_complete():
+            results.append({"session": self.session_id, "shot": shot_id, "status": "rejected",
+                            "reason": "no shots left"})
+            return
+        self.shots_left -= 1
+        self.projectile = game.Projectile(self.slingshot.x, self.slingshot.y - self.slingshot.height//2)
+        game.launch_projectile(self.projectile, angle, power)
+        self.current_shot = (shot_id, claimed_hits)
+        self.frames = 0
+        self.hits = sum(target.hit for target in self.level.targets)
+
+    def finish_shot(self):
+        shot_id, claimed_hits = self.current_shot
+        hits = sum(target.hit for target in self.level.targets) - self.hits
+        self.projectile = None
+        self.current_shot = None
+        return {
+            "session": self.session_id,
+            "shot": shot_id,
+            "status": "verified" if claimed_hits is None or claimed_hits == hits else "mismatch",
+            "hits": hits,
+            "frames": self.frames,
+            "level_complete": self.level.is_complete(),
+        }
+
+class SessionHost:
+    """
+    1プロセス内で多数のセッションを asyncio のティックループで動かすホスト
+    tick_budget: 1ティックで1セッションが進められる最大ステップ数
+    max_sessions: このホストが受け付けるセッション数の上限
+    """
+    def __init__(self, tick_rate=TICK_RATE, tick_budget=TICK_BUDGET, max_sessions=1000):
+        game.VERBOSE = False
+        self.tick_interval = 1.0 / tick_rate
+        self.tick_budget = tick_budget
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.results = []
+        self.tick_latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.ticks = 0
+        self.overruns = 0  # ティック間隔に収まらなかったティック数
+        self.steps = 0
+        self.running = False
+
+    def create_session(self, session_id, level_number, difficulty):
+        if len(self.sessions) >= self.max_sessions:
+            return False
+        self.sessions[session_id] = ShotSession(session_id, level_number, difficulty)
+        return True
+
+    def close_session(self, session_id):
+        self.sessions.pop(session_id, None)
+
+    def submit_shot(self, session_id, shot_id, angle, power, claimed_hits=None):
+        session = self.sessions.get(session_id)
+        if session is None or not session.submit(shot_id, angle, power, claimed_hits):
+            self.results.append({"session": session_id, "shot": shot_id, "status": "rejected",
+                                 "reason": "unknown session" if session is None else "backpressure"})
+            return False
+        return True
+
+    def tick(self):
+        start = time.perf_counter()
+        for session in list(self.sessions.values()):
+            if session.busy:
+                results, steps = session.tick(self.tick_budget)
+                self.results.extend(results)
+                self.steps += steps
+        elapsed = time.perf_counter() - start
+        self.tick_latencies.append(elapsed)
+        self.ticks += 1
+        if elapsed > self.tick_interval:
+            self.overruns += 1
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        self.running = True
+        while self.running:
+            self.tick()
+            next_tick += self.tick_interval
+            delay = next_tick - loop.time()
+            if delay < -self.tick_interval * 5:
+                # 大きく遅れた場合は追いつこうとせずにリセット
+                next_tick = loop.time()
+            # 他のタスク（コマンドの受信など）を動かすために必ず await する
+            await asyncio.sleep(max(0.0, delay))
+
+    def stop(self):
+        self.running = False
+
+    def drain_results(self):
+        results, self.results = self.results, []
+        return results
+
+    def stats(self):
+        latencies = list(self.tick_latencies)
+        return {
+            "sessions": len(self.sessions),
+            "ticks": self.ticks,
+            "steps": self.steps,
+            "overruns": self.overruns,
+            "tick_latencies": latencies,
+        }
+
+def worker_main(connection, tick_rate, tick_budget, max_sessions):
+    # ワーカープロセス: 親プロセスからのコマンドを受け取りながらセッションを動かす
+    host = SessionHost(tick_rate, tick_budget, max_sessions)
+
+    async def receive_commands():
+        loop = asyncio.get_running_loop()
+        while True:
+            command = await loop.run_in_executor(None, connection.recv)
+            kind = command[0]
+            if kind == "create":
+                host.create_session(*command[1:])
+            elif kind == "close":
+                host.close_session(*command[1:])
+            elif kind == "shot":
+                host.submit_shot(*command[1:])
+            elif kind == "results":
+                connection.send(host.drain_results())
+            elif kind == "stats":
+                connection.send(host.stats())
+            elif kind == "stop":
+                host.stop()
+                return
+
+    async def serve():
+        await asyncio.gather(host.run(), receive_commands())
+
+    asyncio.run(serve())
+
+class ShardedServer:
+    """
+    セッションを複数のワーカープロセスに分散して動かすサーバー
+    セッションIDのハッシュで担当するワーカーを決める
+    """
+    def __init__(self, workers=None, tick_rate=TICK_RATE, tick_budget=TICK_BUDGET, max_sessions_per_worker=1000):
+        self.worker_count = workers or os.cpu_count() or 1
+        self.connections = []
+        self.processes = []
+        for _ in range(self.worker_count):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=worker_main,
+                args=(child_connection, tick_rate, tick_budget, max_sessions_per_worker),
+                daemon=True
+            )
+            process.start()
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+
+    def shard(self, session_id):
+        return self.connections[hash(session_id) % self.worker_count]
+
+    def create_session(self, session_id, level_number, difficulty):
+        self.shard(session_id).send(("create", session_id, level_number, difficulty))
+
+    def close_session(self, session_id):
+        self.shard(session_id).send(("close", session_id))
+
+    def submit_shot(self, session_id, shot_id, angle, power, claimed_hits=None):
+        self.shard(session_id).send(("shot", session_id, shot_id, angle, power, claimed_hits))
+
+    def collect(self, kind):
+        for connection in self.connections:
+            connection.send((kind,))
+        return [connection.recv() for connection in self.connections]
+
+    def results(self):
+        return [result for worker_results in self.collect("results") for result in worker_results]
+
+    def stats(self):
+        return self.collect("stats")
+
+    def shutdown(self):
+        for connection in self.connections:
+            connection.send(("stop",))
+        for process in self.processes:
+            process.join(timeout=5)
+
+def sessions_within_budget(sessions, p99_latency, budget):
+    """
+    計測したティックのレイテンシ (p99) から、ティックの予算内で動かせるセッション数を見積もる
+    同じ負荷（ショットの頻度とレベルの混ざり方）ならティックの処理時間はセッション数に比例すると仮定する
+    sessions: 計測したときのセッション数
+    p99_latency, budget: 秒
+    """
+    if sessions <= 0 or p99_latency <= 0:
+        return 0
+    return int(sessions * budget / p99_latency)
+
+def run_load_test(sessions, workers, duration, shot_interval, seed=0):
+    """
+    ランダムなショットを提出し続けて、ワーカーごとに実際に出せたスループットとティックのレイテンシを計測する
+    弾を撃ち切ったかクリアしたセッションは閉じて新しいセッションに入れ替え、常に sessions 個を動かし続ける
+    sessions: 同時に動かすセッション数
+    shot_interval: 1つのセッションが次のショットを提出するまでの秒数（前のショットの結果が出るまでは提出しない）
+    """
+    rng = random.Random(seed)
+    server = ShardedServer(workers=workers)
+    shots_left = {}  # セッションID -> まだ提出できるショット数
+    in_flight = set()  # 結果を待っているセッション
+    next_shot_time = {}
+    session_ids = iter(range(1 << 62))
+
+    def open_session(now):
+        session_id = next(session_ids)
+        level_number, difficulty = rng.randint(1, 3), rng.randint(0, 2)
+        server.create_session(session_id, level_number, difficulty)
+        shots_left[session_id] = game.DIFFICULTY_PARAMS[difficulty]["projectile_count"]
+        # 提出のタイミングをばらけさせる
+        next_shot_time[session_id] = now + rng.uniform(0, shot_interval)
+
+    def close_session(session_id, now):
+        server.close_session(session_id)
+        del shots_left[session_id]
+        del next_shot_time[session_id]
+        open_session(now)
+
+    start = time.perf_counter()
+    for _ in range(sessions):
+        open_session(start)
+
+    results = []
+    shot_id = 0
+    finished_sessions = 0
+    while time.perf_counter() - start < duration:
+        now = time.perf_counter()
+        for session_id, shot_time in list(next_shot_time.items()):
+            if session_id in in_flight or now < shot_time:
+                continue
+            server.submit_shot(session_id, shot_id, rng.uniform(-1.2, -0.2), rng.uniform(10, 30))
+            shot_id += 1
+            shots_left[session_id] -= 1
+            in_flight.add(session_id)
+
+        for result in server.results():
+            results.append(result)
+            session_id = result["session"]
+            in_flight.discard(session_id)
+            if session_id not in shots_left:
+                continue
+            if result.get("level_complete") or shots_left[session_id] <= 0 or result["status"] == "rejected":
+                finished_sessions += 1
+                close_session(session_id, now)
+            else:
+                next_shot_time[session_id] = now + shot_interval
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    results.extend(server.results())
+    worker_stats = server.stats()
+    server.shutdown()
+
+    budget = 1.0 / TICK_RATE
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    completed = statuses.get("verified", 0) + statuses.get("mismatch", 0)
+
+    print(f"Sessions: {sessions} concurrent on {server.worker_count} worker(s), {elapsed:.1f}s "
+          f"({finished_sessions} finished and replaced)")
+    print(f"Shots: {statuses}")
+    met_target = True
+    capacity = 0  # 全ワーカーで予算内に動かせるセッション数の見積もり
+    for index, stats in enumerate(worker_stats):
+        p99 = percentile(stats["tick_latencies"], 0.99)
+        within = p99 <= budget
+        met_target = met_target and within
+        capacity += sessions_within_budget(stats["sessions"], p99, budget)
+        print(f"Worker {index}: {stats['steps'] / elapsed:,.0f} steps/sec, "
+              f"tick p99 {p99 * 1000:.2f} ms ({'within' if within else 'over'} budget), "
+              f"overruns {stats['overruns']}/{stats['ticks']}")
+
+    latencies = [latency for stats in worker_stats for latency in stats["tick_latencies"]]
+    steps = sum(stats["steps"] for stats in worker_stats)
+    print(f"Physics steps/sec: {steps / elapsed:,.0f} total, {steps / elapsed / server.worker_count:,.0f} per worker")
+    print(f"Completed shots/sec: {completed / elapsed:.1f} total, "
+          f"{completed / elapsed / server.worker_count:.1f} per worker")
+    print(f"Tick latency p50/p95/p99: {percentile(latencies, 0.50) * 1000:.2f} / "
+          f"{percentile(latencies, 0.95) * 1000:.2f} / {percentile(latencies, 0.99) * 1000:.2f} ms "
+          f"(budget {budget * 1000:.2f} ms)")
+    # ワーカーがコア数より多いとコアを取り合うので、コアあたりに換算する
+    cores = min(server.worker_count, os.cpu_count() or 1)
+    print(f"Sessions per core within the {budget * 1000:.2f} ms tick budget (p99): ~{capacity // cores} "
+          f"(measured at {sessions / cores:.0f} per core, {cores} core(s))")
+    if met_target:
+        print(f"Latency target met: {completed / elapsed / server.worker_count:.1f} shots/sec per worker sustained")
+    else:
+        print(f"Latency target missed: the throughput above is not sustainable, "
+              f"run with --sessions {capacity} or fewer")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless multi-session host (runs a load test)")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--shot-interval", type=float, default=2.0, help="seconds between shots per session")
+    args = parser.parse_args()
+    run_load_test(args.sessions, args.workers, args.duration, args.shot_interval)
@@ -0,0 +1,244 @@
+import argparse
+import asyncio
+import json
+
+# ロックステップ通信の設定
+INPUT_DELAY = 6  # 入力を何フレーム先に適用するか
+PROGRESS_INTERVAL = 3  # 何フレームごとに進捗を送るか (INPUT_DELAY 以下にすること)
+HASH_INTERVAL = 30  # 何フレームごとに状態ハッシュを比較するか (PROGRESS_INTERVAL の倍数)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# メッセージは改行区切りのJSON
+#   hello    {"type": "hello", "room": str, "level": int, "difficulty": int, "turn_based": bool}
+#   start    {"type": "start", "player": int, "players": int, "level": int, "difficulty": int, "turn_based": bool}
+#   launch   {"type": "launch", "player": int, "frame": int, "angle": float, "power": float}
+#   progress {"type": "progress", "player": int, "frame": int, "hash": int or null}
+#   left     {"type": "left", "player": int}
+
+def encode_message(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+async def read_message(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+def is_message(message):
+    # プロトコルのメッセージ（"type" を持つJSONオブジェクト）かどうか
+    return isinstance(message, dict) and isinstance(message.get("type"), str)
+
+class DesyncError(Exception):
+    """
+    同じフレームの状態ハッシュがピア間で一致しなかった
+    """
+    def __init__(self, frame, local_hash, remote_hash):
+        super().__init__(f"desync at frame {frame}: local {local_hash:#x} != remote {remote_hash:#x}")
+        self.frame = frame
+        self.local_hash = local_hash
+        self.remote_hash = remote_hash
+
+# ヘルパークラス: 2人のピアを中継するローカルリレーサーバー
+class Relay:
+    """
+    ルームごとに2人のピアを待ち合わせ、メッセージを相手に転送するだけのリレー
+    ゲームのシミュレーションは行わない（各ピアがローカルで同じシミュレーションを行う）
+    """
+    def __init__(self, players=2):
+        self.players = players
+        self.rooms = {}  # room -> [(writer, hello), ...]
+        self.server = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        print(f"Relay listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+
+    async def handle_client(self, reader, writer):
+        try:
+            hello = await read_message(reader)
+        except (ConnectionError, json.JSONDecodeError):
+            hello = None
+        # 壊れた挨拶（JSONでない、辞書でない、部屋がない）は黙って切断する
+        if not is_message(hello) or hello["type"] != "hello" or not isinstance(hello.get("room"), str):
+            writer.close()
+            return
+
+        room = self.rooms.setdefault(hello["room"], [])
+        if len(room) >= self.players:
+            writer.close()
+            return
+        player = len(room)
+        room.append((writer, hello))
+
+        if len(room) == self.players:
+            # 最初に入室したピアの設定で対戦を開始する
+            settings = room[0][1]
+            for index, (peer_writer, _) in enumerate(room):
+                peer_writer.write(encode_message({
+                    "type": "start",
+                    "player": index,
+                    "players": self.players,
+                    "level": settings.get("level", 1),
+                    "difficulty": settings.get("difficulty", 1),
+                    "turn_based": settings.get("turn_based", True),
+                }))
+
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                if not is_message(message):
+                    # JSONとしては正しくてもオブジェクトでないものはプロトコル違反として切断する
+                    print(f"Relay: dropping player {player} in room '{hello['room']}' after a malformed message")  # デバッグ用
+                    break
+                message["player"] = player
+                self.broadcast(room, player, message)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            self.broadcast(room, player, {"type": "left", "player": player})
+            writer.close()
+            if all(peer_writer.is_closing() for peer_writer, _ in room):
+                self.rooms.pop(hello["room"], None)
+
+    def broadcast(self, room, sender, message):
+        data = encode_message(message)
+        for index, (peer_writer, _) in enumerate(room):
+            if index != sender and not peer_writer.is_closing():
+                peer_writer.write(data)
+
+# ヘルパークラス: 決定論的ロックステップのピア
+class LockstepPeer:
+    """
+    発射入力（フレーム番号・角度・パワー）だけをやり取りし、各ピアがローカルでシミュレーションする
+    ローカルの入力は INPUT_DELAY フレーム先に予約され、相手の進捗が届いたフレームまでしか進めない
+    HASH_INTERVAL フレームごとに状態ハッシュを交換してデシンクを検出する
+    """
+    def __init__(self, input_delay=INPUT_DELAY, progress_interval=PROGRESS_INTERVAL, hash_interval=HASH_INTERVAL):
+        if progress_interval > input_delay:
+            raise ValueError("progress_interval must not exceed input_delay")
+        if hash_interval % progress_interval:
+            raise ValueError("hash_interval must be a multiple of progress_interval")
+        self.input_delay = input_delay
+        self.progress_interval = progress_interval
+        self.hash_interval = hash_interval
+
+        self.player = None
+        self.settings = None
+        self.frame = 0  # 次にシミュレーションするフレーム
+        self.inputs = {}  # frame -> [(player, angle, power), ...]
+        self.remote_progress = -1  # 相手が全入力を送り終えたフレーム
+        self.local_hashes = {}
+        self.remote_hashes = {}
+        self.desync = None
+        self.remote_left = False
+        self.bytes_sent = 0
+
+        self._reader = None
+        self._writer = None
+        self._receive_task = None
+
+    async def connect(self, host, port, room, level=1, difficulty=1, turn_based=True):
+        """
+        リレーに接続し、対戦相手が揃うまで待つ。開始時の設定 (start メッセージ) を返す
+        """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+        self.send({"type": "hello", "room": room, "level": level,
+                   "difficulty": difficulty, "turn_based": turn_based})
+        start = await read_message(self._reader)
+        if start is None or start.get("type") != "start":
+            raise ConnectionError("relay closed before the match started")
+        self.player = start["player"]
+        self.settings = start
+        self._receive_task = asyncio.create_task(self._receive())
+        return start
+
+    def close(self):
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+
+    def send(self, message):
+        data = encode_message(message)
+        self.bytes_sent += len(data)
+        self._writer.write(data)
+
+    def schedule_launch(self, angle, power):
+        # ローカルの発射入力を INPUT_DELAY フレーム先に予約して相手に送る
+        frame = self.frame + self.input_delay
+        self.inputs.setdefault(frame, []).append((self.player, angle, power))
+        self.send({"type": "launch", "frame": frame, "angle": angle, "power": power})
+        return frame
+
+    def can_advance(self):
+        # 相手の入力が確定しているフレームまでしか進めない
+        return not self.remote_left and self.frame <= self.remote_progress + self.input_delay
+
+    def advance(self, simulation):
+        """
+        1フレーム進める。相手の入力を待つ必要がある場合は何もせずに False を返す
+        simulation: step(inputs) と state_hash() を持つ決定論的なシミュレーション
+        """
+        if not self.can_advance():
+            return False
+
+        frame_inputs = sorted(self.inputs.pop(self.frame, []))
+        simulation.step(frame_inputs)
+
+        state_hash = None
+        if self.frame % self.hash_interval == 0:
+            state_hash = simulation.state_hash()
+            self.local_hashes[self.frame] = state_hash
+            self._check_hash(self.frame)
+        if self.frame % self.progress_interval == 0:
+            # このフレーム以前に予約した入力は全て送信済み（TCPなので順序は保たれる）
+            self.send({"type": "progress", "frame": self.frame, "hash": state_hash})
+        self.frame += 1
+        return True
+
+    async def _receive(self):
+        while True:
+            message = await read_message(self._reader)
+            if message is None or message["type"] == "left":
+                self.remote_left = True
+                return
+            if message["type"] == "launch":
+                self.inputs.setdefault(message["frame"], []).append(
+                    (message["player"], message["angle"], message["power"]))
+            elif message["type"] == "progress":
+                self.remote_progress = max(self.remote_progress, message["frame"])
+                if message["hash"] is not None:
+                    self.remote_hashes[message["frame"]] = message["hash"]
+                    self._check_hash(message["frame"])
+
+    def _check_hash(self, frame):
+        if frame in self.local_hashes and frame in self.remote_hashes:
+            local_hash = self.local_hashes.pop(frame)
+            remote_hash = self.remote_hashes.pop(frame)
+            if local_hash != remote_hash and self.desync is None:
+                self.desync = DesyncError(frame, local_hash, remote_hash)
+                print(self.desync)  # デバッグ用
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local relay for lockstep versus mode")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(Relay().serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+
+# ヘルパークラス: シミュレーションと描画の間で受け渡すスナップショットのバッファ
+class SnapshotBuffer:
+    """
+    不変スナップショットのダブル/トリプルバッファ
+    シミュレーションスレッドが publish() で書き込み、描画スレッドが latest() で最新のものを読む。
+    書き込み側は常に読み込み中でないスロットに書くので、描画中のスナップショットが上書きされることはない。
+    slots: スロット数 (2ならダブルバッファ、3ならトリプルバッファ)
+    """
+    def __init__(self, slots=3):
+        if slots < 2:
+            raise ValueError("SnapshotBuffer needs at least 2 slots")
+        self._slots = [None] * slots
+        self._latest = -1
+        self._lock = threading.Lock()
+        self.sequence = 0  # 公開されたスナップショットの通し番号
+
+    def publish(self, snapshot):
+        with self._lock:
+            slot = (self._latest + 1) % len(self._slots)
+            self._slots[slot] = snapshot
+            self._latest = slot
+            self.sequence += 1
+
+    def latest(self):
+        """
+        最新のスナップショットと通し番号を返す (まだ何もなければ (None, 0))
+        """
+        with self._lock:
+            if self._latest < 0:
+                return None, 0
+            return self._slots[self._latest], self.sequence
+
+# ヘルパークラス: 固定レートで動くシミュレーションスレッド
+class SimulationThread(threading.Thread):
+    """
+    入力を受け取り、固定レートでシミュレーションを進めてスナップショットを公開するスレッド
+    step: 入力バッチのリスト [(events, mouse_pos), ...] を受け取り、次のスナップショットを返す関数
+    buffer: スナップショットの公開先 (SnapshotBuffer)
+    tick_rate: 1秒あたりのシミュレーションステップ数
+    idle_interval: スナップショットを受け取り、静的な状態なら次のステップまで眠る秒数を返す関数
+                   (動きがあれば None)。眠っている間も入力が来たらすぐに起きる
+    """
+    def __init__(self, step, buffer, tick_rate=60, idle_interval=None):
+        super().__init__(name="simulation", daemon=True)
+        self.step = step
+        self.buffer = buffer
+        self.tick_interval = 1.0 / tick_rate
+        self.idle_interval = idle_interval
+        self.inputs = queue.SimpleQueue()
+        self.error = None
+        self._stop_event = threading.Event()
+        self._wake = threading.Event()  # 入力か停止で眠りから起こす
+
+    def submit(self, events, mouse_pos):
+        # 描画（メイン）スレッドから入力を渡す
+        self.inputs.put((events, mouse_pos))
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        try:
+            while not self._stop_event.is_set():
+                batches = []
+                while True:
+                    try:
+                        batches.append(self.inputs.get_nowait())
+                    except queue.Empty:
+                        break
+
+                snapshot = self.step(batches)
+                self.buffer.publish(snapshot)
+
+                idle = self.idle_interval(snapshot) if self.idle_interval is not None else None
+                if idle is not None and idle > 0 and self.inputs.empty():
+                    # 静的な状態: 固定レートをやめて、入力か idle 秒後まで眠る
+                    self._wake.clear()
+                    if self.inputs.empty() and not self._stop_event.is_set():
+                        self._wake.wait(idle)
+                    next_tick = time.perf_counter()
+                    continue
+
+                next_tick += self.tick_interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                elif delay < -self.tick_interval * 5:
+                    # 大きく遅れた場合は追いつこうとせずにリセット
+                    next_tick = time.perf_counter()
+        except Exception as e:
+            # 例外は描画スレッド側で再送出する
+            self.error = e
@@ -2,4 +2,4 @@
 
 # Run the slingshot game
 cd "$(dirname "$0")"
-python3 slingshot_game.py
+python3 slingshot_game.py "$@"
@@ -0,0 +1,247 @@
+import struct
+
+# 固定レイアウトのバイナリスナップショット
+# 1フレーム分のゲーム状態を常に同じサイズのバッファに詰めるので、
+# リングバッファの1スロットやファイルにそのままコピーできる
+# 標的と障害物の数の上限はコーデックごとに決まり、それより多いレベルでは広いコーデックを作る
+MAGIC = b"SLSS"
+VERSION = 2
+
+MAX_TRAIL = 30  # Projectile.max_trail_length と同じ
+MAX_PROJECTILE_PARTICLES = 64
+MAX_TARGETS = 8  # 既定のコーデックの上限
+MAX_TARGET_PARTICLES = 20
+MAX_OBSTACLES = 8
+MAX_HIT_ANIMATION = 0xFFFF  # アニメーションは最初の数十フレームしか使わないので、これ以上は切り詰める
+
+# magic, version, level_number, level_difficulty, current_difficulty, game_state, dragging,
+# projectile_count, level_projectile_count, projectiles_used, next_shot_delay(ms), target_count, obstacle_count
+HEADER = struct.Struct("<4sHHBBB?hhhiBB")
+# x, y, vel_x, vel_y, radius, color(r, g, b), launched, stopped, trail_count, particle_count
+PROJECTILE = struct.Struct("<4dH3B??BB")
+TRAIL_POINT = struct.Struct("<2d")
+# x, y, vx, vy, radius, color(r, g, b), life
+PARTICLE = struct.Struct("<5f3BB")
+# x, y, width, height, hit, hit_animation, rotation, eyes_blink, blink_timer, particle_count
+TARGET = struct.Struct("<2dHH?HihhB")
+OBSTACLE = struct.Struct("<2d2i")
+
+PROJECTILE_OFFSET = HEADER.size
+TRAIL_OFFSET = PROJECTILE_OFFSET + PROJECTILE.size
+PROJECTILE_PARTICLES_OFFSET = TRAIL_OFFSET + MAX_TRAIL * TRAIL_POINT.size
+TARGET_RECORD_SIZE = TARGET.size + MAX_TARGET_PARTICLES * PARTICLE.size
+TARGETS_OFFSET = PROJECTILE_PARTICLES_OFFSET + MAX_PROJECTILE_PARTICLES * PARTICLE.size
+# 障害物は標的の直後に詰める（位置はヘッダーの標的数で決まる）
+
+def snapshot_size(target_count=MAX_TARGETS, obstacle_count=MAX_OBSTACLES):
+    # 標的 target_count 個、障害物 obstacle_count 個まで入るスナップショットのバイト数
+    return TARGETS_OFFSET + target_count * TARGET_RECORD_SIZE + obstacle_count * OBSTACLE.size
+
+SNAPSHOT_SIZE = snapshot_size()
+
+def _unpack_counts(buffer, offset):
+    # ヘッダーを検証し、(標的数, 障害物数) を返す
+    if len(buffer) - offset < HEADER.size:
+        raise ValueError("snapshot is truncated")
+    header = HEADER.unpack_from(buffer, offset)
+    if header[0] != MAGIC or header[1] != VERSION:
+        raise ValueError("not a slingshot snapshot (or an unsupported version)")
+    target_count, obstacle_count = header[-2:]
+    if len(buffer) - offset < snapshot_size(target_count, obstacle_count):
+        raise ValueError("snapshot is truncated")
+    return target_count, obstacle_count
+
+def _pack_particles(buffer, offset, particles, limit):
+    # 上限を超えたパーティクルは古いものから捨てる（見た目だけの要素なので）
+    particles = particles[-limit:]
+    for i, particle in enumerate(particles):
+        PARTICLE.pack_into(buffer, offset + i * PARTICLE.size,
+                           particle['x'], particle['y'], particle['vx'], particle['vy'],
+                           particle['radius'], *particle['color'], particle['life'])
+    return len(particles)
+
+def _unpack_particles(buffer, offset, count):
+    particles = []
+    for i in range(count):
+        x, y, vx, vy, radius, r, g, b, life = PARTICLE.unpack_from(buffer, offset + i * PARTICLE.size)
+        particles.append({'x': x, 'y': y, 'vx': vx, 'vy': vy, 'radius': radius,
+                          'color': (r, g, b), 'life': life})
+    return particles
+
+class SnapshotCodec:
+    """
+    ゲーム状態と固定長バイナリの相互変換
+    循環インポートを避けるため、復元に使うクラスは引数で受け取る
+    level_cls, projectile_cls, target_cls, obstacle_cls: ゲームのクラス
+    max_targets, max_obstacles: 1つのスナップショットに入る標的と障害物の数の上限
+    """
+    def __init__(self, level_cls, projectile_cls, target_cls, obstacle_cls,
+                 max_targets=MAX_TARGETS, max_obstacles=MAX_OBSTACLES):
+        self.level_cls = level_cls
+        self.projectile_cls = projectile_cls
+        self.target_cls = target_cls
+        self.obstacle_cls = obstacle_cls
+        self.max_targets = max_targets
+        self.max_obstacles = max_obstacles
+        self.size = snapshot_size(max_targets, max_obstacles)
+
+    def fits(self, level):
+        return len(level.targets) <= self.max_targets and len(level.obstacles) <= self.max_obstacles
+
+    def for_level(self, level):
+        # level が入るコーデックを返す（入らなければ上限を広げたものを作る）
+        if self.fits(level):
+            return self
+        return SnapshotCodec(self.level_cls, self.projectile_cls, self.target_cls, self.obstacle_cls,
+                             max(self.max_targets, len(level.targets)),
+                             max(self.max_obstacles, len(level.obstacles)))
+
+    def pack_into(self, buffer, offset, game, now):
+        """
+        game の状態を buffer[offset:offset + self.size] に書き込む
+        now: 現在時刻 (ms)。次の弾のタイマーは残り時間として保存する
+        """
+        level = game.current_level
+        if not self.fits(level):
+            raise ValueError("level has more targets or obstacles than the snapshot layout allows")
+
+        HEADER.pack_into(buffer, offset, MAGIC, VERSION, level.level_number, level.difficulty,
+                         game.current_difficulty, game.game_state, game.dragging,
+                         game.projectile_count, level.projectile_count, level.projectiles_used,
+                         max(0, game.next_shot_timer - now), len(level.targets), len(level.obstacles))
+
+        projectile = game.projectile
+        trail = projectile.trail[-MAX_TRAIL:]
+        for i, point in enumerate(trail):
+            TRAIL_POINT.pack_into(buffer, offset + TRAIL_OFFSET + i * TRAIL_POINT.size, *point)
+        particle_count = _pack_particles(buffer, offset + PROJECTILE_PARTICLES_OFFSET,
+                                         projectile.collision_particles, MAX_PROJECTILE_PARTICLES)
+        PROJECTILE.pack_into(buffer, offset + PROJECTILE_OFFSET,
+                             projectile.x, projectile.y, projectile.vel_x, projectile.vel_y,
+                             projectile.radius, *projectile.color[:3],
+                             projectile.launched, projectile.stopped, len(trail), particle_count)
+
+        for i, target in enumerate(level.targets):
+            target_offset = offset + TARGETS_OFFSET + i * TARGET_RECORD_SIZE
+            particle_count = _pack_particles(buffer, target_offset + TARGET.size,
+                                             target.particles, MAX_TARGET_PARTICLES)
+            TARGET.pack_into(buffer, target_offset, target.x, target.y, target.width, target.height,
+                             target.hit, min(target.hit_animation, MAX_HIT_ANIMATION), target.rotation,
+                             target.eyes_blink, target.blink_timer, particle_count)
+
+        obstacles_offset = offset + TARGETS_OFFSET + len(level.targets) * TARGET_RECORD_SIZE
+        for i, obstacle in enumerate(level.obstacles):
+            OBSTACLE.pack_into(buffer, obstacles_offset + i * OBSTACLE.size,
+                               obstacle.x, obstacle.y, obstacle.width, obstacle.height)
+
+    def restore(self, buffer, offset, game, now):
+        """
+        buffer[offset:] のスナップショットで game の状態を置き換える
+        上限の違うコーデックで書いたスナップショットも読める
+        """
+        _unpack_counts(buffer, offset)
+        (_, _, level_number, level_difficulty, current_difficulty, game_state, dragging,
+         projectile_count, level_projectile_count, projectiles_used, next_shot_delay,
+         target_count, obstacle_count) = \
+            HEADER.unpack_from(buffer, offset)
+
+        x, y, vel_x, vel_y, radius, r, g, b, launched, stopped, trail_count, particle_count = \
+            PROJECTILE.unpack_from(buffer, offset + PROJECTILE_OFFSET)
+        projectile = self.projectile_cls(x, y, radius)
+        projectile.vel_x = vel_x
+        projectile.vel_y = vel_y
+        projectile.color = (r, g, b)
+        projectile.launched = launched
+        projectile.stopped = stopped
+        projectile.trail = [TRAIL_POINT.unpack_from(buffer, offset + TRAIL_OFFSET + i * TRAIL_POINT.size)
+                            for i in range(trail_count)]
+        projectile.collision_particles = _unpack_particles(buffer, offset + PROJECTILE_PARTICLES_OFFSET,
+                                                           particle_count)
+
+        targets = []
+        for i in range(target_count):
+            target_offset = offset + TARGETS_OFFSET + i * TARGET_RECORD_SIZE
+            (tx, ty, width, height, hit, hit_animation, rotation,
+             eyes_blink, blink_timer, particle_count) = TARGET.unpack_from(buffer, target_offset)
+            target = self.target_cls(tx, ty, width, height)
+            target.hit = hit
+            target.hit_animation = hit_animation
+            target.rotation = rotation
+            target.eyes_blink = eyes_blink
+            target.blink_timer = blink_timer
+            target.particles = _unpack_particles(buffer, target_offset + TARGET.size, particle_count)
+            targets.append(target)
+
+        obstacles_offset = offset + TARGETS_OFFSET + target_count * TARGET_RECORD_SIZE
+        obstacles = [self.obstacle_cls(*OBSTACLE.unpack_from(buffer, obstacles_offset + i * OBSTACLE.size))
+                     for i in range(obstacle_count)]
+
+        level = self.level_cls(level_number, level_difficulty)
+        level.targets = targets
+        level.obstacles = obstacles
+        level.projectile_count = level_projectile_count
+        level.projectiles_used = projectiles_used
+
+        game.current_level = level
+        game.projectile = projectile
+        game.current_difficulty = current_difficulty
+        game.game_state = game_state
+        game.dragging = dragging
+        game.projectile_count = projectile_count
+        game.next_shot_timer = now + next_shot_delay
+
+class SnapshotRing:
+    """
+    フレームごとのスナップショットを1つの bytearray に保持するリングバッファ
+    view() はコピーせずに memoryview を返す
+    codec: SnapshotCodec
+    frames: 保持するフレーム数
+    """
+    def __init__(self, codec, frames=900):
+        self.codec = codec
+        self.frames = frames
+        self.buffer = bytearray(codec.size * frames)
+        self.frame = -1  # 最後に記録したフレーム番号
+        self.first_frame = 0  # これより前のフレームはスロットを作り直したときに捨てた
+
+    def record(self, game, now):
+        # 現在の状態を次のスロットに書き込み、そのフレーム番号を返す
+        if not self.codec.fits(game.current_level):
+            self._resize(self.codec.for_level(game.current_level))
+        self.frame += 1
+        self.codec.pack_into(self.buffer, self._offset(self.frame), game, now)
+        return self.frame
+
+    def view(self, frame):
+        # まだリングに残っていればスナップショットの memoryview を返す
+        if frame < self.first_frame or frame > self.frame or frame <= self.frame - self.frames:
+            return None
+        offset = self._offset(frame)
+        return memoryview(self.buffer)[offset:offset + self.codec.size]
+
+    def restore(self, frame, game, now):
+        view = self.view(frame)
+        if view is None:
+            return False
+        self.codec.restore(view, 0, game, now)
+        return True
+
+    def _offset(self, frame):
+        return (frame % self.frames) * self.codec.size
+
+    def _resize(self, codec):
+        # 標的や障害物の多いレベルに合わせてスロットを広げる（それまでの記録は捨てる）
+        print(f"Snapshot slots resized for {codec.max_targets} targets and {codec.max_obstacles} obstacles")  # デバッグ用
+        self.codec = codec
+        self.buffer = bytearray(codec.size * self.frames)
+        self.first_frame = self.frame + 1
+
+def save_snapshot(path, view):
+    with open(path, "wb") as f:
+        f.write(view)
+
+def load_snapshot(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    _unpack_counts(data, 0)
+    return data
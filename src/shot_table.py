@@ -0,0 +1,167 @@
+import argparse
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import zlib
+
+# 事前計算したショット結果テーブル
+# (角度, パワー) の格子ごとに、ヒットした標的・着地位置・飛行フレーム数を固定長レコードで保存する
+# ゲームは mmap で開き、ドラッグ中に O(1) で結果を引く（実行時にシミュレーションしない）
+MAGIC = b"SLST"
+VERSION = 1
+
+# magic, version, level_number, difficulty, target_count, n_angles, n_powers,
+# angle_min, angle_max, power_min, power_max, definition_crc
+HEADER = struct.Struct("<4sHHBBHHddddI")
+# targets_hit_mask, landing_x, frames
+RECORD = struct.Struct("<HhH")
+
+DEFAULT_ANGLES = 180  # 2度刻み（全周）
+DEFAULT_POWERS = 61  # 0.5刻み (0〜30)
+MAX_POWER = 30
+MAX_SHOT_FRAMES = 1800
+
+def definition_crc(definition):
+    # レベル定義が変わったら古いテーブルを使わないようにするためのチェックサム
+    return zlib.crc32(json.dumps(definition, sort_keys=True).encode())
+
+def table_path(tables_dir, level_number, difficulty):
+    return os.path.join(tables_dir, f"level{level_number}_d{difficulty}.bin")
+
+class ShotTable:
+    """
+    mmap で開いたショット結果テーブル
+    lookup() は最も近い格子点の結果 (ヒット数, ヒットした標的のビットマスク, 着地x, フレーム数) を返す
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.level_number, self.difficulty, self.target_count,
+         self.n_angles, self.n_powers, self.angle_min, self.angle_max,
+         self.power_min, self.power_max, self.definition_crc) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a shot table (or an unsupported version)")
+        if len(self.data) != HEADER.size + self.n_angles * self.n_powers * RECORD.size:
+            self.close()
+            raise ValueError(f"{path} is truncated")
+        self.angle_step = (self.angle_max - self.angle_min) / self.n_angles
+        self.power_step = (self.power_max - self.power_min) / (self.n_powers - 1)
+
+    @classmethod
+    def open(cls, path, expected_crc=None):
+        """
+        テーブルを開く。ファイルがない・壊れている・レベル定義と合わない場合は None を返す
+        """
+        try:
+            table = cls(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        if expected_crc is not None and table.definition_crc != expected_crc:
+            print(f"Shot table {path} is out of date, rebuild it with shot_table.py")  # デバッグ用
+            table.close()
+            return None
+        return table
+
+    def close(self):
+        self.data.close()
+
+    def lookup(self, angle, power):
+        angle_index = round((angle - self.angle_min) / self.angle_step) % self.n_angles
+        power_index = min(self.n_powers - 1, max(0, round((power - self.power_min) / self.power_step)))
+        mask, landing_x, frames = RECORD.unpack_from(
+            self.data, HEADER.size + (angle_index * self.n_powers + power_index) * RECORD.size)
+        return bin(mask).count("1"), mask, landing_x, frames
+
+def simulate_row(args):
+    # 1つの角度について全てのパワーをシミュレーションする（ワーカープロセスで実行）
+    level_number, difficulty, angle, powers = args
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import slingshot_game as game
+    game.VERBOSE = False
+    game.apply_difficulty_physics(difficulty)
+
+    slingshot = game.Slingshot(100, game.HEIGHT - 100)
+    anchor_x, anchor_y = slingshot.x, slingshot.y - slingshot.height//2
+    power_factor = game.DIFFICULTY_PARAMS[difficulty]["power_factor"]
+    row = bytearray(len(powers) * RECORD.size)
+    for i, power in enumerate(powers):
+        level = game.Level(level_number, difficulty)
+        # ゲームと同じ経路で発射する: 弾はドラッグ距離を制限した位置に置かれ、角度とパワーはマウス位置から決まる
+        mouse_x = anchor_x - math.cos(angle) * power * power_factor
+        mouse_y = anchor_y - math.sin(angle) * power * power_factor
+        projectile = game.Projectile(*game.drag_position(slingshot, mouse_x, mouse_y))
+        game.launch_projectile(projectile, *game.launch_parameters(anchor_x, anchor_y, mouse_x, mouse_y, difficulty))
+
+        frames = 0
+        while frames < MAX_SHOT_FRAMES:
+            game.step_shot(level, projectile)
+            frames += 1
+            if game.projectile_out_of_play(projectile, level.width) or level.is_complete():
+                break
+
+        mask = 0
+        for bit, target in enumerate(level.targets):
+            if target.hit:
+                mask |= 1 << bit
+        landing_x = int(max(-32768, min(32767, projectile.x)))
+        RECORD.pack_into(row, i * RECORD.size, mask, landing_x, frames)
+    return bytes(row)
+
+def build_table(path, level_number, difficulty, n_angles=DEFAULT_ANGLES, n_powers=DEFAULT_POWERS, workers=None):
+    """
+    (角度, パワー) の格子で全ショットをシミュレーションしてテーブルを書き出す
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import slingshot_game as game
+
+    definition = game.load_level_definition(level_number)
+    target_count = len(game.Level(level_number, difficulty).targets)
+    if target_count > 16:
+        raise ValueError("shot tables support at most 16 targets per level")
+
+    angle_min, angle_max = -math.pi, math.pi
+    powers = [MAX_POWER * i / (n_powers - 1) for i in range(n_powers)]
+    rows = [(level_number, difficulty, angle_min + (angle_max - angle_min) * i / n_angles, powers)
+            for i in range(n_angles)]
+    # ワーカーでは pygame (SDL) が SIGTERM を拾ってしまうので、terminate ではなく close/join で終了させる
+    pool = multiprocessing.Pool(workers)
+    try:
+        records = pool.map(simulate_row, rows)
+    finally:
+        pool.close()
+        pool.join()
+
+    header = HEADER.pack(MAGIC, VERSION, level_number, difficulty, target_count, n_angles, n_powers,
+                         angle_min, angle_max, 0.0, float(MAX_POWER), definition_crc(definition))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        f.write(header)
+        for row in records:
+            f.write(row)
+    os.replace(temporary_path, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build precomputed shot-outcome tables")
+    parser.add_argument("--levels", type=int, nargs="+", default=None, help="(default: every level in levels/)")
+    parser.add_argument("--difficulties", type=int, nargs="+", choices=[0, 1, 2], default=[0, 1, 2])
+    parser.add_argument("--angles", type=int, default=DEFAULT_ANGLES)
+    parser.add_argument("--powers", type=int, default=DEFAULT_POWERS)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.levels is None:
+        import slingshot_game as game
+        args.levels = game.level_numbers()
+
+    tables_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tables")
+    for level_number in args.levels:
+        for difficulty in args.difficulties:
+            path = table_path(tables_dir, level_number, difficulty)
+            build_table(path, level_number, difficulty, args.angles, args.powers, args.workers)
+            print(f"Wrote {path}")
@@ -3,17 +3,42 @@ import math
 import sys
 import os
 import random  # Added missing import for random module
+import copy
+import argparse
+import json
+import time
 from ui_helpers import draw_rounded_rect, draw_button  # UIヘルパー関数をインポート
+from sprite_cache import SpriteCache
+from pipeline import SnapshotBuffer, SimulationThread
+from asset_manager import AssetManager
+from savestate import SnapshotCodec, SnapshotRing, save_snapshot, load_snapshot
+from file_watcher import FileWatcher
+from shot_table import ShotTable, table_path, definition_crc
+from capture import FrameCapture
+from camera import Camera
+from force_field import bake_field
 
 # Get the base directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+LEVELS_DIR = os.path.join(BASE_DIR, 'levels')
+TABLES_DIR = os.path.join(BASE_DIR, 'tables')
+QUICKSAVE_PATH = os.path.join(BASE_DIR, 'quicksave.bin')
 
-# Initialize pygame
-pygame.init()
 WIDTH, HEIGHT = 800, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Slingshot Physics Game")
+screen = None  # init_display() で作るゲームの画面
+
+def init_display():
+    """
+    pygame を初期化して画面を作り、返す（作成済みならそれを返す）
+    インポート時には作らない（spawn のワーカーがメインモジュールを読み込み直してもウィンドウを開かないように）
+    """
+    global screen
+    if screen is None:
+        pygame.init()
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Slingshot Physics Game")
+    return screen
 
 # Colors
 WHITE = (255, 255, 255)
@@ -31,6 +56,9 @@ LIGHT_BLUE = (173, 216, 230)  # ボタンの色
 LIGHT_GREEN = (144, 238, 144)  # 選択されたボタンの色
 TRANSPARENT_BLACK = (0, 0, 0, 180)  # 半透明の黒（オーバーレイ用）
 
+# デバッグ出力（ヘッドレスで大量にシミュレーションする時は False にする）
+VERBOSE = True
+
 # Physics parameters
 GRAVITY = 0.5  # 重力を強くして弾を重く
 FRICTION = 0.97  # 摩擦をさらに減らす
@@ -77,6 +105,161 @@ DIFFICULTY_PARAMS = {
     }
 }
 
+# 弾のスプライトキャッシュ (radius, color) ごとに一度だけ描画する
+projectile_sprites = SpriteCache(max_entries=32)
+
+def render_projectile_sprite(radius, color):
+    # グロー、本体、ハイライトを1枚のサーフェスに事前描画
+    glow_radius = radius * 1.5
+    sprite = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
+    for r in range(int(glow_radius), 0, -2):
+        alpha = 100 if r > radius else 200
+        pygame.draw.circle(sprite, (*color[:3], alpha), (glow_radius, glow_radius), r)
+    
+    # Draw projectile
+    pygame.draw.circle(sprite, color, (int(glow_radius), int(glow_radius)), radius)
+    
+    # Draw a highlight for 3D effect
+    highlight_radius = radius // 2
+    pygame.draw.circle(sprite, (255, 150, 150), (int(glow_radius - radius//3), int(glow_radius - radius//3)), highlight_radius)
+    return sprite
+
+# 半透明の円（トレイル、パーティクル、予測軌道の点）を描くための作業用サーフェス
+# 色・半径・透明度が毎フレーム変わるのでキャッシュせず、1枚を使い回して円ごとのサーフェス生成をなくす
+_circle_scratch = None
+
+def blit_alpha_circle(screen, color, radius, position):
+    """
+    (radius*2, radius*2) の透明なサーフェスの中央に円を描いて position に転送するのと同じ結果を描く
+    color: (r, g, b, alpha)
+    """
+    global _circle_scratch
+    size = int(radius * 2)
+    if size <= 0:
+        return
+    if _circle_scratch is None or _circle_scratch.get_width() < size:
+        _circle_scratch = pygame.Surface((max(size, 64), max(size, 64)), pygame.SRCALPHA)
+    # クリップ範囲の外には描かないので、範囲外に前の円が残ることはない
+    area = pygame.Rect(0, 0, size, size)
+    _circle_scratch.set_clip(area)
+    _circle_scratch.fill((0, 0, 0, 0))
+    pygame.draw.circle(_circle_scratch, color, (radius, radius), radius)
+    screen.blit(_circle_scratch, position, area)
+
+# 静的な地形とスリングショット・障害物のテクスチャのキャッシュ
+# 毎フレーム乱数で描き直すとちらつくので、固定のシードで一度だけ描いておく
+terrain_sprites = SpriteCache(max_entries=32)
+GROUND_HEIGHT = 20
+GRASS_MAX_HEIGHT = 7
+GRASS_SEED = 1
+WOOD_SEED = 2
+
+def render_ground_strip(width, seed=GRASS_SEED):
+    # 地面と草の帯（草の先端の分だけ地面より上にはみ出す）
+    strip = pygame.Surface((width, GROUND_HEIGHT + GRASS_MAX_HEIGHT), pygame.SRCALPHA)
+    pygame.draw.rect(strip, (100, 80, 0), (0, GRASS_MAX_HEIGHT, width, GROUND_HEIGHT))
+    rng = random.Random(seed)
+    for i in range(0, width, 5):
+        grass_height = rng.randint(3, 7)
+        grass_color = (50, 150 + rng.randint(-20, 20), 50)
+        pygame.draw.line(strip, grass_color, (i, GRASS_MAX_HEIGHT), (i, GRASS_MAX_HEIGHT - grass_height), 2)
+    return strip
+
+def render_slingshot_base(width, height, base_color, seed=WOOD_SEED):
+    # 木目つきの支柱と上部の丸み（原点は支柱の左端、丸みの上端）
+    radius = width // 2
+    sprite = pygame.Surface((width + 1, height + radius), pygame.SRCALPHA)
+    pygame.draw.rect(sprite, base_color, (0, radius, width, height))
+    rng = random.Random(seed)
+    for i in range(0, height, 5):
+        wood_color = tuple(min(255, channel + rng.randint(-20, 20)) for channel in base_color)
+        pygame.draw.line(sprite, wood_color, (0, radius + i), (width, radius + i))
+    pygame.draw.circle(sprite, base_color, (radius, radius), radius)
+    return sprite
+
+def render_obstacle_texture(width, height, color):
+    # 木目の縦線つきの障害物
+    sprite = pygame.Surface((width, height + 1), pygame.SRCALPHA)
+    pygame.draw.rect(sprite, color, (0, 0, width, height))
+    for i in range(0, width, 10):
+        pygame.draw.line(sprite, (100, 50, 0), (i, 0), (i, height), 1)
+    return sprite
+
+# 雲やヒットした標的など、形の決まった飾りのキャッシュ
+decoration_sprites = SpriteCache(max_entries=16)
+
+# 力場の矢印のキャッシュ（力場ごとに一度だけ描画する）
+field_sprites = SpriteCache(max_entries=4)
+
+def render_field_overlay(field, spacing=40):
+    # グリッドの力を一定間隔の矢印で表したレベル全体のサーフェス
+    overlay = pygame.Surface((field.width, field.height), pygame.SRCALPHA)
+    xs = [x for y in range(spacing // 2, field.height, spacing) for x in range(spacing // 2, field.width, spacing)]
+    ys = [y for y in range(spacing // 2, field.height, spacing) for x in range(spacing // 2, field.width, spacing)]
+    forces_x, forces_y = field.sample_many(xs, ys)
+    strongest = max((math.hypot(fx, fy) for fx, fy in zip(forces_x, forces_y)), default=0)
+    if strongest < 1e-6:
+        return overlay
+    scale = spacing * 0.4 / strongest  # 最も強い力の矢印が間隔の4割の長さになるように
+    for x, y, force_x, force_y in zip(xs, ys, forces_x, forces_y):
+        length = math.hypot(force_x, force_y) * scale
+        if length < 2:
+            continue
+        end_x, end_y = x + force_x * scale, y + force_y * scale
+        pygame.draw.line(overlay, (255, 255, 255, 110), (x, y), (end_x, end_y), 2)
+        # 矢じり
+        angle = math.atan2(force_y, force_x)
+        for side in (2.6, -2.6):
+            pygame.draw.line(overlay, (255, 255, 255, 110), (end_x, end_y),
+                             (end_x + math.cos(angle + side) * 5, end_y + math.sin(angle + side) * 5), 2)
+    return overlay
+
+# レベル定義ファイル (levels/level<番号>.json) の読み込み
+# 読み込んだ定義はキャッシュし、エディットモードではファイルの変更時に読み直す
+_level_definitions = {}
+
+def level_definition_path(level_number):
+    return os.path.join(LEVELS_DIR, f"level{level_number}.json")
+
+def level_number_from_path(path):
+    # level<番号>.json なら番号を返す（それ以外のファイルは None）
+    name, extension = os.path.splitext(os.path.basename(path))
+    if extension != ".json" or not name.startswith("level") or not name[5:].isdigit():
+        return None
+    return int(name[5:])
+
+def level_numbers():
+    # LEVELS_DIR にある全レベルの番号（昇順）
+    numbers = (level_number_from_path(name) for name in os.listdir(LEVELS_DIR))
+    return sorted(number for number in numbers if number is not None)
+
+def read_level_definition(level_number):
+    # キャッシュを通さずにファイルから読む（ファイルがないレベルは空のレベルになる）
+    try:
+        with open(level_definition_path(level_number)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def load_level_definition(level_number, reload=False):
+    """
+    レベル定義を返す（ファイルがないレベルは空のレベルになる）
+    reload: Trueならキャッシュを無視してファイルから読み直す
+    """
+    if reload or level_number not in _level_definitions:
+        _level_definitions[level_number] = read_level_definition(level_number)
+    return _level_definitions[level_number]
+
+def level_assets(level_number):
+    # レベルで使用するアセット (ASSETS_DIR からの相対パス)。背景画像も含む
+    # レベル開始前に AssetManager で先読みされる
+    definition = load_level_definition(level_number)
+    assets = list(definition.get("assets", []))
+    background = definition.get("background")
+    if background is not None and background not in assets:
+        assets.append(background)
+    return assets
+
 class Projectile:
     def __init__(self, x, y, radius=15):
         self.x = x
@@ -91,7 +274,11 @@ class Projectile:
         self.max_trail_length = 30  # トレイルを長くする
         self.collision_particles = []  # 衝突時のパーティクル
     
-    def update(self):
+    def update(self, world_width=WIDTH, field=None, physics=None):
+        # world_width: レベルの幅（右の壁の位置）
+        # field: レベルの力場 (ForceField)。なければ一様な重力と空気抵抗だけ
+        # physics: (重力, 空気抵抗, 弾性)。None ならグローバルの値（apply_difficulty_physics で設定したもの）
+        gravity, friction, elasticity = physics if physics is not None else (GRAVITY, FRICTION, ELASTICITY)
         if self.launched and not self.stopped:
             # Store position for trail
             if len(self.trail) >= self.max_trail_length:
@@ -99,11 +286,17 @@ class Projectile:
             self.trail.append((self.x, self.y))
             
             # Apply gravity
-            self.vel_y += GRAVITY
+            self.vel_y += gravity
+            
+            # 風や重力井戸などの力場
+            if field is not None:
+                force_x, force_y = field.sample(self.x, self.y)
+                self.vel_x += force_x
+                self.vel_y += force_y
             
             # Apply air resistance
-            self.vel_x *= FRICTION
-            self.vel_y *= FRICTION
+            self.vel_x *= friction
+            self.vel_y *= friction
             
             # Update position
             self.x += self.vel_x
@@ -115,29 +308,32 @@ class Projectile:
                 self.stopped = True
                 # 停止時にパーティクルを生成
                 self.generate_collision_particles()
-                print("Projectile stopped")  # デバッグ用
+                if VERBOSE:
+                    print("Projectile stopped")  # デバッグ用
             
             # Handle screen boundaries
             if self.x - self.radius < 0:
                 self.x = self.radius
-                self.vel_x *= -ELASTICITY
+                self.vel_x *= -elasticity
                 self.generate_collision_particles()
-            elif self.x + self.radius > WIDTH:
-                self.x = WIDTH - self.radius
-                self.vel_x *= -ELASTICITY
+            elif self.x + self.radius > world_width:
+                self.x = world_width - self.radius
+                self.vel_x *= -elasticity
                 self.generate_collision_particles()
                 
             if self.y - self.radius < 0:
                 self.y = self.radius
-                self.vel_y *= -ELASTICITY
+                self.vel_y *= -elasticity
                 self.generate_collision_particles()
             elif self.y + self.radius > HEIGHT - 20:  # Ground level
                 self.y = HEIGHT - 20 - self.radius
-                self.vel_y *= -ELASTICITY * 0.8  # Less bounce on ground
+                self.vel_y *= -elasticity * 0.8  # Less bounce on ground
                 self.vel_x *= 0.9  # More friction on ground
                 self.generate_collision_particles()
         
-        # パーティクルの更新
+        # パーティクルの更新（力場があれば全てのパーティクルをまとめて流す）
+        if field is not None:
+            field.push_particles(self.collision_particles)
         for i in range(len(self.collision_particles) - 1, -1, -1):
             particle = self.collision_particles[i]
             particle['life'] -= 1
@@ -148,6 +344,13 @@ class Projectile:
                 particle['y'] += particle['vy']
                 particle['vy'] += 0.1  # パーティクルにも重力を適用
     
+    def snapshot(self):
+        # 描画用のコピー（トレイルとパーティクルは複製する）
+        snap = copy.copy(self)
+        snap.trail = list(self.trail)
+        snap.collision_particles = [dict(particle) for particle in self.collision_particles]
+        return snap
+    
     def generate_collision_particles(self):
         # 衝突時のパーティクルを生成
         for _ in range(10):
@@ -163,9 +366,14 @@ class Projectile:
                 'life': random.randint(10, 30)
             })
     
-    def draw(self, screen):
+    def draw(self, screen, camera=None):
+        # camera: ワールド座標からスクリーン座標への変換（画面外のトレイルとパーティクルは描かない）
+        offset_x = camera.offset if camera is not None else 0
+        
         # Draw trail with gradient color
         for i, (trail_x, trail_y) in enumerate(self.trail):
+            if camera is not None and not camera.visible(trail_x):
+                continue
             alpha = int(255 * (i / len(self.trail)))
             trail_radius = int(self.radius * (i / len(self.trail)) * 0.8)
             
@@ -174,36 +382,40 @@ class Projectile:
             g = int(165 * (i / len(self.trail)))
             b = 0
             
-            trail_surface = pygame.Surface((trail_radius*2, trail_radius*2), pygame.SRCALPHA)
-            pygame.draw.circle(trail_surface, (r, g, b, alpha), (trail_radius, trail_radius), trail_radius)
-            screen.blit(trail_surface, (trail_x - trail_radius, trail_y - trail_radius))
+            blit_alpha_circle(screen, (r, g, b, alpha), trail_radius,
+                              (trail_x - offset_x - trail_radius, trail_y - trail_radius))
         
-        # Draw projectile with glow effect
+        # Draw projectile with glow effect (キャッシュ済みスプライトを1回のblitで描画)
         glow_radius = self.radius * 1.5
-        glow_surface = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-        for r in range(int(glow_radius), 0, -2):
-            alpha = 100 if r > self.radius else 200
-            pygame.draw.circle(glow_surface, (*self.color[:3], alpha), (glow_radius, glow_radius), r)
-        screen.blit(glow_surface, (self.x - glow_radius, self.y - glow_radius))
-        
-        # Draw projectile
-        pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), self.radius)
-        
-        # Draw a highlight for 3D effect
-        highlight_radius = self.radius // 2
-        pygame.draw.circle(screen, (255, 150, 150), (int(self.x - self.radius//3), int(self.y - self.radius//3)), highlight_radius)
+        sprite = projectile_sprites.get(
+            (self.radius, self.color),
+            lambda: render_projectile_sprite(self.radius, self.color)
+        )
+        screen.blit(sprite, (int(self.x) - offset_x - int(glow_radius), int(self.y) - int(glow_radius)))
         
         # パーティクルを描画
         for particle in self.collision_particles:
+            if camera is not None and not camera.visible(particle['x']):
+                continue
             alpha = int(255 * (particle['life'] / 30))
-            particle_surface = pygame.Surface((particle['radius']*2, particle['radius']*2), pygame.SRCALPHA)
-            pygame.draw.circle(
-                particle_surface, 
-                (*particle['color'], alpha), 
-                (particle['radius'], particle['radius']), 
-                particle['radius']
-            )
-            screen.blit(particle_surface, (particle['x'] - particle['radius'], particle['y'] - particle['radius']))
+            blit_alpha_circle(screen, (*particle['color'], alpha), particle['radius'],
+                              (particle['x'] - offset_x - particle['radius'], particle['y'] - particle['radius']))
+
+def render_hit_target(width, height, color):
+    # ヒットした標的（×の目と悲しい口）。回転しても欠けないように余白をつける
+    target_surface = pygame.Surface((width + 10, height + 10), pygame.SRCALPHA)
+    pygame.draw.rect(target_surface, color, (5, 5, width, height))
+    
+    # 目（×印）
+    pygame.draw.line(target_surface, BLACK, (width//3, height//3), (width//3 + 10, height//3 + 10), 2)
+    pygame.draw.line(target_surface, BLACK, (width//3 + 10, height//3), (width//3, height//3 + 10), 2)
+    
+    pygame.draw.line(target_surface, BLACK, (2*width//3, height//3), (2*width//3 + 10, height//3 + 10), 2)
+    pygame.draw.line(target_surface, BLACK, (2*width//3 + 10, height//3), (2*width//3, height//3 + 10), 2)
+    
+    # 悲しい口
+    pygame.draw.arc(target_surface, BLACK, (width//4, 2*height//3, width//2, height//3), math.pi, 2*math.pi, 2)
+    return target_surface
 
 class Target:
     def __init__(self, x, y, width=40, height=60):
@@ -236,6 +448,12 @@ class Target:
             return True
         return False
     
+    def snapshot(self):
+        # 描画用のコピー（パーティクルは複製する）
+        snap = copy.copy(self)
+        snap.particles = [dict(particle) for particle in self.particles]
+        return snap
+    
     def generate_hit_particles(self):
         # ヒット時のパーティクルを生成
         for _ in range(20):
@@ -251,12 +469,21 @@ class Target:
                 'life': random.randint(20, 40)
             })
     
-    def update(self):
+    def update(self, full_detail=True, field=None):
+        # full_detail: Falseなら画面外として見た目だけの処理（パーティクル、まばたき）を省く
+        # field: レベルの力場 (ForceField)。パーティクルを流す
         if self.hit:
             self.hit_animation += 1
             self.rotation += 5  # ヒット時に回転
             
+            if not full_detail:
+                # 画面に戻ってくるまでに消えるパーティクルは捨てる
+                self.particles.clear()
+                return
+            
             # パーティクルの更新
+            if field is not None:
+                field.push_particles(self.particles)
             for i in range(len(self.particles) - 1, -1, -1):
                 particle = self.particles[i]
                 particle['life'] -= 1
@@ -266,7 +493,7 @@ class Target:
                     particle['x'] += particle['vx']
                     particle['y'] += particle['vy']
                     particle['vy'] += 0.2  # 重力
-        else:
+        elif full_detail:
             # まばたきの処理
             self.blink_timer -= 1
             if self.blink_timer <= 0:
@@ -276,31 +503,35 @@ class Target:
             if self.eyes_blink > 0:
                 self.eyes_blink -= 1
     
-    def draw(self, screen):
+    def draw(self, screen, camera=None):
+        # camera: ワールド座標からスクリーン座標への変換
+        offset_x = camera.offset if camera is not None else 0
+        x = self.x - offset_x
+        
         if not self.hit:
             # 通常の描画
-            pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
+            pygame.draw.rect(screen, self.color, (x, self.y, self.width, self.height))
             
             # 目の描画（まばたき対応）
             eye_size = 5
             if self.eyes_blink <= 0:
                 # 通常の目
-                pygame.draw.circle(screen, BLACK, (int(self.x + self.width//3), int(self.y + self.height//3)), eye_size)
-                pygame.draw.circle(screen, BLACK, (int(self.x + 2*self.width//3), int(self.y + self.height//3)), eye_size)
+                pygame.draw.circle(screen, BLACK, (int(x + self.width//3), int(self.y + self.height//3)), eye_size)
+                pygame.draw.circle(screen, BLACK, (int(x + 2*self.width//3), int(self.y + self.height//3)), eye_size)
                 # 白目のハイライト
-                pygame.draw.circle(screen, WHITE, (int(self.x + self.width//3) + 2, int(self.y + self.height//3) - 2), 2)
-                pygame.draw.circle(screen, WHITE, (int(self.x + 2*self.width//3) + 2, int(self.y + self.height//3) - 2), 2)
+                pygame.draw.circle(screen, WHITE, (int(x + self.width//3) + 2, int(self.y + self.height//3) - 2), 2)
+                pygame.draw.circle(screen, WHITE, (int(x + 2*self.width//3) + 2, int(self.y + self.height//3) - 2), 2)
             else:
                 # まばたき中
                 pygame.draw.line(screen, BLACK, 
-                                (int(self.x + self.width//3) - eye_size, int(self.y + self.height//3)),
-                                (int(self.x + self.width//3) + eye_size, int(self.y + self.height//3)), 2)
+                                (int(x + self.width//3) - eye_size, int(self.y + self.height//3)),
+                                (int(x + self.width//3) + eye_size, int(self.y + self.height//3)), 2)
                 pygame.draw.line(screen, BLACK, 
-                                (int(self.x + 2*self.width//3) - eye_size, int(self.y + self.height//3)),
-                                (int(self.x + 2*self.width//3) + eye_size, int(self.y + self.height//3)), 2)
+                                (int(x + 2*self.width//3) - eye_size, int(self.y + self.height//3)),
+                                (int(x + 2*self.width//3) + eye_size, int(self.y + self.height//3)), 2)
             
             # 口の描画
-            pygame.draw.arc(screen, BLACK, (self.x + self.width//4, self.y + self.height//2, self.width//2, self.height//3), 0, math.pi, 2)
+            pygame.draw.arc(screen, BLACK, (x + self.width//4, self.y + self.height//2, self.width//2, self.height//3), 0, math.pi, 2)
         else:
             # ヒットアニメーション
             if self.hit_animation < 40:  # アニメーション時間を延長
@@ -308,22 +539,14 @@ class Target:
                 fall_y = self.y + self.hit_animation * 2
                 
                 # 回転の中心点を計算
-                center_x = self.x + self.width/2
+                center_x = x + self.width/2
                 center_y = fall_y + self.height/2
                 
-                # 回転した矩形を描画するための準備
-                target_surface = pygame.Surface((self.width + 10, self.height + 10), pygame.SRCALPHA)
-                pygame.draw.rect(target_surface, self.color, (5, 5, self.width, self.height))
-                
-                # 目（×印）
-                pygame.draw.line(target_surface, BLACK, (self.width//3, self.height//3), (self.width//3 + 10, self.height//3 + 10), 2)
-                pygame.draw.line(target_surface, BLACK, (self.width//3 + 10, self.height//3), (self.width//3, self.height//3 + 10), 2)
-                
-                pygame.draw.line(target_surface, BLACK, (2*self.width//3, self.height//3), (2*self.width//3 + 10, self.height//3 + 10), 2)
-                pygame.draw.line(target_surface, BLACK, (2*self.width//3 + 10, self.height//3), (2*self.width//3, self.height//3 + 10), 2)
-                
-                # 悲しい口
-                pygame.draw.arc(target_surface, BLACK, (self.width//4, 2*self.height//3, self.width//2, self.height//3), math.pi, 2*math.pi, 2)
+                # 回転前の姿は大きさと色で決まるのでキャッシュし、回転だけを毎フレーム行う
+                target_surface = decoration_sprites.get(
+                    ("hit_target", self.width, self.height, self.color),
+                    lambda: render_hit_target(self.width, self.height, self.color)
+                )
                 
                 # 回転
                 rotated_surface = pygame.transform.rotate(target_surface, self.rotation)
@@ -332,15 +555,11 @@ class Target:
             
             # パーティクルを描画
             for particle in self.particles:
+                if camera is not None and not camera.visible(particle['x']):
+                    continue
                 alpha = int(255 * (particle['life'] / 40))
-                particle_surface = pygame.Surface((particle['radius']*2, particle['radius']*2), pygame.SRCALPHA)
-                pygame.draw.circle(
-                    particle_surface, 
-                    (*particle['color'], alpha), 
-                    (particle['radius'], particle['radius']), 
-                    particle['radius']
-                )
-                screen.blit(particle_surface, (particle['x'] - particle['radius'], particle['y'] - particle['radius']))
+                blit_alpha_circle(screen, (*particle['color'], alpha), particle['radius'],
+                                  (particle['x'] - offset_x - particle['radius'], particle['y'] - particle['radius']))
 
 class Obstacle:
     def __init__(self, x, y, width, height):
@@ -350,25 +569,27 @@ class Obstacle:
         self.height = height
         self.color = BROWN
     
-    def check_collision(self, projectile):
+    def check_collision(self, projectile, physics=None):
         # Simple collision detection (circle vs rectangle)
+        # physics: (重力, 空気抵抗, 弾性)。None ならグローバルの値
         test_x = max(self.x, min(projectile.x, self.x + self.width))
         test_y = max(self.y, min(projectile.y, self.y + self.height))
         
         distance = math.sqrt((test_x - projectile.x)**2 + (test_y - projectile.y)**2)
         
         if distance < projectile.radius:
+            elasticity = physics[2] if physics is not None else ELASTICITY
             # Calculate collision response
             if abs(projectile.x - (self.x + self.width/2)) > abs(projectile.y - (self.y + self.height/2)):
                 # Horizontal collision
-                projectile.vel_x *= -ELASTICITY
+                projectile.vel_x *= -elasticity
                 if projectile.x < self.x + self.width/2:
                     projectile.x = self.x - projectile.radius
                 else:
                     projectile.x = self.x + self.width + projectile.radius
             else:
                 # Vertical collision
-                projectile.vel_y *= -ELASTICITY
+                projectile.vel_y *= -elasticity
                 if projectile.y < self.y + self.height/2:
                     projectile.y = self.y - projectile.radius
                 else:
@@ -376,11 +597,14 @@ class Obstacle:
             return True
         return False
     
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, self.width, self.height))
-        # Add wood texture effect
-        for i in range(0, self.width, 10):
-            pygame.draw.line(screen, (100, 50, 0), (self.x + i, self.y), (self.x + i, self.y + self.height), 1)
+    def draw(self, screen, camera=None):
+        x = self.x - camera.offset if camera is not None else self.x
+        # Add wood texture effect (サイズごとに事前描画したテクスチャ)
+        texture = terrain_sprites.get(
+            ("obstacle", self.width, self.height, self.color),
+            lambda: render_obstacle_texture(self.width, self.height, self.color)
+        )
+        screen.blit(texture, (x, self.y))
 
 class Slingshot:
     def __init__(self, x, y):
@@ -392,43 +616,39 @@ class Slingshot:
         self.base_color = (160, 82, 45)  # Sienna
         self.band_stretch = 0  # バンドの伸縮アニメーション用
     
-    def draw(self, screen, projectile=None):
+    def draw(self, screen, projectile=None, camera=None):
+        self.draw_base(screen, camera)
+        self.draw_band(screen, projectile, camera)
+    
+    def draw_base(self, screen, camera=None):
+        x = self.x - (camera.offset if camera is not None else 0)
+        # Draw slingshot base with wood texture (木目と上部の丸みは事前描画したスプライト)
+        base = terrain_sprites.get(
+            ("slingshot", self.width, self.height, self.base_color),
+            lambda: render_slingshot_base(self.width, self.height, self.base_color)
+        )
+        screen.blit(base, (x - self.width//2, self.y - self.height//2 - self.width//2))
+    
+    def draw_band(self, screen, projectile=None, camera=None):
+        # バンドと金属部品（照準中は弾と一緒に最後に描けるように土台とは分けてある）
+        offset_x = camera.offset if camera is not None else 0
+        x = self.x - offset_x
+        
         # バンドの伸縮アニメーション
         self.band_stretch = math.sin(pygame.time.get_ticks() / 200) * 2
         
-        # Draw slingshot base with wood texture
-        base_rect = pygame.Rect(self.x - self.width//2, self.y - self.height//2, self.width, self.height)
-        pygame.draw.rect(screen, self.base_color, base_rect)
-        
-        # 木目テクスチャ
-        for i in range(0, self.height, 5):
-            wood_color = (
-                min(255, self.base_color[0] + random.randint(-20, 20)),
-                min(255, self.base_color[1] + random.randint(-20, 20)),
-                min(255, self.base_color[2] + random.randint(-20, 20))
-            )
-            pygame.draw.line(
-                screen, 
-                wood_color, 
-                (self.x - self.width//2, self.y - self.height//2 + i),
-                (self.x + self.width//2, self.y - self.height//2 + i)
-            )
-        
-        # 上部の丸みを帯びた部分
-        pygame.draw.circle(screen, self.base_color, (self.x, self.y - self.height//2), self.width//2)
-        
         # Draw slingshot band (behind projectile)
         if projectile and not projectile.launched:
             # バンドの描画（より自然な曲線）
             band_points1 = [
-                (self.x - self.width//2, self.y - self.height//2),
-                (self.x - self.width//4, self.y - self.height//4),
-                (projectile.x, projectile.y)
+                (x - self.width//2, self.y - self.height//2),
+                (x - self.width//4, self.y - self.height//4),
+                (projectile.x - offset_x, projectile.y)
             ]
             band_points2 = [
-                (self.x + self.width//2, self.y - self.height//2),
-                (self.x + self.width//4, self.y - self.height//4),
-                (projectile.x, projectile.y)
+                (x + self.width//2, self.y - self.height//2),
+                (x + self.width//4, self.y - self.height//4),
+                (projectile.x - offset_x, projectile.y)
             ]
             
             # バンドの影
@@ -445,15 +665,15 @@ class Slingshot:
             pygame.draw.line(
                 screen, 
                 self.band_color, 
-                (self.x - self.width//2, self.y - self.height//2),
-                (self.x + self.width//2, self.y - self.height//2 + band_y_offset), 
+                (x - self.width//2, self.y - self.height//2),
+                (x + self.width//2, self.y - self.height//2 + band_y_offset), 
                 5
             )
         
         # 装飾的な要素（金属部品など）
         metal_color = (200, 200, 200)
-        pygame.draw.circle(screen, metal_color, (self.x, self.y - self.height//2), 5)
-        pygame.draw.rect(screen, metal_color, (self.x - 5, self.y + self.height//3, 10, 5))
+        pygame.draw.circle(screen, metal_color, (x, self.y - self.height//2), 5)
+        pygame.draw.rect(screen, metal_color, (x - 5, self.y + self.height//3, 10, 5))
 
 class Level:
     def __init__(self, level_number, difficulty=DIFFICULTY_NORMAL):
@@ -464,60 +684,135 @@ class Level:
         self.projectile_count = DIFFICULTY_PARAMS[difficulty]["projectile_count"]
         self.projectiles_used = 0
         
+        self.target_specs = []
+        self.obstacle_specs = []
+        self.field_sources = []
+        self.field = None  # 力場を焼き込んだグリッド (ForceField)。力場のないレベルでは None
+        self.background = None  # 背景画像のアセット名。なければ空と遠景を描画する
+        self.width = WIDTH
+        self.revision = 0  # 定義から作り直すたびに増える（派生キャッシュの無効化用）
+        
         # Set up level based on level number
         self.setup_level()
     
     def setup_level(self):
+        # レベル定義ファイルから標的と障害物を配置
+        self.apply_definition(load_level_definition(self.level_number))
+    
+    def resolve_specs(self, entities, target_distance, default_width, default_height):
+        # 定義の各要素を (x, y, width, height) に変換
+        # "x" は絶対位置、"dx" は標的の基本距離からの相対位置、"bottom" は画面下端からの高さ
+        specs = []
+        for entity in entities:
+            x = entity["x"] if "x" in entity else target_distance + entity.get("dx", 0)
+            y = HEIGHT - entity["bottom"]
+            spec = (x, y, entity.get("width", default_width), entity.get("height", default_height))
+            if not all(isinstance(value, (int, float)) for value in spec):
+                raise ValueError(f"entity position and size must be numbers: {entity}")
+            specs.append(spec)
+        return specs
+    
+    def resolve_fields(self, entities, target_distance):
+        # 力場の発生源の "x"/"dx" と "bottom" をワールド座標の "x", "y" に変換（他のキーはそのまま）
+        sources = []
+        for entity in entities:
+            source = {key: value for key, value in entity.items() if key not in ("dx", "bottom")}
+            source["x"] = entity["x"] if "x" in entity else target_distance + entity.get("dx", 0)
+            source["y"] = HEIGHT - entity["bottom"]
+            sources.append(source)
+        return sources
+    
+    def resolve_definition(self, definition):
+        """
+        レベル定義を検証し、(標的, 障害物, 幅, 力場の発生源, 力場) に変換する。レベル自体は変更しない
+        壊れた定義（必須のキーがない、未知の力場の種類など）では例外を送出する
+        """
         # 難易度に基づく距離係数
         distance_factor = DIFFICULTY_PARAMS[self.difficulty]["target_distance_factor"]
+        target_distance = int(definition.get("base_distance", 0) * distance_factor)
         
-        if self.level_number == 1:
-            # Level 1: Simple targets - 難易度に応じて距離を調整
-            base_distance = 400  # 基本距離
-            target_distance = int(base_distance * distance_factor)
-            self.targets = [
-                Target(target_distance, HEIGHT - 80),
-                Target(target_distance + 50, HEIGHT - 80),
-                Target(target_distance + 100, HEIGHT - 80)
-            ]
-        elif self.level_number == 2:
-            # Level 2: Targets with obstacles - 難易度に応じて配置を調整
-            base_distance = 450  # 基本距離
-            target_distance = int(base_distance * distance_factor)
-            self.targets = [
-                Target(target_distance, HEIGHT - 80),
-                Target(target_distance + 100, HEIGHT - 80)
-            ]
-            self.obstacles = [
-                Obstacle(target_distance - 50, HEIGHT - 150, 20, 130),
-                Obstacle(target_distance + 50, HEIGHT - 100, 100, 20)
-            ]
-        elif self.level_number == 3:
-            # Level 3: More complex arrangement - 難易度に応じて配置を調整
-            base_distance = 400  # 基本距離
-            target_distance = int(base_distance * distance_factor)
-            self.targets = [
-                Target(target_distance, HEIGHT - 200),
-                Target(target_distance + 100, HEIGHT - 300),
-                Target(target_distance + 200, HEIGHT - 80)
-            ]
-            self.obstacles = [
-                Obstacle(450, HEIGHT - 150, 20, 130),
-                Obstacle(550, HEIGHT - 250, 100, 20),
-                Obstacle(650, HEIGHT - 150, 20, 130)
-            ]
+        target_specs = self.resolve_specs(definition.get("targets", []), target_distance, 40, 60)
+        obstacle_specs = self.resolve_specs(definition.get("obstacles", []), target_distance, 20, 20)
+        width = max(WIDTH, definition.get("width", WIDTH))  # レベルの幅（画面より広ければスクロールする）
+        field_sources = self.resolve_fields(definition.get("fields", []), target_distance)
+        field = self.field
+        if field_sources != self.field_sources or width != self.width:
+            # 力場は読み込み時に一度だけグリッドに焼き込む
+            field = bake_field(field_sources, width, HEIGHT)
+        return target_specs, obstacle_specs, width, field_sources, field
+    
+    def apply_definition(self, definition):
+        """
+        レベル定義を適用する。変更のない標的・障害物はそのまま残し（ヒット状態も保持）、
+        変更・追加されたものだけを作り直す。作り直した数を返す
+        定義が壊れていれば例外を送出し、レベルは元のまま残る
+        """
+        target_specs, obstacle_specs, width, field_sources, field = self.resolve_definition(definition)
+        
+        self.field = field
+        self.targets, rebuilt_targets = self.rebuild_entities(self.targets, self.target_specs, target_specs, Target)
+        self.obstacles, rebuilt_obstacles = self.rebuild_entities(self.obstacles, self.obstacle_specs, obstacle_specs, Obstacle)
+        
+        changed = target_specs != self.target_specs or obstacle_specs != self.obstacle_specs or \
+            width != self.width or field_sources != self.field_sources
+        self.target_specs = target_specs
+        self.obstacle_specs = obstacle_specs
+        self.field_sources = field_sources
+        self.width = width
+        self.background = definition.get("background")
+        if changed:
+            self.revision += 1
+        return rebuilt_targets + rebuilt_obstacles
+    
+    def rebuild_entities(self, entities, old_specs, new_specs, entity_class):
+        # 同じ定義の既存オブジェクトを再利用し、見つからないものだけ新しく作る
+        reusable = {}
+        for spec, entity in zip(old_specs, entities):
+            reusable.setdefault(spec, []).append(entity)
+        
+        result = []
+        rebuilt = 0
+        for spec in new_specs:
+            if reusable.get(spec):
+                result.append(reusable[spec].pop(0))
+            else:
+                result.append(entity_class(*spec))
+                rebuilt += 1
+        return result, rebuilt
     
     def is_complete(self):
         return all(target.hit for target in self.targets)
     
-    def draw(self, screen):
+    def snapshot(self):
+        # 描画用のコピー（障害物は変化しないので共有する）
+        snap = copy.copy(self)
+        snap.targets = [target.snapshot() for target in self.targets]
+        snap.obstacles = list(self.obstacles)
+        return snap
+    
+    def draw(self, screen, camera=None):
+        # camera があればビュー（と余白）の中にあるものだけを描画する
+        if self.field is not None:
+            overlay = field_sprites.get(self.field, lambda: render_field_overlay(self.field))
+            # ビューに入る部分だけを転送する
+            screen.blit(overlay, (0, 0), pygame.Rect(camera.offset if camera is not None else 0, 0, WIDTH, HEIGHT))
+        
         for obstacle in self.obstacles:
-            obstacle.draw(screen)
+            if camera is None or camera.visible(obstacle.x, obstacle.width):
+                obstacle.draw(screen, camera)
         
         for target in self.targets:
-            target.draw(screen)
+            if camera is None or camera.visible(target.x, target.width):
+                target.draw(screen, camera)
 
-def draw_background(screen):
+def draw_background(screen, camera=None, image=None):
+    # camera: 地面の帯だけをスクロールさせる（空と遠景は固定）
+    # image: レベルの背景画像。指定すると空・太陽・雲・山の代わりに描く
+    if image is not None:
+        screen.blit(image, (0, 0))
+        draw_ground(screen, camera)
+        return
+    
     # Sky gradient with time of day effect
     time_factor = (math.sin(pygame.time.get_ticks() / 50000) + 1) / 2  # 時間による変化（ゆっくり）
     
@@ -572,23 +867,18 @@ def draw_background(screen):
             ]
             pygame.draw.polygon(screen, mountain_color, points)
     
-    # Ground with texture
-    ground_rect = pygame.Rect(0, HEIGHT - 20, WIDTH, 20)
-    pygame.draw.rect(screen, (100, 80, 0), ground_rect)
-    
-    # Add some grass (静的な草に戻す)
-    for i in range(0, WIDTH, 5):
-        grass_height = random.randint(3, 7)
-        grass_color = (50, 150 + random.randint(-20, 20), 50)
-        pygame.draw.line(
-            screen, 
-            grass_color, 
-            (i, HEIGHT - 20), 
-            (i, HEIGHT - 20 - grass_height), 
-            2
-        )
+    draw_ground(screen, camera)
 
-def draw_cloud(screen, x, y):
+def draw_ground(screen, camera=None):
+    # Ground with texture and grass (事前描画した画面幅の帯を並べる)
+    strip = terrain_sprites.get(("ground", WIDTH), lambda: render_ground_strip(WIDTH))
+    strip_x = -(camera.offset % WIDTH) if camera is not None else 0
+    strip_y = HEIGHT - GROUND_HEIGHT - GRASS_MAX_HEIGHT
+    screen.blit(strip, (strip_x, strip_y))
+    if strip_x < 0:
+        screen.blit(strip, (strip_x + WIDTH, strip_y))
+
+def render_cloud():
     cloud_color = (250, 250, 250, 200)  # 半透明の雲
     cloud_surface = pygame.Surface((100, 50), pygame.SRCALPHA)
     
@@ -605,72 +895,167 @@ def draw_cloud(screen, x, y):
     shadow_surface = pygame.Surface((100, 10), pygame.SRCALPHA)
     shadow_color = (100, 100, 100, 100)
     pygame.draw.ellipse(shadow_surface, shadow_color, (10, 0, 80, 10))
-    
-    # 画面に描画
+    return cloud_surface, shadow_surface
+
+def draw_cloud(screen, x, y):
+    # 雲の形は固定なので一度だけ描いておく
+    cloud_surface, shadow_surface = decoration_sprites.get("cloud", render_cloud)
     screen.blit(cloud_surface, (int(x - 50), int(y - 25)))
     screen.blit(shadow_surface, (int(x - 50), int(y + 20)))
 
-def draw_ui(screen, level, projectile_count, game_state, current_difficulty=DIFFICULTY_NORMAL):
-    # UI用のフォント
-    title_font = pygame.font.SysFont('Arial', 36)
-    header_font = pygame.font.SysFont('Arial', 24)
-    info_font = pygame.font.SysFont('Arial', 20)
-    
-    # 半透明のトップバー
-    top_bar_height = 60
-    top_bar_surface = pygame.Surface((WIDTH, top_bar_height), pygame.SRCALPHA)
-    top_bar_surface.fill((0, 0, 0, 100))  # 半透明の黒
-    screen.blit(top_bar_surface, (0, 0))
-    
-    # ゲーム情報パネル（左側）
-    info_panel_width = 200
-    info_panel_height = 120
-    info_panel_x = 20
-    info_panel_y = 70
-    
-    if game_state != DIFFICULTY_SELECT:
+# 難易度の表示名・色・説明
+DIFFICULTY_NAMES = ["Easy", "Normal", "Hard"]
+DIFFICULTY_COLORS = [(0, 200, 0), (0, 0, 200), (200, 0, 0)]
+DIFFICULTY_DESCRIPTIONS = [
+    "Lower gravity, more projectiles",
+    "Balanced gameplay",
+    "Higher gravity, fewer projectiles"
+]
+
+class UILayer:
+    """
+    リテインドモードのUIレイヤー
+    パネル・オーバーレイ・ボタンをキャッシュ済みサーフェスに合成しておき、
+    入力（レベル番号、弾数、ゲーム状態、難易度、ホバー状態）が変わった時だけ作り直す。
+    変化のないフレームは合成済みサーフェスを1回blitするだけになる。
+    """
+    # トップバーと情報パネル
+    TOP_BAR_HEIGHT = 60
+    INFO_PANEL_RECT = (20, 70, 200, 120)
+    # 難易度選択パネルとボタン
+    DIFFICULTY_PANEL_RECT = (WIDTH//2 - 250, HEIGHT//2 - 200, 500, 400)
+    BUTTON_WIDTH, BUTTON_HEIGHT = 300, 50
+    BUTTON_MARGIN = 20
+
+    def __init__(self):
+        self.fonts = None
+        self.parts = SpriteCache(max_entries=32)  # パネル・ボタン単位のキャッシュ
+        self.frame_key = None
+        self.frame_surface = None
+        self.rebuilds = 0
+
+    def invalidate(self):
+        # 全てのキャッシュを破棄（フォントや画面サイズが変わった時など）
+        self.parts.invalidate()
+        self.frame_key = None
+        self.frame_surface = None
+
+    def get_fonts(self):
+        # SysFont の生成は重いので一度だけ作成する
+        if self.fonts is None:
+            self.fonts = {
+                "title": pygame.font.SysFont('Arial', 36),
+                "header": pygame.font.SysFont('Arial', 24),
+                "info": pygame.font.SysFont('Arial', 20),
+            }
+        return self.fonts
+
+    def button_rect(self, index):
+        # 難易度ボタンの画面上の領域
+        panel_x, panel_y, panel_width, panel_height = self.DIFFICULTY_PANEL_RECT
+        button_x = WIDTH//2 - self.BUTTON_WIDTH//2
+        button_y = panel_y + 130 + index * (self.BUTTON_HEIGHT + self.BUTTON_MARGIN)
+        return pygame.Rect(button_x, button_y, self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+
+    def hovered_button(self, mouse_pos):
+        for i in range(len(DIFFICULTY_NAMES)):
+            if self.button_rect(i).collidepoint(mouse_pos):
+                return i
+        return None
+
+    def draw(self, screen, level, projectile_count, game_state, current_difficulty, mouse_pos=None):
+        hovered = None
+        if game_state == DIFFICULTY_SELECT:
+            hovered = self.hovered_button(pygame.mouse.get_pos() if mouse_pos is None else mouse_pos)
+        
+        frame_key = (level.level_number, projectile_count, game_state, current_difficulty, hovered)
+        if frame_key != self.frame_key:
+            self.frame_surface = self.compose(level.level_number, projectile_count, game_state, current_difficulty, hovered)
+            self.frame_key = frame_key
+            self.rebuilds += 1
+        screen.blit(self.frame_surface, (0, 0))
+
+    def compose(self, level_number, projectile_count, game_state, current_difficulty, hovered):
+        # キャッシュ済みのパーツを1枚のサーフェスに合成する
+        modal = game_state in (LEVEL_COMPLETE, GAME_OVER, DIFFICULTY_SELECT)
+        info_x, info_y, info_width, info_height = self.INFO_PANEL_RECT
+        frame_height = HEIGHT if modal else info_y + info_height
+        frame = pygame.Surface((WIDTH, frame_height), pygame.SRCALPHA)
+        
+        frame.blit(self.parts.get(("top_bar", game_state), lambda: self.render_top_bar(game_state)), (0, 0))
+        
+        if game_state != DIFFICULTY_SELECT:
+            info_panel = self.parts.get(
+                ("info_panel", level_number, projectile_count, current_difficulty),
+                lambda: self.render_info_panel(level_number, projectile_count, current_difficulty)
+            )
+            frame.blit(info_panel, (info_x, info_y))
+        
+        if game_state == LEVEL_COMPLETE or game_state == GAME_OVER:
+            frame.blit(self.parts.get(("message", game_state), lambda: self.render_message(game_state)), (0, 0))
+        elif game_state == DIFFICULTY_SELECT:
+            frame.blit(self.parts.get(("difficulty_panel",), self.render_difficulty_panel), (0, 0))
+            for i in range(len(DIFFICULTY_NAMES)):
+                is_selected = (i == current_difficulty)
+                is_hovered = (i == hovered)
+                button = self.parts.get(
+                    ("button", i, is_selected, is_hovered),
+                    lambda: self.render_button(i, is_selected, is_hovered)
+                )
+                frame.blit(button, self.button_rect(i).topleft)
+        return frame
+
+    def render_top_bar(self, game_state):
+        fonts = self.get_fonts()
+        
+        # 半透明のトップバー
+        top_bar_surface = pygame.Surface((WIDTH, self.TOP_BAR_HEIGHT), pygame.SRCALPHA)
+        top_bar_surface.fill((0, 0, 0, 100))  # 半透明の黒
+        
+        # 指示テキスト（中央上部）
+        if game_state == AIMING:
+            instruction_text = fonts["header"].render("Drag to aim and release to fire", True, WHITE)
+            top_bar_surface.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, 15))
+        elif game_state == WAITING_FOR_NEXT_SHOT:
+            instruction_text = fonts["header"].render("Next shot coming...", True, WHITE)
+            top_bar_surface.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, 15))
+        
+        # リスタート指示（右上）
+        if game_state != DIFFICULTY_SELECT:
+            restart_text = fonts["info"].render("Press 'R' to restart", True, WHITE)
+            top_bar_surface.blit(restart_text, (WIDTH - restart_text.get_width() - 20, 20))
+        return top_bar_surface
+
+    def render_info_panel(self, level_number, projectile_count, current_difficulty):
+        fonts = self.get_fonts()
+        info_x, info_y, info_panel_width, info_panel_height = self.INFO_PANEL_RECT
+        
         # 情報パネルの背景
         info_panel_surface = pygame.Surface((info_panel_width, info_panel_height), pygame.SRCALPHA)
         info_panel_surface.fill((255, 255, 255, 180))  # 半透明の白
         draw_rounded_rect(info_panel_surface, (255, 255, 255, 180), (0, 0, info_panel_width, info_panel_height), radius=10)
-        screen.blit(info_panel_surface, (info_panel_x, info_panel_y))
         
         # レベル情報
-        level_text = header_font.render(f"Level: {level.level_number}", True, BLACK)
-        screen.blit(level_text, (info_panel_x + 15, info_panel_y + 15))
+        level_text = fonts["header"].render(f"Level: {level_number}", True, BLACK)
+        info_panel_surface.blit(level_text, (15, 15))
         
         # 弾の数
-        projectile_text = info_font.render(f"Projectiles: {projectile_count}", True, BLACK)
-        screen.blit(projectile_text, (info_panel_x + 15, info_panel_y + 50))
+        projectile_text = fonts["info"].render(f"Projectiles: {projectile_count}", True, BLACK)
+        info_panel_surface.blit(projectile_text, (15, 50))
         
         # 難易度
-        difficulty_names = ["Easy", "Normal", "Hard"]
-        difficulty_colors = [(0, 200, 0), (0, 0, 200), (200, 0, 0)]
-        difficulty_text = info_font.render(f"Difficulty: ", True, BLACK)
-        diff_name_text = info_font.render(f"{difficulty_names[current_difficulty]}", True, difficulty_colors[current_difficulty])
-        
-        screen.blit(difficulty_text, (info_panel_x + 15, info_panel_y + 80))
-        screen.blit(diff_name_text, (info_panel_x + 15 + difficulty_text.get_width(), info_panel_y + 80))
-    
-    # 指示テキスト（中央上部）
-    if game_state == AIMING:
-        instruction_text = header_font.render("Drag to aim and release to fire", True, WHITE)
-        screen.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, 15))
-    elif game_state == WAITING_FOR_NEXT_SHOT:
-        instruction_text = header_font.render("Next shot coming...", True, WHITE)
-        screen.blit(instruction_text, (WIDTH//2 - instruction_text.get_width()//2, 15))
-    
-    # リスタート指示（右上）
-    if game_state != DIFFICULTY_SELECT:
-        restart_text = info_font.render("Press 'R' to restart", True, WHITE)
-        screen.blit(restart_text, (WIDTH - restart_text.get_width() - 20, 20))
-    
-    # ゲーム状態メッセージ
-    if game_state == LEVEL_COMPLETE or game_state == GAME_OVER:
+        difficulty_text = fonts["info"].render(f"Difficulty: ", True, BLACK)
+        diff_name_text = fonts["info"].render(f"{DIFFICULTY_NAMES[current_difficulty]}", True, DIFFICULTY_COLORS[current_difficulty])
+        info_panel_surface.blit(difficulty_text, (15, 80))
+        info_panel_surface.blit(diff_name_text, (15 + difficulty_text.get_width(), 80))
+        return info_panel_surface
+
+    def render_message(self, game_state):
+        fonts = self.get_fonts()
+        
         # 半透明のオーバーレイ
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 150))  # 半透明の黒
-        screen.blit(overlay, (0, 0))
         
         # メッセージパネル
         panel_width, panel_height = 400, 200
@@ -678,318 +1063,699 @@ def draw_ui(screen, level, projectile_count, game_state, current_difficulty=DIFF
         panel_y = HEIGHT//2 - panel_height//2
         
         # パネルの背景
-        draw_rounded_rect(screen, (255, 255, 255, 230), (panel_x, panel_y, panel_width, panel_height), radius=15)
+        draw_rounded_rect(overlay, (255, 255, 255, 230), (panel_x, panel_y, panel_width, panel_height), radius=15)
         
         if game_state == LEVEL_COMPLETE:
             # レベルクリアメッセージ
-            message_text = title_font.render("Level Complete!", True, GREEN)
-            screen.blit(message_text, (WIDTH//2 - message_text.get_width()//2, panel_y + 50))
+            message_text = fonts["title"].render("Level Complete!", True, GREEN)
+            overlay.blit(message_text, (WIDTH//2 - message_text.get_width()//2, panel_y + 50))
             
             # 続行指示
-            continue_text = header_font.render("Click to continue", True, BLACK)
-            screen.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, panel_y + 120))
-        elif game_state == GAME_OVER:
+            continue_text = fonts["header"].render("Click to continue", True, BLACK)
+            overlay.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, panel_y + 120))
+        else:
             # ゲームオーバーメッセージ
-            message_text = title_font.render("Game Over!", True, RED)
-            screen.blit(message_text, (WIDTH//2 - message_text.get_width()//2, panel_y + 50))
+            message_text = fonts["title"].render("Game Over!", True, RED)
+            overlay.blit(message_text, (WIDTH//2 - message_text.get_width()//2, panel_y + 50))
             
             # リスタート指示
-            restart_text = header_font.render("Click to restart", True, BLACK)
-            screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, panel_y + 120))
-    
-    elif game_state == DIFFICULTY_SELECT:
+            restart_text = fonts["header"].render("Click to restart", True, BLACK)
+            overlay.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, panel_y + 120))
+        return overlay
+
+    def render_difficulty_panel(self):
+        # ボタン以外の難易度選択画面（ボタンは別にキャッシュしてホバー時だけ差し替える）
+        fonts = self.get_fonts()
+        
         # 半透明のオーバーレイ
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 100))  # 半透明の黒
-        screen.blit(overlay, (0, 0))
         
         # タイトルパネル
-        panel_width, panel_height = 500, 400
-        panel_x = WIDTH//2 - panel_width//2
-        panel_y = HEIGHT//2 - panel_height//2
-        
-        # パネルの背景
-        draw_rounded_rect(screen, (255, 255, 255, 230), (panel_x, panel_y, panel_width, panel_height), radius=15)
+        panel_x, panel_y, panel_width, panel_height = self.DIFFICULTY_PANEL_RECT
+        draw_rounded_rect(overlay, (255, 255, 255, 230), self.DIFFICULTY_PANEL_RECT, radius=15)
         
         # タイトル
-        game_title = title_font.render("Slingshot Physics Game", True, BLACK)
-        screen.blit(game_title, (WIDTH//2 - game_title.get_width()//2, panel_y + 30))
+        game_title = fonts["title"].render("Slingshot Physics Game", True, BLACK)
+        overlay.blit(game_title, (WIDTH//2 - game_title.get_width()//2, panel_y + 30))
         
         # サブタイトル
-        subtitle = header_font.render("Select Difficulty", True, DARK_GRAY)
-        screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, panel_y + 80))
-        
-        # 難易度ボタン
-        button_width, button_height = 300, 50
-        button_margin = 20
-        button_x = WIDTH//2 - button_width//2
-        button_y = panel_y + 130
-        
-        # マウス位置を取得
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-        
-        # 難易度ボタンの描画
-        difficulty_names = ["Easy", "Normal", "Hard"]
-        difficulty_descriptions = [
-            "Lower gravity, more projectiles",
-            "Balanced gameplay",
-            "Higher gravity, fewer projectiles"
-        ]
-        
-        colors = {"BLACK": BLACK, "LIGHT_BLUE": LIGHT_BLUE, "LIGHT_GREEN": LIGHT_GREEN}
+        subtitle = fonts["header"].render("Select Difficulty", True, DARK_GRAY)
+        overlay.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, panel_y + 80))
         
-        for i, (diff_name, diff_desc) in enumerate(zip(difficulty_names, difficulty_descriptions)):
-            button_y_pos = button_y + i * (button_height + button_margin)
-            
-            # ボタンの領域
-            button_rect = (button_x, button_y_pos, button_width, button_height)
-            
-            # マウスがボタン上にあるかチェック
-            is_hovered = (button_x <= mouse_x <= button_x + button_width and 
-                         button_y_pos <= mouse_y <= button_y_pos + button_height)
-            
-            # ボタンを描画
-            draw_button(screen, diff_name, button_rect, header_font, colors,
-                       is_selected=(i == current_difficulty), 
-                       is_hovered=is_hovered)
-            
-            # 難易度の説明
-            desc_text = info_font.render(diff_desc, True, DARK_GRAY)
-            screen.blit(desc_text, (WIDTH//2 - desc_text.get_width()//2, button_y_pos + button_height + 5))
+        # 難易度の説明
+        for i, diff_desc in enumerate(DIFFICULTY_DESCRIPTIONS):
+            button_rect = self.button_rect(i)
+            desc_text = fonts["info"].render(diff_desc, True, DARK_GRAY)
+            overlay.blit(desc_text, (WIDTH//2 - desc_text.get_width()//2, button_rect.bottom + 5))
         
         # 操作説明
-        key_text = info_font.render("Press 1-3 to select, ENTER to start", True, DARK_GRAY)
-        screen.blit(key_text, (WIDTH//2 - key_text.get_width()//2, panel_y + panel_height - 40))
+        key_text = fonts["info"].render("Press 1-3 to select, ENTER to start", True, DARK_GRAY)
+        overlay.blit(key_text, (WIDTH//2 - key_text.get_width()//2, panel_y + panel_height - 40))
+        return overlay
 
-def main():
-    clock = pygame.time.Clock()
+    def render_button(self, index, is_selected, is_hovered):
+        button_surface = pygame.Surface((self.BUTTON_WIDTH, self.BUTTON_HEIGHT), pygame.SRCALPHA)
+        colors = {"BLACK": BLACK, "LIGHT_BLUE": LIGHT_BLUE, "LIGHT_GREEN": LIGHT_GREEN}
+        draw_button(button_surface, DIFFICULTY_NAMES[index], (0, 0, self.BUTTON_WIDTH, self.BUTTON_HEIGHT),
+                    self.get_fonts()["header"], colors,
+                    is_selected=is_selected,
+                    is_hovered=is_hovered)
+        return button_surface
+
+ui_layer = UILayer()
+
+def draw_ui(screen, level, projectile_count, game_state, current_difficulty=DIFFICULTY_NORMAL):
+    # キャッシュ済みのUIレイヤーを描画（入力が変わった時だけ再合成）
+    ui_layer.draw(screen, level, projectile_count, game_state, current_difficulty)
+
+def apply_difficulty_physics(difficulty):
+    # 難易度に応じて物理パラメータを更新
+    global GRAVITY, FRICTION, ELASTICITY
+    GRAVITY = DIFFICULTY_PARAMS[difficulty]["gravity"]
+    FRICTION = DIFFICULTY_PARAMS[difficulty]["friction"]
+    ELASTICITY = DIFFICULTY_PARAMS[difficulty]["elasticity"]
+
+def physics_params(difficulty):
+    # 難易度の物理パラメータ (重力, 空気抵抗, 弾性)。グローバルを書き換えずに step_shot などへ渡す
+    params = DIFFICULTY_PARAMS[difficulty]
+    return params["gravity"], params["friction"], params["elasticity"]
+
+def drag_position(slingshot, mouse_x, mouse_y):
+    # ドラッグ中の弾の位置（マウスのワールド座標をドラッグ距離の上限で制限する）
+    # Limit the drag distance
+    max_drag = 150  # ドラッグ距離を増加
+    dx = slingshot.x - mouse_x
+    dy = (slingshot.y - slingshot.height//2) - mouse_y
+    distance = math.sqrt(dx*dx + dy*dy)
     
-    # 難易度の初期設定
-    current_difficulty = DIFFICULTY_NORMAL
+    if distance > max_drag:
+        scale = max_drag / distance
+        mouse_x = slingshot.x - dx * scale
+        mouse_y = (slingshot.y - slingshot.height//2) - dy * scale
+    return mouse_x, mouse_y
+
+def launch_parameters(anchor_x, anchor_y, mouse_x, mouse_y, difficulty):
+    # ドラッグ位置から発射角度とパワーを計算
+    power_factor = DIFFICULTY_PARAMS[difficulty]["power_factor"]
+    power = min(30, math.sqrt((mouse_x - anchor_x)**2 + (mouse_y - anchor_y)**2) / power_factor)
+    angle = math.atan2(anchor_y - mouse_y, anchor_x - mouse_x)
+    return angle, power
+
+def launch_projectile(projectile, angle, power):
+    # 角度とパワーを与えて弾を発射する
+    projectile.vel_x = math.cos(angle) * power
+    projectile.vel_y = math.sin(angle) * power
+    projectile.launched = True
+
+def step_shot(level, projectile, camera=None, physics=None):
+    """
+    飛行中の弾を1フレーム分進める
+    camera: 指定するとビューの外の標的は見た目だけの更新を省く（当たり判定は常に全て行う）
+    physics: physics_params() の値。None ならグローバルの物理パラメータを使う
+    """
+    projectile.update(level.width, level.field, physics)
     
-    # 物理パラメータの設定
-    global GRAVITY, FRICTION, ELASTICITY
-    GRAVITY = DIFFICULTY_PARAMS[current_difficulty]["gravity"]
-    FRICTION = DIFFICULTY_PARAMS[current_difficulty]["friction"]
-    ELASTICITY = DIFFICULTY_PARAMS[current_difficulty]["elasticity"]
+    # Check for collisions with obstacles
+    for obstacle in level.obstacles:
+        obstacle.check_collision(projectile, physics)
     
-    # Initialize game objects
-    slingshot = Slingshot(100, HEIGHT - 100)
-    current_level = Level(1, current_difficulty)
-    projectile = Projectile(slingshot.x, slingshot.y - slingshot.height//2)
-    projectile_count = current_level.projectile_count
+    # Check for collisions with targets
+    for target in level.targets:
+        target.check_collision(projectile)
+        target.update(camera is None or camera.visible(target.x, target.width), level.field)
+
+def predict_trajectory(x, y, vel_x, vel_y, steps, field=None):
+    """
+    照準中の予測軌道の点のリストを返す（跳ね返りは考えない）
+    field: レベルの力場。あれば Projectile.update と同じ順番で1フレームずつ積分する
+    """
+    if field is None:
+        # Simple physics prediction
+        return [(x + vel_x * t, y + vel_y * t + 0.5 * GRAVITY * t * t) for t in range(1, steps + 1)]
+    points = []
+    for _ in range(steps):
+        vel_y += GRAVITY
+        force_x, force_y = field.sample(x, y)
+        vel_x = (vel_x + force_x) * FRICTION
+        vel_y = (vel_y + force_y) * FRICTION
+        x += vel_x
+        y += vel_y
+        points.append((x, y))
+    return points
+
+def projectile_out_of_play(projectile, world_width=WIDTH):
+    return projectile.stopped or projectile.x < 0 or projectile.x > world_width or projectile.y > HEIGHT
+
+# ゲーム状態のバイナリスナップショット（巻き戻しとクイックセーブ用）
+snapshot_codec = SnapshotCodec(Level, Projectile, Target, Obstacle)
+
+class Game:
+    def __init__(self, asset_budget=64 * 1024 * 1024):
+        # アセットの読み込み（最初のレベルは難易度選択中に先読みする）
+        self.assets = AssetManager(ASSETS_DIR, memory_budget=asset_budget)
+        self.assets.prefetch(level_assets(1))
+        
+        # 難易度の初期設定
+        self.current_difficulty = DIFFICULTY_NORMAL
+        
+        # 物理パラメータの設定
+        apply_difficulty_physics(self.current_difficulty)
+        
+        # Initialize game objects
+        self.slingshot = Slingshot(100, HEIGHT - 100)
+        self.current_level = Level(1, self.current_difficulty)
+        self.projectile = self.new_projectile()
+        self.projectile_count = self.current_level.projectile_count
+        
+        self.game_state = DIFFICULTY_SELECT  # 最初は難易度選択画面から始める
+        self.dragging = False
+        self.next_shot_timer = 0  # 次の弾のタイマーを追加
+        
+        # 画面より広いレベル用の横スクロールカメラ
+        self.camera = Camera(WIDTH)
+        self.last_update_ticks = pygame.time.get_ticks()  # カメラを経過時間で動かすため
+        
+        # フレームごとのスナップショット（飛行中と次の弾待ちの間だけ記録する）
+        self.history = SnapshotRing(snapshot_codec, frames=900)
+        self.shot_start_frame = None  # 最後に撃った直前のフレーム
+        
+        # レベルエディットモード（レベル定義ファイルの変更を監視）
+        self.level_watcher = None
+        
+        # 事前計算したショット結果テーブル（shot_table.py で作成、なければヒント表示なし）
+        self.shot_table = None
+        self.shot_table_key = None
+        self.show_heatmap = False
     
-    game_state = DIFFICULTY_SELECT  # 最初は難易度選択画面から始める
-    dragging = False
-    next_shot_timer = 0  # 次の弾のタイマーを追加
+    def new_projectile(self):
+        return Projectile(self.slingshot.x, self.slingshot.y - self.slingshot.height//2)
     
     # Function to restart the game
-    def restart_game():
-        nonlocal current_level, projectile, projectile_count, game_state
-        current_level = Level(1, current_difficulty)
-        projectile = Projectile(slingshot.x, slingshot.y - slingshot.height//2)
-        projectile_count = current_level.projectile_count
-        game_state = AIMING
+    def restart_game(self):
+        self.current_level = Level(1, self.current_difficulty)
+        self.projectile = self.new_projectile()
+        self.projectile_count = self.current_level.projectile_count
+        self.game_state = AIMING
         print("Game restarted")  # デバッグ用
     
     # Function to set next projectile
-    def set_next_projectile():
-        nonlocal projectile, game_state
-        projectile = Projectile(slingshot.x, slingshot.y - slingshot.height//2)
-        game_state = AIMING
+    def set_next_projectile(self):
+        self.projectile = self.new_projectile()
+        self.game_state = AIMING
         print("New projectile set")  # デバッグ用
     
     # Function to apply difficulty settings
-    def apply_difficulty_settings():
-        nonlocal current_level, projectile, projectile_count, game_state
-        global GRAVITY, FRICTION, ELASTICITY
-        
+    def apply_difficulty_settings(self):
         # 物理パラメータの更新
-        GRAVITY = DIFFICULTY_PARAMS[current_difficulty]["gravity"]
-        FRICTION = DIFFICULTY_PARAMS[current_difficulty]["friction"]
-        ELASTICITY = DIFFICULTY_PARAMS[current_difficulty]["elasticity"]
+        apply_difficulty_physics(self.current_difficulty)
         
         # レベルとプロジェクタイルの再初期化
-        current_level = Level(1, current_difficulty)
-        projectile = Projectile(slingshot.x, slingshot.y - slingshot.height//2)
-        projectile_count = current_level.projectile_count
-        game_state = AIMING
+        self.current_level = Level(1, self.current_difficulty)
+        self.projectile = self.new_projectile()
+        self.projectile_count = self.current_level.projectile_count
+        self.game_state = AIMING
     
-    # Game loop
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            
-            if event.type == pygame.KEYDOWN:
-                print(f"Key pressed: {pygame.key.name(event.key)}, Game state: {game_state}")  # デバッグ用
-                if event.key == pygame.K_r:  # Restart game when 'R' is pressed
-                    restart_game()
-                elif event.key == pygame.K_SPACE:  # スペースキーはどの状態でも次の弾を準備
-                    if game_state == WAITING_FOR_NEXT_SHOT or game_state == PROJECTILE_IN_MOTION:
-                        if projectile_count > 0:
-                            set_next_projectile()
-                            print("Space pressed: New projectile set")  # デバッグ用
-                # 難易度選択のキーボードショートカット
-                elif event.key == pygame.K_1 and game_state == DIFFICULTY_SELECT:
-                    current_difficulty = DIFFICULTY_EASY
-                elif event.key == pygame.K_2 and game_state == DIFFICULTY_SELECT:
-                    current_difficulty = DIFFICULTY_NORMAL
-                elif event.key == pygame.K_3 and game_state == DIFFICULTY_SELECT:
-                    current_difficulty = DIFFICULTY_HARD
-                elif event.key == pygame.K_RETURN and game_state == DIFFICULTY_SELECT:
-                    apply_difficulty_settings()
+    def launch(self, angle, power):
+        # 発射直前の状態を記録しておく（巻き戻し用）
+        self.shot_start_frame = self.history.record(self, pygame.time.get_ticks())
+        
+        # Launch projectile
+        launch_projectile(self.projectile, angle, power)
+        self.projectile_count -= 1
+        self.game_state = PROJECTILE_IN_MOTION
+    
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            print(f"Key pressed: {pygame.key.name(event.key)}, Game state: {self.game_state}")  # デバッグ用
+            if event.key == pygame.K_r:  # Restart game when 'R' is pressed
+                self.restart_game()
+            elif event.key == pygame.K_SPACE:  # スペースキーはどの状態でも次の弾を準備
+                if self.game_state == WAITING_FOR_NEXT_SHOT or self.game_state == PROJECTILE_IN_MOTION:
+                    if self.projectile_count > 0:
+                        self.set_next_projectile()
+                        print("Space pressed: New projectile set")  # デバッグ用
+            # 難易度選択のキーボードショートカット
+            elif event.key == pygame.K_1 and self.game_state == DIFFICULTY_SELECT:
+                self.current_difficulty = DIFFICULTY_EASY
+            elif event.key == pygame.K_2 and self.game_state == DIFFICULTY_SELECT:
+                self.current_difficulty = DIFFICULTY_NORMAL
+            elif event.key == pygame.K_3 and self.game_state == DIFFICULTY_SELECT:
+                self.current_difficulty = DIFFICULTY_HARD
+            elif event.key == pygame.K_RETURN and self.game_state == DIFFICULTY_SELECT:
+                self.apply_difficulty_settings()
+            # 巻き戻しとクイックセーブ/ロード
+            elif event.key == pygame.K_BACKSPACE and self.game_state != DIFFICULTY_SELECT:
+                self.rewind_last_shot()
+            elif event.key == pygame.K_F5 and self.game_state != DIFFICULTY_SELECT:
+                self.quick_save()
+            elif event.key == pygame.K_F9:
+                self.quick_load()
+            elif event.key == pygame.K_h and self.game_state != DIFFICULTY_SELECT:
+                # 到達可能範囲のヒートマップ表示を切り替え
+                self.show_heatmap = not self.show_heatmap
+        
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            # ゲームオブジェクトとの判定はワールド座標で行う（UIのボタンは画面座標のまま）
+            mouse_x, mouse_y = self.camera.to_world(*event.pos)
             
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                
-                if game_state == DIFFICULTY_SELECT:
-                    # 難易度選択ボタンのクリック判定
-                    button_width, button_height = 200, 50
-                    button_margin = 20
-                    button_y = HEIGHT//2 - button_height//2
-                    
-                    for i in range(3):  # 3つの難易度
-                        button_x = WIDTH//2 - button_width//2
-                        button_y_offset = button_y + i * (button_height + button_margin)
-                        
-                        # ボタン領域内のクリックをチェック
-                        if (button_x <= mouse_x <= button_x + button_width and 
-                            button_y_offset <= mouse_y <= button_y_offset + button_height):
-                            current_difficulty = i
-                            apply_difficulty_settings()
-                            break
-                
-                elif game_state == AIMING and not projectile.launched:
-                    # Check if clicked near the projectile
-                    if math.sqrt((mouse_x - projectile.x)**2 + (mouse_y - projectile.y)**2) < 50:
-                        dragging = True
-                elif game_state == LEVEL_COMPLETE:
-                    # Go to next level
-                    current_level = Level(current_level.level_number + 1, current_difficulty)
-                    projectile = Projectile(slingshot.x, slingshot.y - slingshot.height//2)
-                    projectile_count = current_level.projectile_count
-                    game_state = AIMING
-                elif game_state == GAME_OVER:
-                    # Restart game
-                    restart_game()
+            if self.game_state == DIFFICULTY_SELECT:
+                # 難易度選択ボタンのクリック判定（描画と同じボタン領域を使う）
+                clicked = ui_layer.hovered_button(event.pos)
+                if clicked is not None:
+                    self.current_difficulty = clicked
+                    self.apply_difficulty_settings()
             
-            if event.type == pygame.MOUSEBUTTONUP and dragging:
-                dragging = False
-                # Launch projectile
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                power_factor = DIFFICULTY_PARAMS[current_difficulty]["power_factor"]
-                power = min(30, math.sqrt((mouse_x - slingshot.x)**2 + (mouse_y - (slingshot.y - slingshot.height//2))**2) / power_factor)
-                angle = math.atan2((slingshot.y - slingshot.height//2) - mouse_y, slingshot.x - mouse_x)
-                
-                projectile.vel_x = math.cos(angle) * power
-                projectile.vel_y = math.sin(angle) * power
-                projectile.launched = True
-                projectile_count -= 1
-                game_state = PROJECTILE_IN_MOTION
+            elif self.game_state == AIMING and not self.projectile.launched:
+                # Check if clicked near the projectile
+                if math.sqrt((mouse_x - self.projectile.x)**2 + (mouse_y - self.projectile.y)**2) < 50:
+                    self.dragging = True
+            elif self.game_state == LEVEL_COMPLETE:
+                # Go to next level
+                self.current_level = Level(self.current_level.level_number + 1, self.current_difficulty)
+                self.projectile = self.new_projectile()
+                self.projectile_count = self.current_level.projectile_count
+                self.game_state = AIMING
+            elif self.game_state == GAME_OVER:
+                # Restart game
+                self.restart_game()
+        
+        if event.type == pygame.MOUSEBUTTONUP and self.dragging:
+            self.dragging = False
+            mouse_x, mouse_y = self.camera.to_world(*event.pos)
+            angle, power = launch_parameters(self.slingshot.x, self.slingshot.y - self.slingshot.height//2,
+                                             mouse_x, mouse_y, self.current_difficulty)
+            self.launch(angle, power)
+    
+    def enable_level_editing(self):
+        self.level_watcher = FileWatcher(LEVELS_DIR, ".json")
+        print(f"Level edit mode: watching {LEVELS_DIR}")  # デバッグ用
+    
+    def reload_level_files(self):
+        # 変更されたレベル定義を読み直し、現在のレベルなら変更箇所だけ作り直す
+        # （難易度・弾の状態・照準などのセッションはそのまま維持する）
+        for path in self.level_watcher.poll():
+            level_number = level_number_from_path(path)
+            if level_number is None:
+                continue
+            start = time.perf_counter()
+            # 壊れた定義は読み込みも適用もせず、元のレベルのままプレイを続ける
+            try:
+                definition = read_level_definition(level_number)
+                if level_number == self.current_level.level_number:
+                    rebuilt = self.current_level.apply_definition(definition)
+                else:
+                    self.current_level.resolve_definition(definition)  # 検証だけ
+                    rebuilt = None
+            except Exception as e:
+                print(f"Level {level_number} reload failed, keeping the old definition: {e!r}")  # デバッグ用
+                continue
+            _level_definitions[level_number] = definition
+            if rebuilt is not None:
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"Level {level_number} reloaded: {rebuilt} object(s) rebuilt in {elapsed:.2f} ms")  # デバッグ用
+    
+    def refresh_shot_table(self):
+        # レベル・難易度・レベル定義が変わったらテーブルを開き直す
+        # （古いテーブルは描画中のスナップショットが参照しているかもしれないので閉じずにGCに任せる）
+        level = self.current_level
+        key = (level.level_number, level.difficulty, level.revision)
+        if key != self.shot_table_key:
+            self.shot_table_key = key
+            self.shot_table = ShotTable.open(
+                table_path(TABLES_DIR, level.level_number, level.difficulty),
+                expected_crc=definition_crc(load_level_definition(level.level_number))
+            )
+    
+    def update(self, mouse_pos):
+        if self.level_watcher is not None:
+            self.reload_level_files()
+        self.refresh_shot_table()
         
         # Update game objects
-        if game_state == AIMING and dragging and not projectile.launched:
-            mouse_x, mouse_y = pygame.mouse.get_pos()
-            # Limit the drag distance
-            max_drag = 150  # ドラッグ距離を増加
-            dx = slingshot.x - mouse_x
-            dy = (slingshot.y - slingshot.height//2) - mouse_y
-            distance = math.sqrt(dx*dx + dy*dy)
-            
-            if distance > max_drag:
-                scale = max_drag / distance
-                mouse_x = slingshot.x - dx * scale
-                mouse_y = (slingshot.y - slingshot.height//2) - dy * scale
-            
-            projectile.x = mouse_x
-            projectile.y = mouse_y
-        elif game_state == PROJECTILE_IN_MOTION:
-            projectile.update()
-            
-            # Check for collisions with obstacles
-            for obstacle in current_level.obstacles:
-                obstacle.check_collision(projectile)
-            
-            # Check for collisions with targets
-            for target in current_level.targets:
-                target.check_collision(projectile)
-                target.update()
+        if self.game_state == AIMING and self.dragging and not self.projectile.launched:
+            self.projectile.x, self.projectile.y = drag_position(self.slingshot, *self.camera.to_world(*mouse_pos))
+        elif self.game_state == PROJECTILE_IN_MOTION:
+            step_shot(self.current_level, self.projectile, self.camera)
             
             # Check if level is complete
-            if current_level.is_complete():
-                game_state = LEVEL_COMPLETE
+            if self.current_level.is_complete():
+                self.game_state = LEVEL_COMPLETE
+                # クリア画面の間に次のレベルのアセットを先読み
+                self.assets.prefetch(level_assets(self.current_level.level_number + 1))
             
             # Check if projectile has stopped
-            if projectile.stopped or projectile.x < 0 or projectile.x > WIDTH or projectile.y > HEIGHT:
-                print(f"Projectile state: stopped={projectile.stopped}, x={projectile.x}, y={projectile.y}")  # デバッグ用
-                if projectile_count > 0:
+            if projectile_out_of_play(self.projectile, self.current_level.width):
+                print(f"Projectile state: stopped={self.projectile.stopped}, x={self.projectile.x}, y={self.projectile.y}")  # デバッグ用
+                if self.projectile_count > 0:
                     # Reset for next shot - 次の弾への切り替えを開始
-                    game_state = WAITING_FOR_NEXT_SHOT
-                    next_shot_timer = pygame.time.get_ticks() + 1000  # 現在時刻 + 1000ミリ秒
-                    print(f"Waiting for next shot, timer set to {next_shot_timer}")  # デバッグ用
+                    self.game_state = WAITING_FOR_NEXT_SHOT
+                    self.next_shot_timer = pygame.time.get_ticks() + 1000  # 現在時刻 + 1000ミリ秒
+                    print(f"Waiting for next shot, timer set to {self.next_shot_timer}")  # デバッグ用
                 else:
                     # Check if all targets are hit
-                    if not current_level.is_complete():
-                        game_state = GAME_OVER
-        elif game_state == WAITING_FOR_NEXT_SHOT:
+                    if not self.current_level.is_complete():
+                        self.game_state = GAME_OVER
+        elif self.game_state == WAITING_FOR_NEXT_SHOT:
             # 次の弾への切り替えタイマーをチェック
             current_time = pygame.time.get_ticks()
-            if current_time >= next_shot_timer:
-                set_next_projectile()
+            if current_time >= self.next_shot_timer:
+                self.set_next_projectile()
                 print(f"Timer expired at {current_time}, new projectile set")  # デバッグ用
         
-        # Draw everything
-        draw_background(screen)
+        # 飛んでいる弾（照準中はスリングショット）をカメラで追う
+        now = pygame.time.get_ticks()
+        dt = (now - self.last_update_ticks) / 1000
+        self.last_update_ticks = now
+        if self.game_state == AIMING:
+            self.camera.follow(self.slingshot.x, self.current_level.width, dt)
+        elif self.game_state != DIFFICULTY_SELECT:
+            self.camera.follow(self.projectile.x, self.current_level.width, dt)
         
-        if game_state != DIFFICULTY_SELECT:
-            # Draw slingshot
-            slingshot.draw(screen, projectile if game_state == AIMING and not projectile.launched else None)
-            
-            # Draw level objects
-            current_level.draw(screen)
-            
-            # Draw projectile
-            projectile.draw(screen)
+        if self.game_state == PROJECTILE_IN_MOTION or self.game_state == WAITING_FOR_NEXT_SHOT:
+            self.history.record(self, pygame.time.get_ticks())
+    
+    def restore_snapshot(self, view):
+        snapshot_codec.restore(view, 0, self, pygame.time.get_ticks())
+        apply_difficulty_physics(self.current_level.difficulty)
+        self.dragging = False
+    
+    def rewind_last_shot(self):
+        # 最後の発射直前の状態に戻す
+        view = self.history.view(self.shot_start_frame) if self.shot_start_frame is not None else None
+        if view is None:
+            print("Nothing to rewind")  # デバッグ用
+            return
+        self.restore_snapshot(view)
+        self.shot_start_frame = None
+        print("Rewound last shot")  # デバッグ用
+    
+    def quick_save(self, path=QUICKSAVE_PATH):
+        codec = snapshot_codec.for_level(self.current_level)
+        buffer = bytearray(codec.size)
+        codec.pack_into(buffer, 0, self, pygame.time.get_ticks())
+        save_snapshot(path, buffer)
+        print(f"Quick saved to {path}")  # デバッグ用
+    
+    def quick_load(self, path=QUICKSAVE_PATH):
+        try:
+            data = load_snapshot(path)
+        except (OSError, ValueError) as e:
+            print(f"Quick load failed: {e}")  # デバッグ用
+            return
+        self.restore_snapshot(data)
+        print(f"Quick loaded from {path}")  # デバッグ用
+    
+    def snapshot(self):
+        # 描画スレッドに渡すスナップショット（描画に必要な状態だけをコピー）
+        return GameSnapshot(
+            slingshot=self.slingshot,
+            current_level=self.current_level.snapshot(),
+            projectile=self.projectile.snapshot(),
+            projectile_count=self.projectile_count,
+            game_state=self.game_state,
+            current_difficulty=self.current_difficulty,
+            dragging=self.dragging,
+            shot_table=self.shot_table,
+            show_heatmap=self.show_heatmap,
+            next_shot_timer=self.next_shot_timer,
+            camera=copy.copy(self.camera),
+            assets=self.assets
+        )
+
+class GameSnapshot:
+    """
+    ある時点のゲーム状態の読み取り専用コピー
+    パイプラインモードではシミュレーションスレッドが作成し、描画スレッドが描画する
+    """
+    __slots__ = ("slingshot", "current_level", "projectile", "projectile_count",
+                 "game_state", "current_difficulty", "dragging", "shot_table", "show_heatmap", "next_shot_timer",
+                 "camera", "assets")
+    
+    def __init__(self, slingshot, current_level, projectile, projectile_count,
+                 game_state, current_difficulty, dragging, shot_table, show_heatmap, next_shot_timer, camera,
+                 assets):
+        self.slingshot = slingshot
+        self.current_level = current_level
+        self.projectile = projectile
+        self.projectile_count = projectile_count
+        self.game_state = game_state
+        self.current_difficulty = current_difficulty
+        self.dragging = dragging
+        self.shot_table = shot_table
+        self.show_heatmap = show_heatmap
+        self.next_shot_timer = next_shot_timer
+        self.camera = camera
+        self.assets = assets  # AssetManager（スレッドセーフなので描画スレッドから読んでよい）
+
+# ヒートマップのキャッシュ（テーブルごとに一度だけ描画する）
+heatmap_sprites = SpriteCache(max_entries=8)
+
+def render_reachability_heatmap(table, anchor_x, anchor_y, difficulty, max_drag=150, cell=5):
+    # ドラッグ位置ごとに何個の標的に当たるかを色で表したサーフェス
+    heatmap = pygame.Surface((max_drag*2, max_drag*2), pygame.SRCALPHA)
+    total = max(1, table.target_count)
+    for dy in range(-max_drag, max_drag, cell):
+        for dx in range(-max_drag, max_drag, cell):
+            if dx*dx + dy*dy > max_drag*max_drag:
+                continue
+            angle, power = launch_parameters(anchor_x, anchor_y, anchor_x + dx, anchor_y + dy, difficulty)
+            hits = table.lookup(angle, power)[0]
+            if hits:
+                ratio = hits / total
+                color = (int(255 * (1 - ratio)), int(200 * ratio + 55), 0, 90 + int(90 * ratio))
+                heatmap.fill(color, (dx + max_drag, dy + max_drag, cell, cell))
+    return heatmap
+
+def draw_reachability_heatmap(screen, state):
+    slingshot = state.slingshot
+    table = state.shot_table
+    anchor_x, anchor_y = slingshot.x, slingshot.y - slingshot.height//2
+    offset_x = state.camera.offset
+    heatmap = heatmap_sprites.get(
+        (table.path, table.definition_crc, state.current_difficulty),
+        lambda: render_reachability_heatmap(table, anchor_x, anchor_y, state.current_difficulty)
+    )
+    screen.blit(heatmap, (anchor_x - offset_x - heatmap.get_width()//2, anchor_y - heatmap.get_height()//2))
+
+def draw_shot_hint(screen, state, projectile, angle, power):
+    # テーブルから引いたショット結果を弾の横に表示
+    hits = state.shot_table.lookup(angle, power)[0]
+    total = state.shot_table.target_count
+    hint = ui_layer.parts.get(
+        ("shot_hint", hits, total),
+        lambda: ui_layer.get_fonts()["info"].render(f"Hits: {hits}/{total}", True, WHITE if hits else GRAY)
+    )
+    screen.blit(hint, (projectile.x - state.camera.offset + 20, projectile.y - 30))
+
+def draw_game(screen, state, sample_mouse=None):
+    """
+    Game または GameSnapshot を描画する
+    sample_mouse: マウス位置（画面座標）を返す関数 (例: pygame.mouse.get_pos)。指定すると、ドラッグ中は
+      照準の要素を描く直前にマウスを読み直す（フレームの最初に読んだ位置より新しい位置を表示できる）
+    """
+    slingshot = state.slingshot
+    projectile = state.projectile
+    game_state = state.game_state
+    camera = state.camera
+    aiming = game_state == AIMING and state.dragging and not projectile.launched
+    
+    # Draw everything (先読みした背景画像があれば使う。読み込み中や失敗したときは空と遠景を描く)
+    background = state.current_level.background
+    draw_background(screen, camera, state.assets.get(background) if background is not None else None)
+    
+    if game_state != DIFFICULTY_SELECT:
+        # Draw slingshot (ドラッグ中のバンドは照準と一緒に最後に描く)
+        if aiming:
+            slingshot.draw_base(screen, camera)
+        else:
+            slingshot.draw(screen, projectile if game_state == AIMING and not projectile.launched else None, camera)
         
-        # Draw UI
-        draw_ui(screen, current_level, projectile_count, game_state, current_difficulty)
+        # Draw level objects
+        state.current_level.draw(screen, camera)
         
-        # Draw aiming line
-        if game_state == AIMING and dragging and not projectile.launched:
-            pygame.draw.line(screen, BLACK, (slingshot.x, slingshot.y - slingshot.height//2), 
-                            (projectile.x, projectile.y), 2)
+        # 到達可能範囲のヒートマップ
+        if state.show_heatmap and game_state == AIMING and state.shot_table is not None:
+            draw_reachability_heatmap(screen, state)
+        
+        # Draw projectile
+        if not aiming:
+            projectile.draw(screen, camera)
+    
+    # Draw UI
+    draw_ui(screen, state.current_level, state.projectile_count, game_state, state.current_difficulty)
+    
+    if aiming:
+        if sample_mouse is not None:
+            # 遅延ラッチ: 重い描画が終わった後でマウスを読み直し、その位置に照準を描く
+            projectile = copy.copy(projectile)
+            projectile.x, projectile.y = drag_position(slingshot, *camera.to_world(*sample_mouse()))
+        draw_aim(screen, state, projectile)
+
+def draw_aim(screen, state, projectile):
+    # ドラッグ中のバンド、弾、照準線、予測軌道（入力に追従する要素なので最後に描く）
+    slingshot = state.slingshot
+    offset_x = state.camera.offset
+    slingshot.draw_band(screen, projectile, state.camera)
+    projectile.draw(screen, state.camera)
+    
+    # Draw aiming line
+    pygame.draw.line(screen, BLACK, (slingshot.x - offset_x, slingshot.y - slingshot.height//2), 
+                    (projectile.x - offset_x, projectile.y), 2)
+    
+    # Draw projected trajectory (simple prediction)
+    angle, power = launch_parameters(slingshot.x, slingshot.y - slingshot.height//2,
+                                     projectile.x, projectile.y, state.current_difficulty)
+    vel_x = math.cos(angle) * power
+    vel_y = math.sin(angle) * power
+    
+    # 事前計算したテーブルがあれば結果を表示
+    if state.shot_table is not None:
+        draw_shot_hint(screen, state, projectile, angle, power)
+    
+    # Draw trajectory dots (力場のあるレベルでは同じ力場で予測する)
+    trajectory = predict_trajectory(projectile.x, projectile.y, vel_x, vel_y, 29,  # 予測軌道を長くする (20→30)
+                                    state.current_level.field)
+    for t, (pred_x, pred_y) in enumerate(trajectory, 1):
+        # Stop if prediction goes off screen (レベルの端か画面の外まで)
+        if pred_x < 0 or pred_x > state.current_level.width or pred_y < 0 or pred_y > HEIGHT \
+                or pred_x - offset_x > WIDTH:
+            break
+        
+        # Draw prediction dot
+        alpha = 255 - t * 8  # 透明度の減少を緩やかに (10→8)
+        if alpha > 0:
+            blit_alpha_circle(screen, (200, 200, 200, alpha), 3, (pred_x - offset_x - 3, pred_y - 3))
+
+# 静的な画面ではイベントを待って眠り、雲などの動きのために低いレートでだけ描画する
+IDLE_STATES = (DIFFICULTY_SELECT, LEVEL_COMPLETE, GAME_OVER, WAITING_FOR_NEXT_SHOT)
+IDLE_FPS = 10
+
+def idle_timeout(state):
+    """
+    静的な画面なら次の描画までイベントを待つ時間 (ms) を返す。動きがある場合は None
+    state: Game または GameSnapshot
+    """
+    if state.game_state not in IDLE_STATES or state.dragging or state.camera.moving:
+        # カメラがスクロールしている間も通常のフレームレートで描画する
+        return None
+    timeout = 1000 // IDLE_FPS
+    if state.game_state == WAITING_FOR_NEXT_SHOT:
+        # 次の弾の準備が遅れないように、タイマーが切れる時刻までしか待たない
+        timeout = min(timeout, max(0, state.next_shot_timer - pygame.time.get_ticks()))
+    return timeout
+
+def wait_for_events(state):
+    # 静的な画面では入力が来るか次の描画時刻まで眠る。それ以外は溜まったイベントをそのまま返す
+    # （pygame.event.wait(0) は無期限に待つので、待ち時間が残っていないときも待たない）
+    timeout = idle_timeout(state)
+    if timeout is None or timeout <= 0 or pygame.event.peek():
+        return pygame.event.get()
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+def run_pipelined(game, clock, capture=None):
+    # シミュレーションを別スレッドで動かし、メインスレッドは入力と描画を担当する
+    # （pygameのイベント処理とディスプレイ更新はメインスレッドで行う必要がある）
+    buffer = SnapshotBuffer(slots=3)
+    last_mouse_pos = [pygame.mouse.get_pos()]
+    
+    def step(batches):
+        for events, mouse_pos in batches:
+            for event in events:
+                game.handle_event(event)
+            last_mouse_pos[0] = mouse_pos
+        game.update(last_mouse_pos[0])
+        return game.snapshot()
+    
+    def idle_interval(snapshot):
+        # 静的な画面ではシミュレーションも入力が来るまで（最大で次の描画時刻まで）眠らせる
+        timeout = idle_timeout(snapshot)
+        return None if timeout is None else timeout / 1000
+    
+    buffer.publish(game.snapshot())
+    simulation = SimulationThread(step, buffer, tick_rate=60, idle_interval=idle_interval)
+    simulation.start()
+    
+    running = True
+    try:
+        while running:
+            events = []
+            for event in wait_for_events(buffer.latest()[0]):
+                if event.type == pygame.QUIT:
+                    running = False
+                else:
+                    events.append(event)
+            simulation.submit(events, pygame.mouse.get_pos())
             
-            # Draw projected trajectory (simple prediction)
-            power_factor = DIFFICULTY_PARAMS[current_difficulty]["power_factor"]
-            power = min(30, math.sqrt((projectile.x - slingshot.x)**2 + (projectile.y - (slingshot.y - slingshot.height//2))**2) / power_factor)
-            angle = math.atan2((slingshot.y - slingshot.height//2) - projectile.y, slingshot.x - projectile.x)
-            vel_x = math.cos(angle) * power
-            vel_y = math.sin(angle) * power
+            if simulation.error is not None:
+                raise simulation.error
             
-            # Draw trajectory dots
-            for t in range(1, 30):  # 予測軌道を長くする (20→30)
-                # Simple physics prediction (not accounting for bounces)
-                pred_x = projectile.x + vel_x * t
-                pred_y = projectile.y + vel_y * t + 0.5 * GRAVITY * t * t
-                
-                # Stop if prediction goes off screen
-                if pred_x < 0 or pred_x > WIDTH or pred_y < 0 or pred_y > HEIGHT:
-                    break
-                
-                # Draw prediction dot
-                alpha = 255 - t * 8  # 透明度の減少を緩やかに (10→8)
-                if alpha > 0:
-                    dot_surface = pygame.Surface((6, 6), pygame.SRCALPHA)
-                    pygame.draw.circle(dot_surface, (200, 200, 200, alpha), (3, 3), 3)
-                    screen.blit(dot_surface, (pred_x - 3, pred_y - 3))
-        
-        pygame.display.flip()
-        clock.tick(60)
+            snapshot, _ = buffer.latest()
+            # 照準はシミュレーションスレッドを待たずに、描画の直前のマウス位置で描く
+            draw_game(screen, snapshot, pygame.mouse.get_pos)
+            if capture is not None:
+                capture.capture(screen)
+            pygame.display.flip()
+            clock.tick(60)
+    finally:
+        simulation.stop()
+        simulation.join()
+
+def main(pipelined=False, asset_budget_mb=64, edit_levels=False, capture_dir=None, capture_format="png",
+         capture_every=1):
+    init_display()
+    clock = pygame.time.Clock()
+    game = Game(asset_budget=asset_budget_mb * 1024 * 1024)
+    if edit_levels:
+        game.enable_level_editing()
+    
+    # ゲームプレイの録画（ピクセルのコピーだけ行い、エンコードはワーカープロセスで）
+    capture = None
+    if capture_dir is not None:
+        capture = FrameCapture(screen, capture_dir, capture_format, every=capture_every)
+    
+    if pipelined:
+        run_pipelined(game, clock, capture)
+    else:
+        # Game loop
+        running = True
+        while running:
+            for event in wait_for_events(game):
+                if event.type == pygame.QUIT:
+                    running = False
+                else:
+                    game.handle_event(event)
+            
+            game.update(pygame.mouse.get_pos())
+            draw_game(screen, game, pygame.mouse.get_pos)
+            if capture is not None:
+                capture.capture(screen)
+            
+            pygame.display.flip()
+            clock.tick(60)
     
+    if capture is not None:
+        capture.close()
+    game.assets.shutdown()
     pygame.quit()
     sys.exit()
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Slingshot Physics Game")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="run the simulation on its own thread and render the newest snapshot")
+    parser.add_argument("--asset-budget-mb", type=int, default=64,
+                        help="memory budget for cached image and sound assets")
+    parser.add_argument("--edit-levels", action="store_true",
+                        help="watch the level files and hot-reload changes into the running game")
+    parser.add_argument("--capture", metavar="DIR",
+                        help="record gameplay frames to DIR (encoded by worker processes)")
+    parser.add_argument("--capture-format", choices=["png", "gif"], default="png",
+                        help="png sequence, or an animated gif (needs Pillow)")
+    parser.add_argument("--capture-every", type=int, default=1, help="capture every Nth frame")
+    args = parser.parse_args()
+    main(pipelined=args.pipelined, asset_budget_mb=args.asset_budget_mb, edit_levels=args.edit_levels,
+         capture_dir=args.capture, capture_format=args.capture_format, capture_every=args.capture_every)
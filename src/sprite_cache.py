@@ -0,0 +1,45 @@
+from collections import OrderedDict
+
+# ヘルパークラス: 事前描画したスプライトのキャッシュ
+class SpriteCache:
+    """
+    キーごとに事前描画したサーフェスを保持するLRUキャッシュ
+    max_entries: 保持するスプライトの最大数（超えたら最も古いものを破棄）
+    """
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, render):
+        """
+        キャッシュ済みのスプライトを返す。なければ render() で作成して登録する
+        key: スプライトを識別するハッシュ可能な値 (例: (radius, color))
+        render: スプライトを作成する引数なしの関数
+        """
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = render()
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_entries:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def invalidate(self, key=None):
+        """
+        スプライトを破棄する
+        key: 破棄するキー (Noneなら全て破棄)
+        """
+        if key is None:
+            self._sprites.clear()
+        else:
+            self._sprites.pop(key, None)
+
+    def __len__(self):
+        return len(self._sprites)
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import hashlib
+import math
+import struct
+import time
+import pygame
+import slingshot_game as game
+from netplay import LockstepPeer, DEFAULT_HOST, DEFAULT_PORT
+from camera import Camera
+
+FRAME_TIME = 1.0 / 60
+MAX_CATCHUP_FRAMES = 5  # 1回の描画で進める最大フレーム数
+
+# 状態ハッシュ用のレイアウト
+PROJECTILE_STATE = struct.Struct("<?4d??")
+TARGET_STATE = struct.Struct("<?")
+PLAYER_STATE = struct.Struct("<ii")
+
+class VersusSimulation:
+    """
+    2人で同じレベルを撃つ決定論的なシミュレーション
+    入力は発射（プレイヤー、角度、パワー）だけで、同じ入力列なら全てのピアで同じ結果になる
+    turn_based: Trueなら交互に撃つ。Falseなら自分の弾が飛んでいなければいつでも撃てる
+    """
+    def __init__(self, level_number, difficulty, players=2, turn_based=True):
+        game.apply_difficulty_physics(difficulty)
+        self.difficulty = difficulty
+        self.slingshot = game.Slingshot(100, game.HEIGHT - 100)
+        self.level = game.Level(level_number, difficulty)
+        self.turn_based = turn_based
+        self.turn = 0
+        self.frame = 0
+        self.projectiles = [None] * players
+        self.shots_left = [self.level.projectile_count] * players
+        self.scores = [0] * players
+
+    def anchor(self):
+        return self.slingshot.x, self.slingshot.y - self.slingshot.height//2
+
+    def can_launch(self, player):
+        if self.shots_left[player] <= 0 or self.projectiles[player] is not None:
+            return False
+        return not self.turn_based or self.turn == player
+
+    def is_over(self):
+        if self.level.is_complete():
+            return True
+        return all(count == 0 for count in self.shots_left) and all(p is None for p in self.projectiles)
+
+    def step(self, inputs):
+        # 入力は全ピアで同じ順序になるようにプレイヤー順に適用する
+        for player, angle, power in inputs:
+            if not self.can_launch(player):
+                continue
+            projectile = game.Projectile(*self.anchor())
+            game.launch_projectile(projectile, angle, power)
+            self.projectiles[player] = projectile
+            self.shots_left[player] -= 1
+
+        for player, projectile in enumerate(self.projectiles):
+            if projectile is None:
+                continue
+            projectile.update(self.level.width, self.level.field)
+            for obstacle in self.level.obstacles:
+                obstacle.check_collision(projectile)
+            for target in self.level.targets:
+                if target.check_collision(projectile):
+                    self.scores[player] += 1
+            if game.projectile_out_of_play(projectile, self.level.width):
+                self.projectiles[player] = None
+                if self.turn_based and self.turn == player:
+                    self.turn = (player + 1) % len(self.projectiles)
+
+        for target in self.level.targets:
+            target.update(field=self.level.field)
+        self.frame += 1
+
+    def state_hash(self):
+        # 物理状態だけをハッシュする（パーティクルやまばたきは見た目だけなので含めない）
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(struct.pack("<ii", self.frame, self.turn))
+        for projectile in self.projectiles:
+            if projectile is None:
+                digest.update(PROJECTILE_STATE.pack(False, 0.0, 0.0, 0.0, 0.0, False, False))
+            else:
+                digest.update(PROJECTILE_STATE.pack(True, projectile.x, projectile.y,
+                                                    projectile.vel_x, projectile.vel_y,
+                                                    projectile.launched, projectile.stopped))
+        for target in self.level.targets:
+            digest.update(TARGET_STATE.pack(target.hit))
+        for shots_left, score in zip(self.shots_left, self.scores):
+            digest.update(PLAYER_STATE.pack(shots_left, score))
+        return int.from_bytes(digest.digest(), "little")
+
+def follow_target(simulation, peer):
+    # カメラで追う位置: 自分の弾、なければ相手の弾、どちらも飛んでいなければスリングショット
+    local = simulation.projectiles[peer.player]
+    if local is not None:
+        return local.x
+    for projectile in simulation.projectiles:
+        if projectile is not None:
+            return projectile.x
+    return simulation.slingshot.x
+
+def draw_versus(screen, simulation, peer, aim_pos, font, camera):
+    # aim_pos: 照準中のマウス位置（画面座標）
+    game.draw_background(screen, camera)
+    simulation.slingshot.draw(screen, camera=camera)
+    simulation.level.draw(screen, camera)
+    for projectile in simulation.projectiles:
+        if projectile is not None:
+            projectile.draw(screen, camera)
+
+    # 照準線（ローカルプレイヤーのみ）
+    if aim_pos is not None:
+        pygame.draw.line(screen, game.BLACK, camera.to_screen(*simulation.anchor()), aim_pos, 2)
+
+    # スコア表示
+    top_bar_surface = pygame.Surface((game.WIDTH, 40), pygame.SRCALPHA)
+    top_bar_surface.fill((0, 0, 0, 100))
+    screen.blit(top_bar_surface, (0, 0))
+    for player, (score, shots_left) in enumerate(zip(simulation.scores, simulation.shots_left)):
+        name = "You" if player == peer.player else f"Player {player + 1}"
+        text = font.render(f"{name}: {score} hits, {shots_left} shots", True, game.WHITE)
+        screen.blit(text, (20 + player * 400, 10))
+
+    if peer.desync is not None:
+        message = "Desync detected!"
+    elif peer.remote_left:
+        message = "Opponent left"
+    elif simulation.is_over():
+        message = "Match over"
+    elif simulation.turn_based:
+        message = "Your turn" if simulation.turn == peer.player else "Opponent's turn"
+    else:
+        message = None
+    if message:
+        text = font.render(message, True, game.WHITE)
+        screen.blit(text, (game.WIDTH//2 - text.get_width()//2, 50))
+
+async def run_versus(host, port, room, level_number=1, difficulty=game.DIFFICULTY_NORMAL, turn_based=True):
+    peer = LockstepPeer()
+    print(f"Waiting for opponent in room '{room}'...")
+    settings = await peer.connect(host, port, room, level_number, difficulty, turn_based)
+    simulation = VersusSimulation(settings["level"], settings["difficulty"],
+                                  players=settings["players"], turn_based=settings["turn_based"])
+    font = pygame.font.SysFont('Arial', 20)
+    # 画面より広いレベル用のカメラ（見た目だけなので決定論的なシミュレーションには含めない）
+    camera = Camera(game.WIDTH)
+
+    dragging = False
+    start_time = time.perf_counter()
+    last_frame_time = start_time
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.MOUSEBUTTONDOWN and simulation.can_launch(peer.player):
+                    anchor_x, anchor_y = simulation.anchor()
+                    mouse_x, mouse_y = camera.to_world(*event.pos)
+                    if math.hypot(mouse_x - anchor_x, mouse_y - anchor_y) < 50:
+                        dragging = True
+                elif event.type == pygame.MOUSEBUTTONUP and dragging:
+                    dragging = False
+                    angle, power = game.launch_parameters(*simulation.anchor(), *camera.to_world(*event.pos),
+                                                          simulation.difficulty)
+                    peer.schedule_launch(angle, power)
+
+            # 実時間に追いつくまで進める（相手の入力待ちなら止まる）
+            target_frame = int((time.perf_counter() - start_time) / FRAME_TIME)
+            steps = 0
+            while peer.frame < target_frame and steps < MAX_CATCHUP_FRAMES and peer.advance(simulation):
+                steps += 1
+
+            now = time.perf_counter()
+            camera.follow(follow_target(simulation, peer), simulation.level.width, now - last_frame_time)
+            last_frame_time = now
+            draw_versus(game.screen, simulation, peer, pygame.mouse.get_pos() if dragging else None, font, camera)
+            pygame.display.flip()
+
+            # ネットワークの受信タスクを動かすために await で次のフレームまで待つ
+            await asyncio.sleep(max(0.0, start_time + (target_frame + 1) * FRAME_TIME - time.perf_counter()))
+    finally:
+        peer.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lockstep versus mode (start netplay.py as the relay first)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--room", default="default")
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--difficulty", type=int, choices=[0, 1, 2], default=game.DIFFICULTY_NORMAL)
+    parser.add_argument("--simultaneous", action="store_true", help="both players may shoot at the same time")
+    args = parser.parse_args()
+    game.init_display()
+    pygame.display.set_caption("Slingshot Physics Game - Versus")
+    asyncio.run(run_versus(args.host, args.port, args.room, args.level, args.difficulty,
+                           turn_based=not args.simultaneous))
+    pygame.quit()
@@ -0,0 +1,14 @@
+import os
+import sys
+import pytest
+
+# テストではウィンドウを開かない（画面は下の init_display で作る）
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+@pytest.fixture(autouse=True, scope="session")
+def display():
+    # 描画やフォントを使うテストのために、ダミーのビデオドライバーで画面を作っておく
+    import slingshot_game
+    return slingshot_game.init_display()
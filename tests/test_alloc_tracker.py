@@ -0,0 +1,85 @@
+import pygame
+import slingshot_game as game
+from alloc_tracker import AllocationTracker, FunctionIndex
+
+def test_function_index_finds_innermost_function():
+    index = FunctionIndex()
+    source = game.__file__
+    with open(source, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    line = next(i for i, text in enumerate(lines, 1) if "def render_top_bar" in text) + 1
+    assert index.lookup(source, line) == "slingshot_game.py:UILayer.render_top_bar"
+    assert index.lookup(source, 1) == "slingshot_game.py:<module>"
+
+def test_surfaces_are_counted_per_call_site():
+    tracker = AllocationTracker()
+    tracker.start()
+    try:
+        tracker.begin_frame()
+        game.render_projectile_sprite(10, game.RED)
+        game.render_projectile_sprite(12, game.RED)
+        pygame.Surface((4, 4))  # テスト自身の確保はゲームの呼び出し元に数えない
+        report = tracker.end_frame()
+        tracker.begin_frame()
+        empty = tracker.end_frame()
+    finally:
+        tracker.stop()
+    assert report["surfaces"]["slingshot_game.py:render_projectile_sprite"] == 2
+    assert report["surfaces"]["<other>"] == 1
+    assert report["objects"] >= 3
+    assert report["peak_bytes"] > 0
+    assert empty["surfaces"] == {}
+    assert [r["frame"] for r in tracker.frames] == [0, 1]
+
+def test_stop_restores_pygame():
+    surface_class = pygame.Surface
+    sysfont = pygame.font.SysFont
+    tracker = AllocationTracker()
+    tracker.start()
+    assert pygame.Surface is not surface_class
+    tracker.stop()
+    assert pygame.Surface is surface_class and pygame.font.SysFont is sysfont
+
+def test_retained_memory_is_attributed_to_call_sites():
+    tracker = AllocationTracker()
+    tracker.start()
+    try:
+        tracker.begin_window()
+        kept = [game.Projectile(i, i) for i in range(200)]
+        retained = tracker.end_window()
+    finally:
+        tracker.stop()
+    assert any(site.startswith("slingshot_game.py:Projectile") and size > 0
+               for site, (size, blocks) in retained.items())
+    del kept
+
+def test_alpha_circle_matches_a_surface_per_circle():
+    # 作業用サーフェスを使い回しても、円ごとにサーフェスを作っていたときと同じピクセルになる
+    for radius, color in ((12, (255, 100, 0, 180)), (2.7, (0, 220, 0, 90)), (3, (200, 200, 200, 40))):
+        expected = pygame.Surface((40, 40), pygame.SRCALPHA)
+        circle = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(circle, color, (radius, radius), radius)
+        expected.blit(circle, (5.5, 7))
+        actual = pygame.Surface((40, 40), pygame.SRCALPHA)
+        game.blit_alpha_circle(actual, color, radius, (5.5, 7))
+        assert pygame.image.tobytes(actual, "RGBA") == pygame.image.tobytes(expected, "RGBA")
+
+def test_drawing_a_shot_in_flight_creates_no_surfaces():
+    session = game.Game()
+    session.apply_difficulty_settings()
+    session.launch(-0.5, 20)
+    for _ in range(40):
+        session.update((0, 0))
+    session.projectile.generate_collision_particles()
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    game.draw_game(screen, session)  # キャッシュを温める
+    tracker = AllocationTracker()
+    tracker.start()
+    try:
+        tracker.begin_frame()
+        game.draw_game(screen, session)
+        report = tracker.end_frame()
+    finally:
+        tracker.stop()
+        session.assets.shutdown()
+    assert report["surfaces"] == {}
@@ -0,0 +1,86 @@
+import os
+import time
+import pygame
+import asset_manager
+import slingshot_game as game
+from asset_manager import AssetManager
+
+def save_image(directory, name, size=(16, 16)):
+    pygame.image.save(pygame.Surface(size), os.path.join(directory, name))
+
+def test_loads_and_caches(tmp_path):
+    save_image(tmp_path, "a.png")
+    assets = AssetManager(str(tmp_path))
+    try:
+        image = assets.get("a.png", wait=True)
+        assert image.get_size() == (16, 16)
+        assert assets.is_ready(["a.png"])
+        # 2回目はキャッシュから同じサーフェスを返す
+        assert assets.get("a.png") is image
+        assert assets.request("a.png").result() is image
+    finally:
+        assets.shutdown()
+
+def test_evicts_least_recently_used_over_budget(tmp_path):
+    for name in ("a.png", "b.png", "c.png"):
+        save_image(tmp_path, name, (32, 32))
+    first = AssetManager(str(tmp_path))
+    size = first.get("a.png", wait=True).get_pitch() * 32
+    first.shutdown()
+
+    assets = AssetManager(str(tmp_path), memory_budget=size * 2)
+    try:
+        assets.get("a.png", wait=True)
+        assets.get("b.png", wait=True)
+        assets.get("a.png")  # a を使ったので次に追い出されるのは b
+        assets.get("c.png", wait=True)
+        assert assets.memory_used <= assets.memory_budget
+        assert assets.is_ready(["a.png", "c.png"])
+        assert not assets.is_ready(["b.png"])
+    finally:
+        assets.shutdown()
+
+def test_failed_load_returns_none(tmp_path):
+    assets = AssetManager(str(tmp_path))
+    try:
+        assert assets.get("missing.png", wait=True) is None
+        assert assets.get("notes.txt", wait=True) is None
+        # 失敗したアセットで読み込み画面が止まらないように、失敗も読み込み済みとして扱う
+        assert assets.is_ready(["missing.png", "notes.txt"])
+    finally:
+        assets.shutdown()
+
+def test_failure_expires_and_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(asset_manager, "FAILURE_RETRY_INTERVAL", 0.2)
+    assets = AssetManager(str(tmp_path))
+    try:
+        assert assets.get("late.png", wait=True) is None
+        assert assets.is_ready(["late.png"])
+        # 失敗を覚えている間はファイルが置かれても読み直さない
+        save_image(tmp_path, "late.png")
+        assert assets.get("late.png", wait=True) is None
+        time.sleep(0.25)
+        # 再試行の時刻を過ぎたら、読み直すまでは読み込み済みとして扱わない
+        assert not assets.is_ready(["late.png"])
+        assert assets.get("late.png", wait=True).get_size() == (16, 16)
+        assert assets.is_ready(["late.png"])
+    finally:
+        assets.shutdown()
+
+def test_level_background_is_prefetched_and_drawn(tmp_path, monkeypatch):
+    image = pygame.Surface((game.WIDTH, game.HEIGHT))
+    image.fill((10, 20, 30))
+    pygame.image.save(image, os.path.join(tmp_path, "sky.png"))
+    monkeypatch.setattr(game, "ASSETS_DIR", str(tmp_path))
+    monkeypatch.setattr(game, "_level_definitions", {1: dict(game.load_level_definition(1), background="sky.png")})
+    assert "sky.png" in game.level_assets(1)
+
+    session = game.Game()
+    try:
+        session.apply_difficulty_settings()
+        session.assets.get("sky.png", wait=True)
+        screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+        game.draw_game(screen, session.snapshot())
+        assert screen.get_at((game.WIDTH - 5, game.HEIGHT // 2))[:3] == (10, 20, 30)
+    finally:
+        session.assets.shutdown()
@@ -0,0 +1,59 @@
+import pytest
+import bench
+import slingshot_game as game
+
+def report(**ns_per_step):
+    return {"results": {name: {"ns_per_step": value[0], "ci95_ns": value[1]}
+                        for name, value in ns_per_step.items()}}
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = report(fast=(100, 1), same=(100, 1), slow=(100, 1), noisy=(100, 1))
+    current = report(fast=(80, 1), same=(105, 1), slow=(130, 2), noisy=(125, 20), new=(50, 1))
+    assert bench.compare(current, baseline, 0.10) == ["slow"]
+    # 閾値を上げれば回帰ではなくなる
+    assert bench.compare(current, baseline, 0.50) == []
+
+def test_confidence_interval_gives_noisy_results_the_benefit_of_the_doubt():
+    baseline = report(shot=(100, 1))
+    assert bench.compare(report(shot=(115, 10)), baseline, 0.10) == []
+    assert bench.compare(report(shot=(115, 2)), baseline, 0.10) == ["shot"]
+
+def test_calibrate_doubles_until_min_sample_time():
+    calls = []
+    def run(n):
+        calls.append(n)
+        return n * 1000, n  # 1ステップ 1µs
+    n = bench.calibrate(run)
+    assert n * 1000 >= bench.MIN_SAMPLE_TIME * 1e9
+    assert (n // 2) * 1000 < bench.MIN_SAMPLE_TIME * 1e9
+    assert calls == [64 * 2**i for i in range(len(calls))]
+
+def test_measure_reports_per_step_cost():
+    result = bench.measure(lambda n: (n * 250, n), samples=5, warmup=1)
+    assert result["ns_per_step"] == pytest.approx(250)
+    assert result["ci95_ns"] == pytest.approx(0)
+    assert result["steps_per_sec"] == pytest.approx(4e6)
+    assert result["samples"] == 5
+
+def test_t_value():
+    assert bench.t_value(1) == 12.71
+    assert bench.t_value(14) == 2.13
+    assert bench.t_value(100) == 1.96
+
+@pytest.mark.parametrize("name", ["projectile_update", "obstacle_check_collision", "target_check_collision",
+                                  "target_update_particles", "level_is_complete"])
+def test_micro_benchmarks_do_about_n_steps(name):
+    elapsed, steps = bench.BENCHMARKS[name](500)
+    assert elapsed > 0
+    assert 500 <= steps < 600
+
+def test_shot_benchmarks_scale_with_n():
+    _, few = bench.BENCHMARKS["shot_level1_d1"](100)
+    _, many = bench.BENCHMARKS["shot_level1_d1"](5000)
+    # 1発の途中では止めないので、n を超えるのは最後の1発の分だけ
+    assert 100 <= few < 100 + bench.MAX_SHOT_FRAMES
+    assert 5000 <= many < 5000 + bench.MAX_SHOT_FRAMES
+
+def test_shot_benchmarks_cover_every_level():
+    assert sorted({name.split("_")[1] for name in bench.BENCHMARKS if name.startswith("shot_")}) == \
+        sorted(f"level{number}" for number in game.level_numbers())
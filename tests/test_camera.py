@@ -0,0 +1,27 @@
+from camera import Camera
+
+def pan(fps, seconds=0.5):
+    camera = Camera(800)
+    for _ in range(int(fps * seconds)):
+        camera.follow(1400, 2000, dt=1 / fps)
+    return camera.x
+
+def test_pan_speed_does_not_depend_on_frame_rate():
+    # 60fps と 10fps（アイドル時）で同じ時間が経てば同じ位置にいる
+    assert abs(pan(60) - pan(10)) < 1.0
+
+def test_settles_inside_world():
+    camera = Camera(800)
+    for _ in range(600):
+        camera.follow(5000, 1400)
+    assert camera.x == 600
+    assert not camera.moving
+    camera.follow(0, 1400)
+    assert camera.moving
+
+def test_world_screen_round_trip():
+    camera = Camera(800)
+    camera.x = 123.4
+    assert camera.to_world(*camera.to_screen(500, 300)) == (500, 300)
+    assert camera.visible(camera.x + 400)
+    assert not camera.visible(camera.x + 800 + camera.margin + 1)
@@ -0,0 +1,35 @@
+import os
+import signal
+import subprocess
+import sys
+import pygame
+import pytest
+from capture import FrameCapture
+
+def test_dead_worker_raises_instead_of_blocking(tmp_path):
+    # drop=False で空きスロットを待っている間にワーカーが落ちたら、固まらずに例外にする
+    surface = pygame.Surface((32, 24))
+    capture = FrameCapture(surface, str(tmp_path), slots=2, workers=1, drop=False)
+    worker = capture.workers[0]
+    os.kill(worker.pid, signal.SIGKILL)
+    worker.join()
+    with pytest.raises(RuntimeError, match="worker exited"):
+        for _ in range(10):
+            capture.capture(surface, timestamp=0.0)
+
+def test_captured_frames_are_written(tmp_path):
+    surface = pygame.Surface((32, 24))
+    surface.fill((10, 20, 30))
+    capture = FrameCapture(surface, str(tmp_path), slots=2, workers=1, drop=False)
+    for frame in range(5):
+        capture.capture(surface, timestamp=frame / 60)
+    capture.close()
+    assert sorted(os.listdir(tmp_path)) == [f"frame_{i:06d}.png" for i in range(5)] + ["index.json"]
+    assert pygame.image.load(str(tmp_path / "frame_000003.png")).get_at((5, 5))[:3] == (10, 20, 30)
+
+def test_importing_the_game_does_not_open_a_window():
+    # spawn のエンコーダーはメインモジュール (slingshot_game) を読み込み直すので、インポートだけで画面を作らないこと
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    code = "import pygame, slingshot_game; print(pygame.display.get_init(), slingshot_game.screen)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True).stdout
+    assert output.splitlines()[-1] == "False None"
@@ -0,0 +1,42 @@
+import pytest
+from force_field import ForceField, bake_field, source_force
+
+SOURCES = [
+    {"type": "wind", "x": 200, "y": 0, "width": 300, "height": 400, "force": [0.05, -0.02]},
+    {"type": "fan", "x": 600, "y": 500, "angle": -90, "range": 250, "strength": 0.4, "spread": 30},
+    {"type": "well", "x": 900, "y": 300, "radius": 60, "strength": 0.3},
+]
+
+def exact_force(x, y):
+    return tuple(map(sum, zip(*(source_force(source, x, y) for source in SOURCES))))
+
+def test_grid_points_match_sources():
+    field = ForceField(SOURCES, 1200, 600)
+    for x, y in [(0, 0), (240, 100), (600, 400), (900, 300), (960, 300), (1200, 600)]:
+        # 右下の端はグリッドの内側に少しだけ寄せてサンプリングするので、わずかな誤差を許す
+        assert field.sample(x, y) == pytest.approx(exact_force(x, y), abs=1e-6)
+
+def test_sampling_between_grid_points_is_close_to_sources():
+    field = ForceField(SOURCES, 1200, 600, cell=5)
+    # 力が滑らかに変わる場所（扇形の中と井戸の外側）では補間の誤差は小さい
+    for x, y in [(603, 411), (598, 377), (1000, 300), (900, 412)]:
+        assert field.sample(x, y) == pytest.approx(exact_force(x, y), abs=5e-3)
+
+def test_outside_grid_uses_edge_values():
+    field = ForceField(SOURCES, 1200, 600)
+    assert field.sample(-50, 300) == field.sample(0, 300)
+    assert field.sample(5000, 9000) == pytest.approx(field.sample(1200, 600))
+
+def test_sample_many_matches_sample():
+    field = ForceField(SOURCES, 1200, 600)
+    xs = [-10, 0, 123.4, 599.9, 903.7, 1250]
+    ys = [10, 599, 77.7, 480.2, 301.1, -3]
+    forces_x, forces_y = field.sample_many(xs, ys)
+    for x, y, force_x, force_y in zip(xs, ys, forces_x, forces_y):
+        assert (force_x, force_y) == pytest.approx(field.sample(x, y), abs=1e-12)
+
+def test_bake_field_reuses_grids():
+    assert bake_field([], 1200, 600) is None
+    assert bake_field(SOURCES, 1200, 600) is bake_field([dict(source) for source in SOURCES], 1200, 600)
+    with pytest.raises(ValueError):
+        bake_field([{"type": "tornado"}], 1200, 600)
@@ -0,0 +1,90 @@
+import time
+import slingshot_game as game
+from game_server import MAX_PENDING_SHOTS, SessionHost, ShardedServer, ShotSession, sessions_within_budget
+
+def run_until_done(session, budget):
+    results = []
+    total_steps = 0
+    while session.busy:
+        tick_results, steps = session.tick(budget)
+        results.extend(tick_results)
+        total_steps += steps
+        assert steps <= budget
+    return results, total_steps
+
+def test_result_does_not_depend_on_tick_budget():
+    # 1ティックに進めるステップ数を変えても同じショットは同じ結果になる
+    outcomes = []
+    for budget in (1, 7, 16):
+        session = ShotSession("s", 1, game.DIFFICULTY_NORMAL)
+        session.submit(0, -0.5, 20, None)
+        session.submit(1, -0.8, 25, None)
+        results, steps = run_until_done(session, budget)
+        assert steps == sum(result["frames"] for result in results)
+        outcomes.append([(result["hits"], result["frames"]) for result in results])
+    assert outcomes[0] == outcomes[1] == outcomes[2]
+
+def test_claimed_hits_are_verified():
+    session = ShotSession("s", 1, game.DIFFICULTY_NORMAL)
+    session.submit(0, -0.5, 20, None)
+    (result,), _ = run_until_done(session, 16)
+    session = ShotSession("s", 1, game.DIFFICULTY_NORMAL)
+    session.submit(0, -0.5, 20, result["hits"])
+    session.submit(1, -0.5, 20, result["hits"] + 5)
+    results, _ = run_until_done(session, 16)
+    assert results[0]["status"] == "verified"
+    assert results[1]["status"] == "mismatch"
+
+def test_shots_beyond_the_level_allowance_are_rejected():
+    session = ShotSession("s", 1, game.DIFFICULTY_HARD)
+    for shot_id in range(session.shots_left + 1):
+        session.submit(shot_id, 0.3, 5, None)  # 標的に届かない弱いショット
+        run_until_done(session, 16)
+    assert session.shots_left == 0
+    session.submit(99, 0.3, 5, None)
+    results, _ = run_until_done(session, 16)
+    assert results[0]["status"] == "rejected"
+
+def test_host_rejects_unknown_sessions_and_backpressure():
+    host = SessionHost(max_sessions=1)
+    assert host.create_session("a", 1, game.DIFFICULTY_NORMAL)
+    assert not host.create_session("b", 1, game.DIFFICULTY_NORMAL)
+    assert not host.submit_shot("b", 0, -0.5, 20)
+    for shot_id in range(MAX_PENDING_SHOTS):
+        assert host.submit_shot("a", shot_id, -0.5, 20)
+    assert not host.submit_shot("a", 99, -0.5, 20)
+    reasons = [result["reason"] for result in host.drain_results()]
+    assert reasons == ["unknown session", "backpressure"]
+    host.tick()
+    assert host.steps > 0 and host.stats()["ticks"] == 1
+
+def test_sessions_are_sharded_by_id():
+    server = ShardedServer(workers=2)
+    try:
+        session_ids = list(range(6))
+        for session_id in session_ids:
+            server.create_session(session_id, 1, game.DIFFICULTY_NORMAL)
+            server.submit_shot(session_id, session_id, -0.5, 20)
+        counts = [stats["sessions"] for stats in server.stats()]
+        expected = [0, 0]
+        for session_id in session_ids:
+            expected[server.connections.index(server.shard(session_id))] += 1
+        assert counts == expected == [3, 3]
+
+        results = []
+        deadline = time.monotonic() + 20
+        while len(results) < len(session_ids) and time.monotonic() < deadline:
+            results.extend(server.results())
+            time.sleep(0.05)
+        assert sorted(result["session"] for result in results) == session_ids
+        assert all(result["status"] == "verified" for result in results)
+    finally:
+        server.shutdown()
+
+def test_sessions_within_budget_scales_with_measured_latency():
+    budget = 1.0 / 60
+    # p99 が予算の半分なら倍のセッションまで入る
+    assert sessions_within_budget(50, budget / 2, budget) == 100
+    assert sessions_within_budget(50, budget * 2, budget) == 25
+    assert sessions_within_budget(0, 0.01, budget) == 0
+    assert sessions_within_budget(10, 0.0, budget) == 0
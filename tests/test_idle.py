@@ -0,0 +1,54 @@
+import time
+import pygame
+import slingshot_game as game
+
+game.VERBOSE = False
+
+def waiting_game(timer_offset):
+    session = game.Game()
+    session.apply_difficulty_settings()
+    session.game_state = game.WAITING_FOR_NEXT_SHOT
+    session.next_shot_timer = pygame.time.get_ticks() + timer_offset
+    return session
+
+def test_static_screens_wait_for_the_idle_frame():
+    session = game.Game()
+    assert session.game_state == game.DIFFICULTY_SELECT
+    assert game.idle_timeout(session) == 1000 // game.IDLE_FPS
+    session.assets.shutdown()
+
+def test_input_wakes_an_idle_screen():
+    session = game.Game()
+    pygame.event.clear()
+    pygame.event.post(pygame.event.Event(pygame.USEREVENT, code=1))
+    start = time.perf_counter()
+    events = game.wait_for_events(session)
+    assert time.perf_counter() - start < 0.05
+    assert [event.type for event in events] == [pygame.USEREVENT]
+    session.assets.shutdown()
+
+def test_expired_timer_does_not_block():
+    # タイマーが切れた後は pygame.event.wait(0)（無期限の待ち）を呼ばずにすぐ戻る
+    session = waiting_game(-3)
+    pygame.event.clear()
+    start = time.perf_counter()
+    assert game.wait_for_events(session) == []
+    assert time.perf_counter() - start < 0.05
+    session.assets.shutdown()
+
+def test_wait_is_bounded_by_timer():
+    session = waiting_game(30)
+    pygame.event.clear()
+    start = time.perf_counter()
+    game.wait_for_events(session)
+    assert time.perf_counter() - start < 0.5
+    session.assets.shutdown()
+
+def test_moving_states_are_not_idle():
+    session = waiting_game(1000)
+    session.game_state = game.PROJECTILE_IN_MOTION
+    assert game.idle_timeout(session) is None
+    session.game_state = game.AIMING
+    session.dragging = True
+    assert game.idle_timeout(session) is None
+    session.assets.shutdown()
@@ -0,0 +1,55 @@
+import math
+import pygame
+import slingshot_game as game
+
+game.VERBOSE = False
+
+def aiming_game():
+    session = game.Game()
+    session.apply_difficulty_settings()
+    anchor = (session.slingshot.x, session.slingshot.y - session.slingshot.height//2)
+    session.handle_event(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=anchor, button=1))
+    assert session.dragging
+    session.update((anchor[0] - 40, anchor[1] + 20))
+    return session, anchor
+
+def test_drag_position_is_clamped_to_max_drag():
+    slingshot = game.Slingshot(100, game.HEIGHT - 100)
+    anchor_x, anchor_y = slingshot.x, slingshot.y - slingshot.height//2
+    assert game.drag_position(slingshot, anchor_x - 30, anchor_y + 40) == (anchor_x - 30, anchor_y + 40)
+    x, y = game.drag_position(slingshot, anchor_x - 300, anchor_y + 400)
+    assert math.hypot(x - anchor_x, y - anchor_y) == 150
+    assert (x - anchor_x) / (y - anchor_y) == -300 / 400
+
+def test_aim_is_drawn_at_the_late_sampled_mouse():
+    session, anchor = aiming_game()
+    early = (session.projectile.x, session.projectile.y)
+    late = (anchor[0] - 90, anchor[1] + 50)
+    samples = []
+    def sample_mouse():
+        samples.append(late)
+        return late
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    game.draw_game(screen, session, sample_mouse)
+    assert len(samples) == 1
+    # 弾の本体は後で読んだ位置に描かれ、シミュレーションの状態は変わらない
+    assert screen.get_at((late[0] + 5, late[1] + 5))[:3] == game.RED
+    assert screen.get_at((int(early[0]) + 5, int(early[1]) + 5))[:3] != game.RED
+    assert (session.projectile.x, session.projectile.y) == early
+    session.assets.shutdown()
+
+def test_late_sample_is_clamped_like_update():
+    session, anchor = aiming_game()
+    far = (anchor[0] + 600, anchor[1])
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    game.draw_game(screen, session, lambda: far)
+    assert screen.get_at((anchor[0] + 150 + 5, anchor[1] + 5))[:3] == game.RED
+    session.assets.shutdown()
+
+def test_mouse_is_not_sampled_when_not_aiming():
+    session, anchor = aiming_game()
+    session.dragging = False
+    calls = []
+    game.draw_game(pygame.Surface((game.WIDTH, game.HEIGHT)), session, lambda: calls.append(1) or (0, 0))
+    assert calls == []
+    session.assets.shutdown()
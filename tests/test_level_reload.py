@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import pytest
+import slingshot_game as game
+from file_watcher import FileWatcher
+
+@pytest.fixture
+def levels_dir(tmp_path, monkeypatch):
+    # レベル定義を一時ディレクトリにコピーして、そこを監視させる
+    for name in os.listdir(game.LEVELS_DIR):
+        shutil.copy(os.path.join(game.LEVELS_DIR, name), tmp_path)
+    monkeypatch.setattr(game, "LEVELS_DIR", str(tmp_path))
+    monkeypatch.setattr(game, "_level_definitions", {})
+    return tmp_path
+
+def save_level(levels_dir, level_number, definition, mtime_ns):
+    path = os.path.join(levels_dir, f"level{level_number}.json")
+    with open(path, "w") as f:
+        json.dump(definition, f)
+    # 同じ秒の中で書き直しても変更として検出されるように更新時刻を明示する
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+    return path
+
+def test_watcher_reports_changed_and_new_files(tmp_path):
+    (tmp_path / "a.json").write_text("{}")
+    (tmp_path / "notes.txt").write_text("")
+    watcher = FileWatcher(str(tmp_path), ".json")
+    assert watcher.poll() == []
+    os.utime(tmp_path / "a.json", ns=(1, 1))
+    (tmp_path / "b.json").write_text("{}")
+    assert watcher.poll() == [str(tmp_path / "a.json"), str(tmp_path / "b.json")]
+    assert watcher.poll() == []
+
+def test_reload_rebuilds_only_changed_entities(levels_dir):
+    state = game.Game()
+    state.apply_difficulty_settings()
+    state.enable_level_editing()
+    level = state.current_level
+    targets = list(level.targets)
+    targets[0].hit = True
+    revision = level.revision
+
+    definition = json.loads(json.dumps(game.load_level_definition(1)))
+    definition["targets"][2]["dx"] += 30
+    save_level(levels_dir, 1, definition, 10**18)
+    state.reload_level_files()
+
+    assert state.current_level is level
+    assert level.targets[0] is targets[0] and level.targets[0].hit
+    assert level.targets[1] is targets[1]
+    assert level.targets[2] is not targets[2]
+    assert level.targets[2].x == targets[2].x + 30
+    assert level.revision == revision + 1
+    assert state.game_state == game.AIMING
+
+def test_other_levels_are_reloaded_without_touching_the_current_one(levels_dir):
+    state = game.Game()
+    state.apply_difficulty_settings()
+    state.enable_level_editing()
+    revision = state.current_level.revision
+    definition = {"base_distance": 300, "targets": [{"x": 500, "bottom": 80}], "obstacles": []}
+    save_level(levels_dir, 2, definition, 10**18)
+    state.reload_level_files()
+    assert state.current_level.revision == revision
+    assert len(game.Level(2).targets) == 1
+
+@pytest.mark.parametrize("broken", [
+    {"targets": [{"x": 500}]},  # "bottom" がない
+    {"targets": [], "fields": [{"type": "wind", "x": 100, "bottom": 300, "height": 100, "force": [0.1, 0]}]},  # 幅がない
+    {"targets": [], "fields": [{"type": "vortex", "x": 100, "bottom": 300}]},  # 未知の力場
+    {"targets": [{"x": "far", "bottom": 80}]},
+    {"targets": 3},
+])
+def test_malformed_level_keeps_the_old_one(levels_dir, broken):
+    state = game.Game()
+    state.apply_difficulty_settings()
+    state.enable_level_editing()
+    level = state.current_level
+    targets = list(level.targets)
+    revision = level.revision
+    original = game.load_level_definition(1)
+    other = game.load_level_definition(2)
+
+    save_level(levels_dir, 1, broken, 10**18)
+    save_level(levels_dir, 2, broken, 10**18)
+    for _ in range(3):
+        state.update((0, 0))
+    assert state.current_level is level
+    assert level.targets == targets and level.revision == revision
+    assert game.load_level_definition(1) is original
+    assert game.load_level_definition(2) is other
+
+    # 直したファイルはまた読み込まれる
+    fixed = json.loads(json.dumps(original))
+    fixed["targets"][0]["dx"] += 30
+    save_level(levels_dir, 1, fixed, 2 * 10**18)
+    state.update((0, 0))
+    assert level.revision == revision + 1
+    assert level.targets[0].x == targets[0].x + 30
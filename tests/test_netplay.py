@@ -0,0 +1,117 @@
+import asyncio
+import json
+from netplay import Relay, LockstepPeer, encode_message
+from versus import VersusSimulation
+
+async def start_relay():
+    relay = Relay()
+    server = await relay.start("127.0.0.1", 0)
+    return relay, server.sockets[0].getsockname()[1]
+
+async def connect_pair(port):
+    peers = [LockstepPeer(), LockstepPeer()]
+    settings = await asyncio.gather(*(peer.connect("127.0.0.1", port, "test", level=1, difficulty=1)
+                                      for peer in peers))
+    simulations = [VersusSimulation(s["level"], s["difficulty"], players=s["players"], turn_based=s["turn_based"])
+                   for s in settings]
+    return peers, simulations
+
+async def run_frames(peers, simulations, frames):
+    # 両方のピアを frames フレームまで進める（相手の進捗待ちの間はネットワークを動かす）
+    for _ in range(frames * 20):
+        for peer, simulation in zip(peers, simulations):
+            while peer.frame < frames and peer.advance(simulation):
+                pass
+        if all(peer.frame >= frames for peer in peers):
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("peers stalled")
+
+def test_can_advance_waits_for_remote_progress():
+    peer = LockstepPeer(input_delay=6)
+    # 相手の進捗がなくても INPUT_DELAY フレーム分だけは先に進める
+    assert peer.can_advance()
+    peer.frame = 6
+    assert not peer.can_advance()
+    peer.remote_progress = 0
+    assert peer.can_advance()
+    peer.remote_left = True
+    assert not peer.can_advance()
+
+def test_peers_stay_in_sync():
+    async def scenario():
+        relay, port = await start_relay()
+        peers, simulations = await connect_pair(port)
+        try:
+            peers[0].schedule_launch(-0.5, 20)
+            await run_frames(peers, simulations, 240)
+            await asyncio.sleep(0.05)
+            assert peers[0].desync is None and peers[1].desync is None
+            assert simulations[0].state_hash() == simulations[1].state_hash()
+            assert simulations[0].shots_left[0] == simulations[0].level.projectile_count - 1
+        finally:
+            for peer in peers:
+                peer.close()
+            relay.close()
+    asyncio.run(scenario())
+
+def test_hash_mismatch_is_detected():
+    async def scenario():
+        relay, port = await start_relay()
+        peers, simulations = await connect_pair(port)
+        try:
+            await run_frames(peers, simulations, 10)
+            simulations[1].scores[0] += 1  # 片方だけ状態がずれる
+            await run_frames(peers, simulations, 100)
+            await asyncio.sleep(0.05)
+            desync = peers[0].desync or peers[1].desync
+            assert desync is not None
+            assert desync.frame == peers[0].hash_interval
+        finally:
+            for peer in peers:
+                peer.close()
+            relay.close()
+    asyncio.run(scenario())
+
+def test_relay_drops_malformed_hello():
+    async def scenario():
+        relay, port = await start_relay()
+        try:
+            for line in (b"not json\n", b"[1, 2]\n", b'{"type": "hello"}\n'):
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(line)
+                assert await asyncio.wait_for(reader.read(), 1.0) == b""
+                writer.close()
+            assert relay.rooms == {}
+        finally:
+            relay.close()
+    asyncio.run(scenario())
+
+async def join_room(port, room):
+    # リレーに2つの生の接続で入室し、開始メッセージまで読む
+    connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+    for _, writer in connections:
+        writer.write(encode_message({"type": "hello", "room": room}))
+    for reader, _ in connections:
+        assert json.loads(await asyncio.wait_for(reader.readline(), 1.0))["type"] == "start"
+    return connections
+
+def test_relay_drops_malformed_message_after_hello():
+    async def scenario():
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        relay, port = await start_relay()
+        try:
+            for line in (b"[1]\n", b"3\n", b'{"frame": 1}\n'):
+                (sender_reader, sender), (peer_reader, peer) = await join_room(port, "bad")
+                sender.write(line)
+                # 送った側は切断され、相手には退出が通知される
+                assert await asyncio.wait_for(sender_reader.read(), 1.0) == b""
+                assert json.loads(await asyncio.wait_for(peer_reader.readline(), 1.0)) == {"type": "left", "player": 0}
+                peer.close()
+                await asyncio.sleep(0.05)
+                assert relay.rooms == {}
+            assert errors == []
+        finally:
+            relay.close()
+    asyncio.run(scenario())
@@ -0,0 +1,65 @@
+import threading
+import pytest
+from pipeline import SimulationThread, SnapshotBuffer
+
+def test_latest_before_publish():
+    assert SnapshotBuffer().latest() == (None, 0)
+    with pytest.raises(ValueError):
+        SnapshotBuffer(slots=1)
+
+def test_latest_snapshot_matches_its_sequence():
+    # スナップショットに通し番号そのものを入れて、読んだ組が食い違わないことを確かめる
+    buffer = SnapshotBuffer(slots=3)
+    count = 5000
+    def produce():
+        for sequence in range(1, count + 1):
+            buffer.publish(sequence)
+    producer = threading.Thread(target=produce)
+    producer.start()
+    last = 0
+    while producer.is_alive() or last < count:
+        snapshot, sequence = buffer.latest()
+        if snapshot is None:
+            continue
+        assert snapshot == sequence
+        assert sequence >= last
+        last = sequence
+    producer.join()
+
+def test_published_snapshot_is_not_overwritten_by_next_publish():
+    buffer = SnapshotBuffer(slots=2)
+    held = {"frame": 1}
+    buffer.publish(held)
+    snapshot, _ = buffer.latest()
+    buffer.publish({"frame": 2})
+    assert snapshot is held and held == {"frame": 1}
+    assert buffer.latest() == ({"frame": 2}, 2)
+
+def test_inputs_reach_step_and_snapshots_are_published():
+    buffer = SnapshotBuffer()
+    received = []
+    done = threading.Event()
+    def step(batches):
+        received.extend(batches)
+        if received:
+            done.set()
+        return len(received)
+    simulation = SimulationThread(step, buffer, tick_rate=200)
+    simulation.submit(["click"], (10, 20))
+    simulation.start()
+    assert done.wait(2.0)
+    simulation.stop()
+    simulation.join(2.0)
+    assert not simulation.is_alive()
+    assert received == [(["click"], (10, 20))]
+    assert buffer.latest()[0] == 1
+    assert simulation.error is None
+
+def test_step_error_is_kept_for_the_render_thread():
+    def step(batches):
+        raise RuntimeError("boom")
+    simulation = SimulationThread(step, SnapshotBuffer(), tick_rate=200)
+    simulation.start()
+    simulation.join(2.0)
+    assert not simulation.is_alive()
+    assert isinstance(simulation.error, RuntimeError)
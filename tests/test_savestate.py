@@ -0,0 +1,96 @@
+import slingshot_game as game
+from savestate import SNAPSHOT_SIZE, SnapshotRing, load_snapshot
+
+def shot_in_flight(frames=40):
+    # 標的に当たりそうなショットを途中まで進めたゲーム
+    state = game.Game()
+    state.apply_difficulty_settings()
+    state.launch(-0.5, 20)
+    for _ in range(frames):
+        game.step_shot(state.current_level, state.projectile)
+    state.next_shot_timer = 5000
+    return state
+
+def test_snapshot_layout_size():
+    # レイアウトを変えたら VERSION を上げること（保存済みのスナップショットが読めなくなる）
+    assert SNAPSHOT_SIZE == 6369
+    assert game.snapshot_codec.size == 6369
+
+def test_round_trip_restores_same_bytes():
+    state = shot_in_flight()
+    first = bytearray(SNAPSHOT_SIZE)
+    game.snapshot_codec.pack_into(first, 0, state, now=1000)
+
+    restored = game.Game()
+    game.snapshot_codec.restore(first, 0, restored, now=1000)
+    second = bytearray(SNAPSHOT_SIZE)
+    game.snapshot_codec.pack_into(second, 0, restored, now=1000)
+    assert first == second
+    assert restored.next_shot_timer == state.next_shot_timer
+    assert (restored.projectile.x, restored.projectile.vel_y) == (state.projectile.x, state.projectile.vel_y)
+
+def test_restored_shot_continues_identically():
+    # 復元した状態から進めても元のゲームと同じ軌道になる（巻き戻しの前提）
+    state = shot_in_flight()
+    buffer = bytearray(SNAPSHOT_SIZE)
+    game.snapshot_codec.pack_into(buffer, 0, state, now=0)
+    restored = game.Game()
+    game.snapshot_codec.restore(buffer, 0, restored, now=0)
+    for _ in range(120):
+        game.step_shot(state.current_level, state.projectile)
+        game.step_shot(restored.current_level, restored.projectile)
+    assert (restored.projectile.x, restored.projectile.y) == (state.projectile.x, state.projectile.y)
+    assert [target.hit for target in restored.current_level.targets] == \
+        [target.hit for target in state.current_level.targets]
+
+def test_ring_keeps_only_recent_frames():
+    state = shot_in_flight(frames=0)
+    ring = SnapshotRing(game.snapshot_codec, frames=4)
+    for _ in range(6):
+        ring.record(state, now=0)
+        game.step_shot(state.current_level, state.projectile)
+    assert ring.view(1) is None
+    assert ring.view(2) is not None
+    assert ring.view(6) is None
+    assert ring.restore(5, state, now=0)
+
+def crowded_game(targets=12):
+    # 既定のレイアウトより多い標的と障害物を持つレベル
+    state = game.Game()
+    state.apply_difficulty_settings()
+    level = state.current_level
+    level.targets = [game.Target(400 + 30 * i, 200 + 20 * (i % 5)) for i in range(targets)]
+    level.obstacles = [game.Obstacle(300 + 40 * i, 100, 20, 20) for i in range(10)]
+    return state
+
+def test_ring_grows_for_levels_with_many_targets():
+    state = crowded_game()
+    state.launch(-0.5, 20)
+    ring = SnapshotRing(game.snapshot_codec, frames=4)
+    for _ in range(40):
+        ring.record(state, now=0)
+        game.step_shot(state.current_level, state.projectile)
+    assert ring.codec.max_targets == 12 and ring.codec.max_obstacles == 10
+    assert ring.restore(ring.frame, state, now=0)
+    assert len(state.current_level.targets) == 12
+    assert len(state.current_level.obstacles) == 10
+
+def test_history_keeps_recording_with_many_targets(tmp_path):
+    state = crowded_game()
+    state.current_level.targets[0].hit = True
+    state.current_level.targets[0].hit_animation = 70000  # H の範囲を超えても落ちない
+    state.launch(-0.5, 20)
+    for _ in range(30):
+        state.update((0, 0))
+    path = str(tmp_path / "quicksave.bin")
+    state.quick_save(path)
+    state.rewind_last_shot()
+    assert state.projectile.launched is False
+    assert state.game_state == game.AIMING
+    assert len(state.current_level.targets) == 12
+
+    restored = game.Game()
+    restored.quick_load(path)
+    assert len(load_snapshot(path)) > SNAPSHOT_SIZE
+    assert [(t.x, t.y) for t in restored.current_level.targets] == [(400 + 30 * i, 200 + 20 * (i % 5)) for i in range(12)]
+    assert len(restored.current_level.obstacles) == 10
@@ -0,0 +1,54 @@
+import math
+import slingshot_game as game
+from shot_table import RECORD, ShotTable, build_table, definition_crc, simulate_row
+
+N_ANGLES = 8
+N_POWERS = 5
+
+def small_table(tmp_path):
+    path = str(tmp_path / "level1_d1.bin")
+    build_table(path, 1, 1, n_angles=N_ANGLES, n_powers=N_POWERS, workers=1)
+    return path
+
+def test_lookup_matches_simulation(tmp_path):
+    table = ShotTable(small_table(tmp_path))
+    try:
+        assert (table.n_angles, table.n_powers, table.target_count) == (N_ANGLES, N_POWERS, 3)
+        angle = table.angle_min + 3 * table.angle_step
+        powers = [table.power_min + i * table.power_step for i in range(N_POWERS)]
+        row = simulate_row((1, 1, angle, powers))
+        for i, power in enumerate(powers):
+            mask, landing_x, frames = RECORD.unpack_from(row, i * RECORD.size)
+            assert table.lookup(angle, power) == (bin(mask).count("1"), mask, landing_x, frames)
+            # 最も近い格子点の結果を返す
+            assert table.lookup(angle + table.angle_step * 0.4, power) == table.lookup(angle, power)
+    finally:
+        table.close()
+
+def test_lookup_wraps_angle_and_clamps_power(tmp_path):
+    table = ShotTable(small_table(tmp_path))
+    try:
+        assert table.lookup(table.angle_min, 10) == table.lookup(table.angle_min + 2 * math.pi, 10)
+        assert table.lookup(0.3, 1000) == table.lookup(0.3, table.power_max)
+        assert table.lookup(0.3, -5) == table.lookup(0.3, 0)
+    finally:
+        table.close()
+
+def test_open_rejects_stale_or_missing_tables(tmp_path):
+    path = small_table(tmp_path)
+    crc = definition_crc(game.load_level_definition(1))
+    table = ShotTable.open(path, expected_crc=crc)
+    assert table is not None
+    table.close()
+    assert ShotTable.open(path, expected_crc=crc + 1) is None
+    assert ShotTable.open(str(tmp_path / "missing.bin")) is None
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    assert ShotTable.open(path) is None
+
+def test_level_numbers_lists_every_level_file(tmp_path, monkeypatch):
+    # shot_table.py は --levels がなければこの全レベルのテーブルを作る
+    for name in ("level1.json", "level10.json", "level4.json", "level4.json.tmp", "notes.json"):
+        (tmp_path / name).write_text("{}")
+    monkeypatch.setattr(game, "LEVELS_DIR", str(tmp_path))
+    assert game.level_numbers() == [1, 4, 10]
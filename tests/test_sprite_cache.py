@@ -0,0 +1,43 @@
+import pygame
+import slingshot_game as game
+from sprite_cache import SpriteCache
+
+def test_renders_once_per_key():
+    cache = SpriteCache(max_entries=4)
+    calls = []
+    def render():
+        calls.append(1)
+        return pygame.Surface((4, 4))
+    first = cache.get("a", render)
+    assert cache.get("a", render) is first
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_evicts_least_recently_used():
+    cache = SpriteCache(max_entries=2)
+    sprites = {key: pygame.Surface((1, 1)) for key in "abc"}
+    cache.get("a", lambda: sprites["a"])
+    cache.get("b", lambda: sprites["b"])
+    cache.get("a", lambda: None)  # a を使ったので次に追い出されるのは b
+    cache.get("c", lambda: sprites["c"])
+    assert len(cache) == 2
+    assert cache.get("a", lambda: None) is sprites["a"]
+    assert cache.get("b", lambda: "rerendered") == "rerendered"
+
+def test_invalidate():
+    cache = SpriteCache()
+    cache.get("a", lambda: pygame.Surface((1, 1)))
+    cache.get("b", lambda: pygame.Surface((1, 1)))
+    cache.invalidate("a")
+    assert len(cache) == 1
+    cache.invalidate()
+    assert len(cache) == 0
+
+def test_projectile_sprite_is_shared_between_projectiles():
+    game.projectile_sprites.invalidate()
+    screen = pygame.Surface((200, 200))
+    game.Projectile(50, 50).draw(screen)
+    game.Projectile(120, 80).draw(screen)
+    assert len(game.projectile_sprites) == 1
+    # 本体の色が中心に描かれている
+    assert screen.get_at((50, 50))[:3] != (0, 0, 0)
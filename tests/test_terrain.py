@@ -0,0 +1,38 @@
+import pygame
+import slingshot_game as game
+from camera import Camera
+
+def pixels(surface):
+    return pygame.image.tostring(surface, "RGBA")
+
+def test_baked_textures_are_the_same_every_time():
+    # 固定シードなので何度描いても同じ（毎フレーム描き直していた頃のちらつきがない）
+    assert pixels(game.render_ground_strip(300)) == pixels(game.render_ground_strip(300))
+    assert pixels(game.render_slingshot_base(20, 80, (160, 82, 45))) == \
+        pixels(game.render_slingshot_base(20, 80, (160, 82, 45)))
+    assert pixels(game.render_ground_strip(300)) != pixels(game.render_ground_strip(300, seed=7))
+
+def test_textures_are_baked_once_per_size_and_color():
+    game.terrain_sprites.invalidate()
+    game.terrain_sprites.misses = 0
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    level = game.Level(3)
+    slingshot = game.Slingshot(100, game.HEIGHT - 100)
+    for _ in range(3):
+        for obstacle in level.obstacles:
+            obstacle.draw(screen)
+        slingshot.draw(screen)
+        game.draw_background(screen)
+    sizes = {("obstacle", o.width, o.height, o.color) for o in level.obstacles}
+    assert game.terrain_sprites.misses == len(sizes) + 2  # 障害物のサイズごと + 支柱 + 地面
+    assert len(game.terrain_sprites) == len(sizes) + 2
+
+def test_ground_covers_the_screen_at_any_scroll_offset():
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    camera = Camera(game.WIDTH)
+    ground_y = game.HEIGHT - game.GROUND_HEIGHT // 2
+    for x in (0, 1, 333, game.WIDTH - 1, game.WIDTH * 2 + 17):
+        camera.x = x
+        screen.fill((0, 0, 0))
+        game.draw_background(screen, camera)
+        assert all(screen.get_at((column, ground_y))[:3] == (100, 80, 0) for column in range(0, game.WIDTH, 7))
@@ -0,0 +1,48 @@
+import pygame
+import slingshot_game as game
+
+def draw(ui, screen, projectile_count=3, game_state=game.AIMING, mouse_pos=(0, 0)):
+    ui.draw(screen, game.Level(1), projectile_count, game_state, game.DIFFICULTY_NORMAL, mouse_pos)
+
+def test_unchanged_frame_is_not_rebuilt():
+    ui = game.UILayer()
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    draw(ui, screen)
+    draw(ui, screen)
+    draw(ui, screen, mouse_pos=(400, 300))  # 照準中はマウスの位置はUIに関係しない
+    assert ui.rebuilds == 1
+
+def test_changed_inputs_rebuild_only_their_parts():
+    ui = game.UILayer()
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    draw(ui, screen, projectile_count=3)
+    parts = len(ui.parts)
+    draw(ui, screen, projectile_count=2)
+    assert ui.rebuilds == 2
+    # トップバーは使い回し、情報パネルだけ新しく作る
+    assert len(ui.parts) == parts + 1
+    draw(ui, screen, projectile_count=3)
+    assert ui.rebuilds == 3
+    assert len(ui.parts) == parts + 1
+
+def test_hover_invalidates_difficulty_select():
+    ui = game.UILayer()
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    outside = (5, game.HEIGHT - 5)
+    inside = ui.button_rect(2).center
+    assert ui.hovered_button(outside) is None
+    assert ui.hovered_button(inside) == 2
+    draw(ui, screen, game_state=game.DIFFICULTY_SELECT, mouse_pos=outside)
+    draw(ui, screen, game_state=game.DIFFICULTY_SELECT, mouse_pos=outside)
+    assert ui.rebuilds == 1
+    draw(ui, screen, game_state=game.DIFFICULTY_SELECT, mouse_pos=inside)
+    assert ui.rebuilds == 2
+
+def test_invalidate_forces_rebuild():
+    ui = game.UILayer()
+    screen = pygame.Surface((game.WIDTH, game.HEIGHT))
+    draw(ui, screen)
+    ui.invalidate()
+    assert len(ui.parts) == 0
+    draw(ui, screen)
+    assert ui.rebuilds == 2